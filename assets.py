@@ -0,0 +1,91 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+import os
+
+
+class ImageRegistry(object):
+    """Loads every image once and hands out the same surface to each Cube.
+
+    Surfaces handed out by the registry are shared between all cubes of a
+    type and must be treated as read-only. Each cube gets its own Rect.
+    """
+    def __init__(self):
+        self._surfaces = {}
+        # Surfaces by their settings [images] key, filled by load_all
+        self._surfaces_by_key = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def load_all(self, settings):
+        """Loads and converts every image listed in settings [images], and
+        remembers each under its key for get_by_key."""
+        image_folder = settings['images']['FolderName'] + os.sep
+        for (key, filename) in settings['images'].items():
+            if key != 'foldername':
+                self._surfaces_by_key[key] = self.get(image_folder + filename)
+
+    def get_by_key(self, image_key):
+        """Returns the surface loaded by load_all for settings [images]
+        image_key. Counted as a hit, or a miss if it wasn't loaded."""
+        surface = self._surfaces_by_key.get(image_key.lower())
+        if surface is None:
+            self._misses += 1
+            raise KeyError("No image loaded for [images] %s" % image_key)
+
+        self._hits += 1
+        return surface
+
+    def get(self, filename):
+        """Returns the shared surface for filename, loading it if needed."""
+        surface = self._surfaces.get(filename)
+        if surface is None:
+            self._misses += 1
+            surface = load_image(filename)
+            self._surfaces[filename] = surface
+        else:
+            self._hits += 1
+
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self._surfaces_by_key.clear()
+
+
+def load_image(filename):
+    """Loads an image, converted to the display's format if there is one.
+
+    Without a display mode set (e.g. a headless Simulation) the image is
+    only used for its size and is left unconverted.
+    """
+    image = pygame.image.load(filename)
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        image = image.convert()
+
+    return image
+
+
+images = ImageRegistry()
@@ -0,0 +1,132 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+import collections
+import os
+import threading
+
+# Keys of settings [sound] naming a sound effect
+SOUND_EFFECTS = ['Loss', 'NextRound']
+
+# Mixer channel kept aside for the sound effects
+EFFECTS_CHANNEL = 0
+
+# Formats settings [sound] may point at, in order of preference when the
+# file named isn't there
+AUDIO_EXTENSIONS = ['.ogg', '.wav']
+
+
+class AudioManager(object):
+    """Plays the theme and the sound effects without ever waiting on them.
+
+    The theme is streamed from disk by pygame.mixer.music, and can be
+    started on a thread of its own so startup needn't wait on it. Sound
+    effects are decoded into memory once and played one after the other on
+    their own channel. The theme is ducked while they play and brought back
+    once the last one is done. update must be called every frame.
+
+    _music_lock keeps the theme's volume and _is_ducked in step between the
+    game and the music thread, so a duck never lands between the theme's
+    volume being chosen and its playback starting.
+    """
+    def __init__(self, settings):
+        self._folder = settings['sound']['FolderName'] + os.sep
+        self._volume = float(settings['sound']['Volume'])
+        self._ducked_volume = self._volume * float(settings['sound']['MusicDucking'])
+        self._theme_filename = find_audio_file(self._folder +
+                                               settings['sound']['Theme'])
+
+        pygame.mixer.set_reserved(EFFECTS_CHANNEL + 1)
+        self._channel = pygame.mixer.Channel(EFFECTS_CHANNEL)
+
+        self._sounds = {}
+        for sound_name in SOUND_EFFECTS:
+            sound = pygame.mixer.Sound(find_audio_file(
+                self._folder + settings['sound'][sound_name]))
+            sound.set_volume(self._volume)
+            self._sounds[sound_name] = sound
+
+        self._queue = collections.deque()
+        self._is_ducked = False
+        self._music_lock = threading.Lock()
+        self._music_thread = None
+
+    @property
+    def is_busy(self):
+        """Whether a sound effect is playing or waiting to be played."""
+        return bool(self._queue) or self._channel.get_busy()
+
+    def play_music(self, in_background=False):
+        """Starts looping the theme.
+
+        in_background loads and starts it on another thread instead, and
+        the theme comes in a little after this returns.
+        """
+        if in_background:
+            self._music_thread = threading.Thread(target=self._start_music,
+                                                  name='music', daemon=True)
+            self._music_thread.start()
+        else:
+            self._start_music()
+
+    def play(self, sound_name, repeat=1):
+        """Queues a sound effect to be played repeat times in a row."""
+        self._queue.append((self._sounds[sound_name], repeat))
+        self.update()
+
+    def update(self):
+        """Starts the next queued sound effect once the last one is done."""
+        if self._channel.get_busy():
+            return
+
+        if self._queue:
+            (sound, repeat) = self._queue.popleft()
+            self._duck_music()
+            self._channel.play(sound, loops=repeat - 1)
+        elif self._is_ducked:
+            self._set_ducked(False)
+
+    def _start_music(self):
+        pygame.mixer.music.load(self._theme_filename)
+        with self._music_lock:
+            pygame.mixer.music.set_volume(self._ducked_volume if self._is_ducked
+                                          else self._volume)
+            pygame.mixer.music.play(loops=-1)
+
+    def _duck_music(self):
+        if not self._is_ducked:
+            self._set_ducked(True)
+
+    def _set_ducked(self, is_ducked):
+        with self._music_lock:
+            pygame.mixer.music.set_volume(self._ducked_volume if is_ducked
+                                          else self._volume)
+            self._is_ducked = is_ducked
+
+
+def find_audio_file(filename):
+    """Returns filename, or the same sound in another format if it's missing.
+
+    This lets settings name theme.ogg before convert_audio.py has been run,
+    or theme.wav after the WAV has been removed.
+    """
+    if os.path.exists(filename):
+        return filename
+
+    root = os.path.splitext(filename)[0]
+    for extension in AUDIO_EXTENSIONS:
+        if os.path.exists(root + extension):
+            return root + extension
+
+    return filename
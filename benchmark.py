@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Plays every level of the campaigns with a bot, without a window, and
+reports how long the bot survives, its score, how many cubes were alive at
+once and how many simulation steps ran per second.
+
+    python benchmark.py --bot dodge --episodes 20 --format csv -o out.csv
+
+Rounds are spread over a pool of worker processes (--workers). Every round
+is seeded from its campaign, level, episode number and --seed alone, so a
+level's rounds play the same whichever campaigns and levels are run with
+it and however many workers run them.
+"""
+import os
+
+# Keeps pygame's greeting out of reports written to stdout
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import sys
+import argparse
+import collections
+import csv
+import datetime
+import hashlib
+import json
+import multiprocessing
+import random
+import subprocess
+import time
+
+import numpy
+
+from assets import images
+from gamesettings import get_settings
+from campaign import load_campaign, list_campaigns
+from collision import get_hit_mask
+from randomstreams import MAX_SEED
+from simulation import Simulation, load_game_config
+from simulation import TICK_RATE, HAS_DIED, IS_NEW_ROUND
+from simulation import CURRENT_SCORE, PLAYER_CUBE, BAD_CUBES
+from simulation import SCORE_ZONES
+
+# Episode outcomes
+DIED = 'died'
+CLEARED = 'cleared'
+TIMED_OUT = 'timed_out'
+
+CSV_FIELDS = ['campaign', 'level_index', 'level_name', 'bot', 'episodes',
+              'died_rate', 'cleared_rate', 'survival_min', 'survival_p10',
+              'survival_median', 'survival_p90', 'survival_max',
+              'survival_mean', 'score_mean', 'score_max', 'peak_cubes',
+              'steps_per_second']
+
+
+def make_pressed_keys(direction_x, direction_y):
+    """Builds a pressed_keys mapping for the arrows pointing that way."""
+    pressed_keys = collections.defaultdict(bool)
+    pressed_keys[pygame.K_LEFT] = direction_x < 0
+    pressed_keys[pygame.K_RIGHT] = direction_x > 0
+    pressed_keys[pygame.K_UP] = direction_y < 0
+    pressed_keys[pygame.K_DOWN] = direction_y > 0
+
+    return pressed_keys
+
+
+class IdleBot(object):
+    """Never touches the keyboard."""
+    def __init__(self, rng):
+        self._pressed_keys = make_pressed_keys(0, 0)
+
+    def get_pressed_keys(self, game_state):
+        return self._pressed_keys
+
+
+class RandomWalkBot(object):
+    """Holds a random direction for a random number of frames."""
+    def __init__(self, rng, min_frames=10, max_frames=40):
+        self._rng = rng
+        self._min_frames = min_frames
+        self._max_frames = max_frames
+        self._frames_left = 0
+        self._pressed_keys = None
+
+    def get_pressed_keys(self, game_state):
+        if self._frames_left <= 0:
+            self._frames_left = self._rng.randint(self._min_frames,
+                                                  self._max_frames)
+            self._pressed_keys = make_pressed_keys(self._rng.randint(-1, 1),
+                                                   self._rng.randint(-1, 1))
+        self._frames_left -= 1
+
+        return self._pressed_keys
+
+
+class DodgeBot(object):
+    """Runs away from nearby cubes, otherwise heads for a score zone."""
+    def __init__(self, rng, danger_distance=60):
+        self._danger_distance = danger_distance
+
+    def get_pressed_keys(self, game_state):
+        player_rect = game_state[PLAYER_CUBE].rect
+        (player_x, player_y) = player_rect.center
+        bad_cubes = game_state[BAD_CUBES]
+
+        danger_zone = player_rect.inflate(self._danger_distance * 2,
+                                          self._danger_distance * 2)
+        slots = numpy.flatnonzero(get_hit_mask(danger_zone, bad_cubes.boxes))
+
+        if len(slots):
+            boxes = bad_cubes.boxes[slots]
+            offsets_x = player_x - (boxes[:, 0] + boxes[:, 2] / 2)
+            offsets_y = player_y - (boxes[:, 1] + boxes[:, 3] / 2)
+            distances = (offsets_x ** 2 + offsets_y ** 2).clip(1)
+
+            # Closer cubes push harder
+            direction_x = (offsets_x / distances).sum()
+            direction_y = (offsets_y / distances).sum()
+            threshold = abs(direction_x) + abs(direction_y)
+
+            return make_pressed_keys(
+                direction_x if abs(direction_x) > threshold / 4 else 0,
+                direction_y if abs(direction_y) > threshold / 4 else 0)
+
+        if game_state[SCORE_ZONES]:
+            target = min(game_state[SCORE_ZONES],
+                         key=lambda zone: (abs(zone.centerx - player_x) +
+                                           abs(zone.centery - player_y)))
+            return make_pressed_keys(target.centerx - player_x,
+                                     target.centery - player_y)
+
+        return make_pressed_keys(0, 0)
+
+
+BOTS = {'idle': IdleBot, 'random': RandomWalkBot, 'dodge': DodgeBot}
+
+
+def run_episode(game_config, campaign, level_index, bot_name,
+                max_steps, seed):
+    """Plays one round of a level until the bot dies, clears it or runs
+    out of time."""
+    bot = BOTS[bot_name](random.Random('bot-%d' % seed))
+
+    simulation = Simulation(game_config, campaign)
+    simulation.start_campaign(campaign, level_index, seed)
+    game_state = simulation.game_state
+
+    outcome = TIMED_OUT
+    peak_cubes = 0
+    steps = 0
+    start_time = time.perf_counter()
+    while steps < max_steps:
+        simulation.step(bot.get_pressed_keys(game_state))
+        steps += 1
+
+        peak_cubes = max(peak_cubes, len(game_state[BAD_CUBES]))
+
+        if game_state[HAS_DIED]:
+            outcome = DIED
+            break
+
+        if game_state[IS_NEW_ROUND]:
+            outcome = CLEARED
+            break
+    elapsed_time = time.perf_counter() - start_time
+
+    return {'outcome': outcome,
+            'steps': steps,
+            'survival_seconds': steps / game_config[TICK_RATE],
+            'score': game_state[CURRENT_SCORE],
+            'peak_cubes': peak_cubes,
+            'elapsed_seconds': elapsed_time}
+
+
+# Loaded once per worker process by init_worker
+_worker_state = {}
+
+
+def init_worker():
+    """Loads the settings and cube images once per worker process."""
+    settings = get_settings()
+
+    images.load_all(settings)
+    _worker_state['game_config'] = load_game_config(settings)
+    _worker_state['campaigns'] = {}
+
+
+def get_episode_seed(campaign_filename, level_index, episode_index, seed):
+    """Returns the seed of one round, from what it plays and --seed only."""
+    digest = hashlib.sha1(('%s:%d:%d:%d' % (campaign_filename, level_index,
+                                            episode_index, seed)).encode())
+    return int.from_bytes(digest.digest()[:8], 'little') & MAX_SEED
+
+def run_task(task):
+    """Runs one (campaign, level, bot, max_steps, seed) task in a worker."""
+    (campaign_filename, level_index, bot_name, max_steps, seed) = task
+
+    campaigns = _worker_state['campaigns']
+    if campaign_filename not in campaigns:
+        campaigns[campaign_filename] = load_campaign(campaign_filename)
+    campaign = campaigns[campaign_filename]
+
+    episode = run_episode(_worker_state['game_config'], campaign,
+                          level_index, bot_name, max_steps, seed)
+    episode['campaign'] = campaign_filename
+    episode['level_index'] = level_index
+    episode['level_name'] = campaign.levels[level_index].name
+    episode['seed'] = seed
+
+    return episode
+
+
+def run_tasks(tasks, workers):
+    """Yields the episode of every task as soon as it is done."""
+    if workers == 1:
+        init_worker()
+        for task in tasks:
+            yield run_task(task)
+        return
+
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        chunk_size = max(1, len(tasks) // (workers * 8))
+        for episode in pool.imap_unordered(run_task, tasks, chunk_size):
+            yield episode
+
+
+def get_percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list."""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+
+    return (sorted_values[lower] +
+            (sorted_values[upper] - sorted_values[lower]) * (position - lower))
+
+
+def summarize_level(campaign_filename, level_index, level_name, bot_name,
+                    episodes):
+    """Merges the episodes played on one level into one report row."""
+    survival = sorted(episode['survival_seconds'] for episode in episodes)
+    scores = [episode['score'] for episode in episodes]
+    outcomes = collections.Counter(episode['outcome'] for episode in episodes)
+    total_steps = sum(episode['steps'] for episode in episodes)
+    total_time = sum(episode['elapsed_seconds'] for episode in episodes)
+
+    return {'campaign': campaign_filename,
+            'level_index': level_index,
+            'level_name': level_name,
+            'bot': bot_name,
+            'episodes': len(episodes),
+            'died_rate': outcomes[DIED] / len(episodes),
+            'cleared_rate': outcomes[CLEARED] / len(episodes),
+            'survival_min': survival[0],
+            'survival_p10': get_percentile(survival, 0.1),
+            'survival_median': get_percentile(survival, 0.5),
+            'survival_p90': get_percentile(survival, 0.9),
+            'survival_max': survival[-1],
+            'survival_mean': sum(survival) / len(survival),
+            'score_mean': sum(scores) / len(scores),
+            'score_max': max(scores),
+            'peak_cubes': max(episode['peak_cubes'] for episode in episodes),
+            'steps_per_second': total_steps / total_time if total_time else 0}
+
+
+def get_revision():
+    """Returns the current git commit, or None outside of a git checkout."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(report, output_format, output_file):
+    if output_format == 'json':
+        json.dump(report, output_file, indent=2)
+        output_file.write('\n')
+    else:
+        writer = csv.DictWriter(output_file, fieldnames=CSV_FIELDS,
+                                lineterminator='\n')
+        writer.writeheader()
+        for level in report['levels']:
+            writer.writerow(level)
+
+
+def parse_arguments(arguments):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--campaign', action='append', dest='campaigns',
+                        help='campaign file in campaigns/ (default: all)')
+    parser.add_argument('--bot', choices=sorted(BOTS), default='dodge')
+    parser.add_argument('--episodes', type=int, default=5,
+                        help='rounds played per level')
+    parser.add_argument('--max-seconds', type=float, default=120,
+                        help='game time after which a round is stopped')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('-o', '--output', help='file to write (default: stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--stream',
+                        help='also write every round to this file as a JSON '
+                             'line as soon as it finishes')
+
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = parse_arguments(arguments)
+
+    settings = get_settings()
+
+    game_config = load_game_config(settings)
+    max_steps = int(options.max_seconds * game_config[TICK_RATE])
+
+    campaign_filenames = options.campaigns or list_campaigns()
+    tasks = []
+    for campaign_filename in campaign_filenames:
+        levels = load_campaign(campaign_filename).levels
+        for level_index in range(len(levels)):
+            for episode_index in range(options.episodes):
+                tasks.append((campaign_filename, level_index, options.bot,
+                              max_steps,
+                              get_episode_seed(campaign_filename, level_index,
+                                               episode_index, options.seed)))
+
+    stream_file = open(options.stream, 'w') if options.stream else None
+
+    episodes_by_level = collections.defaultdict(list)
+    for (done, episode) in enumerate(run_tasks(tasks, options.workers), 1):
+        episodes_by_level[(episode['campaign'], episode['level_index'])].append(episode)
+
+        if stream_file:
+            stream_file.write(json.dumps(episode) + '\n')
+            stream_file.flush()
+
+        print('\r%d/%d rounds' % (done, len(tasks)), end='', file=sys.stderr)
+    print(file=sys.stderr)
+
+    if stream_file:
+        stream_file.close()
+
+    report = {'revision': get_revision(),
+              'created': datetime.datetime.now().isoformat(timespec='seconds'),
+              'bot': options.bot,
+              'episodes': options.episodes,
+              'max_seconds': options.max_seconds,
+              'seed': options.seed,
+              'levels': []}
+
+    for (campaign_filename, level_index) in sorted(
+            episodes_by_level, key=lambda key: (campaign_filenames.index(key[0]), key[1])):
+        episodes = sorted(episodes_by_level[(campaign_filename, level_index)],
+                          key=lambda episode: episode['seed'])
+
+        report['levels'].append(summarize_level(
+            campaign_filename, level_index, episodes[0]['level_name'],
+            options.bot, episodes))
+
+    if options.output:
+        with open(options.output, 'w', newline='') as output_file:
+            write_report(report, options.format, output_file)
+    else:
+        write_report(report, options.format, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
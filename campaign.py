@@ -0,0 +1,319 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compiles campaign .ini files into read-only Campaign and Level records.
+
+Every value is converted and checked once, when the campaign is loaded, so
+a typo in a campaign is reported straight away instead of when its level
+comes up. Compiled campaigns can be cached on disk, keyed by the .ini
+file's modification time and size, and a CampaignCatalog keeps every
+campaign compiled in memory, recompiling only the files which change.
+"""
+import os
+import collections
+import configparser
+import logging
+import pickle
+
+from iowriter import replace_file
+
+CAMPAIGN_FOLDER = 'campaigns' + os.sep
+
+# Bumped whenever Campaign or Level change, so old caches are ignored
+CACHE_VERSION = 2
+CACHE_EXTENSION = '.pickle'
+
+# world_width and world_height are 0 when the world is the size of the screen
+Campaign = collections.namedtuple('Campaign', [
+    'filename', 'name', 'short_name', 'difficulty', 'number_of_lives',
+    'world_width', 'world_height', 'levels', 'text'])
+
+# max_cubes holds the maximum of each cube type, ordered by type_id
+Level = collections.namedtuple('Level', [
+    'name', 'score_zone_length', 'score_zone_height', 'score_zone_buffer',
+    'score_zones_max', 'score_zone_lifetime', 'good_cube_speed',
+    'start_speed', 'speed_levels_per_round', 'seconds_per_level',
+    'spawn_rate', 'keep_on_screen', 'max_cubes'])
+
+
+class CampaignError(ValueError):
+    """A campaign file is missing a value or has one which makes no sense."""
+    pass
+
+
+def to_count(text):
+    value = to_int(text)
+    if value < 0:
+        raise ValueError("can't be negative")
+    return value
+
+def to_size(text):
+    value = to_int(text)
+    if value < 1:
+        raise ValueError("must be at least 1")
+    return value
+
+def to_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError("isn't a whole number") from None
+
+def to_seconds(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError("isn't a number") from None
+
+    if not value > 0:
+        raise ValueError("must be more than 0 seconds")
+    return value
+
+def to_flag(text):
+    if text not in ('0', '1'):
+        raise ValueError("must be 1 or 0")
+    return text == '1'
+
+
+# (.ini key, converter) of each Level field after its name
+LEVEL_KEYS = [('ScoreZoneLength', to_size),
+              ('ScoreZoneHeight', to_size),
+              ('ScoreZoneBuffer', to_count),
+              ('NumberOfScoreZonesAtSameTime', to_count),
+              ('ScoreZoneLifetime', to_seconds),
+              ('GoodCubeSpeed', to_count),
+              ('StartSpeed', to_count),
+              ('SpeedLevelsPerRound', to_size),
+              ('SecondsPerLevel', to_seconds),
+              ('SpawnRate', to_seconds),
+              ('KeepOnScreen', to_flag)]
+
+# .ini keys of Level.max_cubes, ordered by type_id
+MAX_CUBES_KEYS = ['MaxHoriLCubes', 'MaxHoriRCubes', 'MaxVertiTCubes',
+                  'MaxVertiBCubes', 'MaxDiaCubes', 'MaxRockCubes']
+
+
+def compile_campaign(text, filename):
+    """Builds a Campaign from the text of its .ini file.
+
+    Raises CampaignError if a value is missing or invalid.
+    """
+    parser = configparser.ConfigParser(inline_comment_prefixes=('#', ';'))
+    try:
+        parser.read_string(text, filename)
+    except configparser.Error as error:
+        raise CampaignError(str(error)) from None
+
+    defaults = parser['DEFAULT']
+    levels = tuple(compile_level(filename, parser[section])
+                   for section in parser.sections())
+    if not levels:
+        raise CampaignError("%s has no levels" % filename)
+
+    number_of_lives = read_value(filename, defaults, 'NumberOfLives', to_size)
+    world_width = read_value(filename, defaults, 'WorldWidth', to_count, 0)
+    world_height = read_value(filename, defaults, 'WorldHeight', to_count, 0)
+
+    return Campaign(filename,
+                    read_value(filename, defaults, 'CampaignName', str),
+                    read_value(filename, defaults, 'CampaignShortName', str),
+                    read_value(filename, defaults, 'Difficulty', str),
+                    number_of_lives, world_width, world_height, levels, text)
+
+def compile_level(filename, section):
+    """Builds the Level of one section, DEFAULT values included."""
+    values = [read_value(filename, section, key, convert)
+              for (key, convert) in LEVEL_KEYS]
+    max_cubes = tuple(read_value(filename, section, key, to_count)
+                      for key in MAX_CUBES_KEYS)
+
+    return Level(section.name, *values, max_cubes=max_cubes)
+
+def read_value(filename, section, key, convert, default=None):
+    """Returns section[key] converted, or default if it's missing and there
+    is one."""
+    if key not in section:
+        if default is not None:
+            return default
+        raise CampaignError("%s [%s]: %s is missing"
+                            % (filename, section.name, key))
+
+    try:
+        return convert(section[key])
+    except ValueError as error:
+        raise CampaignError("%s [%s]: %s = %s %s"
+                            % (filename, section.name, key, section[key],
+                               error)) from None
+
+
+def load_campaign(filename, cache_folder=None):
+    """Loads and compiles campaigns/filename.
+
+    If cache_folder is given, the compiled campaign is read from there when
+    the .ini file hasn't changed since it was cached, and saved there
+    otherwise.
+    """
+    path = CAMPAIGN_FOLDER + filename
+    stat = os.stat(path)
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    if cache_folder:
+        cache_path = os.path.join(cache_folder, filename + CACHE_EXTENSION)
+        campaign = read_cache(cache_path, key)
+        if campaign is not None:
+            return campaign
+
+    with open(path) as campaign_file:
+        campaign = compile_campaign(campaign_file.read(), filename)
+
+    if cache_folder:
+        write_cache(cache_path, key, campaign)
+
+    return campaign
+
+def read_cache(cache_path, key):
+    """Returns the campaign cached at cache_path, if it was cached under key."""
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            (cached_key, campaign) = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        logging.debug("Ignoring campaign cache %s: %s", cache_path, error)
+        return None
+
+    if cached_key != key:
+        return None
+    return campaign
+
+def write_cache(cache_path, key, campaign):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    replace_file(cache_path, pickle.dumps((key, campaign),
+                                          pickle.HIGHEST_PROTOCOL))
+
+def list_campaigns():
+    """Returns the filename of every campaign, sorted."""
+    return sorted(filename for filename in os.listdir(CAMPAIGN_FOLDER)
+                  if filename.endswith('.ini'))
+
+
+class CampaignCatalog(object):
+    """Every campaign in the campaigns folder, compiled once.
+
+    Files are only compiled again once their modification time or size
+    changes, through load_campaign and so through the disk cache in
+    cache_folder if given. A campaign edited while the game runs is picked
+    up the next time it is asked for.
+    """
+    def __init__(self, cache_folder=None):
+        self._cache_folder = cache_folder
+        # By filename, for every file which compiled
+        self._keys = {}
+        self._campaigns = {}
+        # By filename, for every file which didn't. A file which couldn't
+        # be read has no key and is tried again every time.
+        self._error_keys = {}
+        self._errors = {}
+        self._version = 0
+
+    @property
+    def version(self):
+        """Goes up whenever a campaign is added, changed or removed."""
+        return self._version
+
+    def refresh(self):
+        """Catches up with the campaigns folder.
+
+        Campaigns which don't compile are logged and left out of get_all.
+        """
+        filenames = list_campaigns()
+        is_changed = False
+        known_filenames = set(self._keys).union(self._errors)
+        for filename in known_filenames.difference(filenames):
+            self._keys.pop(filename, None)
+            self._campaigns.pop(filename, None)
+            self._error_keys.pop(filename, None)
+            self._errors.pop(filename, None)
+            is_changed = True
+
+        for filename in filenames:
+            if self._update(filename):
+                is_changed = True
+                if filename in self._errors:
+                    logging.error("Leaving out of the menu: %s",
+                                  self._errors[filename])
+
+        if is_changed:
+            self._version += 1
+
+    def get(self, filename):
+        """Returns the campaign in filename, compiled again if it changed.
+
+        Raises CampaignError if it doesn't compile, or OSError if it can't
+        be read.
+        """
+        if self._update(filename):
+            self._version += 1
+
+        if filename in self._errors:
+            raise self._errors[filename]
+        return self._campaigns[filename]
+
+    def get_all(self):
+        """Returns every campaign which compiled, sorted by filename."""
+        return [self._campaigns[filename] for filename in sorted(self._campaigns)]
+
+    def _update(self, filename):
+        # Whether the file had changed and was compiled again
+        try:
+            stat = os.stat(CAMPAIGN_FOLDER + filename)
+        except OSError as error:
+            # Removed since the folder was listed, or unreadable
+            return self._set_error(filename, None, error)
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key in (self._keys.get(filename), self._error_keys.get(filename)):
+            return False
+
+        try:
+            campaign = load_campaign(filename, self._cache_folder)
+        except OSError as error:
+            return self._set_error(filename, None, error)
+        except CampaignError as error:
+            return self._set_error(filename, key, error)
+        except ValueError as error:
+            # Such as a file which isn't text
+            return self._set_error(filename, key, CampaignError(
+                "%s can't be read: %s" % (filename, error)))
+
+        self._keys[filename] = key
+        self._campaigns[filename] = campaign
+        self._error_keys.pop(filename, None)
+        self._errors.pop(filename, None)
+        return True
+
+    def _set_error(self, filename, key, error):
+        # Whether the file compiled before, or failed some other way
+        is_changed = (filename in self._campaigns or
+                      filename not in self._errors or
+                      key != self._error_keys.get(filename))
+
+        self._keys.pop(filename, None)
+        self._campaigns.pop(filename, None)
+        if key is None:
+            self._error_keys.pop(filename, None)
+        else:
+            self._error_keys[filename] = key
+        self._errors[filename] = error
+        return is_changed
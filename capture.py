@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Records the frames shown on screen as PNG files or one raw video file.
+
+Each frame is blitted, once it is on screen, into one of a ring of frame
+buffers kept in shared memory, and written out from there by an encoder
+process of its own. The game neither allocates nor encodes anything per
+frame. When every buffer is still waiting on the encoder the frame is
+dropped and counted instead, so recording never holds the game up.
+
+Frames are numbered in the order they were shown, dropped ones included,
+so a gap in the numbers is a dropped frame. frames.csv lists the number of
+every frame written along with when it was shown, in ms since the capture
+started. A raw capture is every frame's RGBX pixels one after the other,
+which ffmpeg turns into a video:
+
+    ffmpeg -f rawvideo -pixel_format rgb0 -video_size 800x600 \
+        -framerate 60 -i captures/20121224-181500/frames.raw capture.mp4
+"""
+import pygame
+import os
+import csv
+import datetime
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+PNG_FORMAT = 'png'
+RAW_FORMAT = 'raw'
+FORMATS = [PNG_FORMAT, RAW_FORMAT]
+
+# Layout of the frame buffers, as pygame.image.frombuffer names it
+PIXEL_FORMAT = 'RGBX'
+BYTES_PER_PIXEL = 4
+
+PNG_FILENAME = 'frame_%06d.png'
+RAW_FILENAME = 'frames.raw'
+# Number and time shown of each frame written, in the order written
+TIMES_FILENAME = 'frames.csv'
+
+DEFAULT_RING_SIZE = 8
+
+# Least time between two warnings about dropped frames, in seconds
+DROP_REPORT_INTERVAL = 1.0
+
+# How much less CPU the encoder gets than the game, where there's os.nice
+ENCODER_NICENESS = 10
+
+
+class FrameCapture(object):
+    """Hands every frame shown to an encoder process through a ring of
+    ring_size buffers.
+
+    Frames of size are written to a new folder under folder, named after
+    the current time. close writes out the frames still waiting.
+    """
+    def __init__(self, size, folder, capture_format=PNG_FORMAT,
+                 ring_size=DEFAULT_RING_SIZE):
+        if capture_format not in FORMATS:
+            raise ValueError("Can't capture to %r, only to %s"
+                             % (capture_format, ', '.join(FORMATS)))
+
+        self._folder = os.path.join(
+            folder, datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self._folder, exist_ok=True)
+
+        frame_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+        self._memory = shared_memory.SharedMemory(create=True,
+                                                  size=frame_bytes * ring_size)
+        self._surfaces = get_buffer_surfaces(self._memory, size, ring_size)
+        self._free_slots = list(range(ring_size))
+        self._frame_count = 0
+        self._dropped = 0
+        self._last_drop_report = None
+        self._start_time = time.perf_counter()
+
+        # Its own interpreter, so encoding doesn't hold the game's GIL
+        context = multiprocessing.get_context('spawn')
+        # (slot, frame_index, shown_ms) to write out, None once the capture
+        # is over
+        self._frames = context.Queue()
+        # Slots written out, free for another frame
+        self._done_slots = context.Queue()
+        self._encoder = context.Process(
+            target=run_encoder, name='FrameEncoder', daemon=True,
+            args=(self._memory.name, size, ring_size, self._folder,
+                  capture_format, self._frames, self._done_slots))
+        self._encoder.start()
+
+    @property
+    def folder(self):
+        return self._folder
+
+    @property
+    def frame_count(self):
+        """How many frames have been captured, not counting those dropped."""
+        return self._frame_count
+
+    @property
+    def dropped(self):
+        """How many frames were dropped because the encoder was behind."""
+        return self._dropped
+
+    def capture(self, surface):
+        """Copies surface, the frame just shown, to be written out.
+
+        Returns False if it was dropped instead.
+        """
+        try:
+            while True:
+                self._free_slots.append(self._done_slots.get_nowait())
+        except queue.Empty:
+            pass
+
+        if not self._free_slots:
+            self._drop()
+            return False
+
+        slot = self._free_slots.pop()
+        self._surfaces[slot].blit(surface, (0, 0))
+        # Numbered by frames shown, so drops leave gaps
+        self._frames.put((slot, self._frame_count + self._dropped,
+                          (time.perf_counter() - self._start_time) * 1000))
+        self._frame_count += 1
+        return True
+
+    def close(self):
+        """Waits for the frames captured to be written out."""
+        if self._encoder is None:
+            return
+
+        self._frames.put(None)
+        self._encoder.join()
+        self._encoder = None
+        self._frames.close()
+        self._done_slots.close()
+
+        # The surfaces must go before the memory they point at
+        self._surfaces = []
+        self._memory.close()
+        self._memory.unlink()
+        logging.debug("Captured %d frames to %s, dropped %d",
+                      self._frame_count, self._folder, self._dropped)
+
+    def _drop(self):
+        self._dropped += 1
+
+        now = time.perf_counter()
+        if (self._last_drop_report is None or
+                now - self._last_drop_report >= DROP_REPORT_INTERVAL):
+            logging.warning("Capture has dropped %d frames so far, the "
+                            "encoder can't keep up", self._dropped)
+            self._last_drop_report = now
+
+
+def get_buffer_surfaces(memory, size, ring_size):
+    """Returns a surface for each frame buffer in memory, drawing onto one
+    draws into its buffer."""
+    frame_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+    return [pygame.image.frombuffer(
+                memory.buf[slot * frame_bytes:(slot + 1) * frame_bytes],
+                size, PIXEL_FORMAT)
+            for slot in range(ring_size)]
+
+def run_encoder(memory_name, size, ring_size, folder, capture_format,
+                frames, done_slots):
+    """Writes out the frames queued by a FrameCapture, in a process of its
+    own."""
+    if hasattr(os, 'nice'):
+        os.nice(ENCODER_NICENESS)
+
+    # Spawned processes share the game's resource tracker, which already
+    # knows to remove the buffers
+    memory = shared_memory.SharedMemory(memory_name)
+    surfaces = get_buffer_surfaces(memory, size, ring_size)
+    frame_bytes = size[0] * size[1] * BYTES_PER_PIXEL
+    raw_file = None
+    if capture_format == RAW_FORMAT:
+        raw_file = open(os.path.join(folder, RAW_FILENAME), 'wb')
+    times_file = open(os.path.join(folder, TIMES_FILENAME), 'w', newline='')
+    times_writer = csv.writer(times_file)
+    times_writer.writerow(['frame', 'shown_ms'])
+
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+
+            (slot, frame_index, shown_ms) = item
+            times_writer.writerow([frame_index, '%.3f' % shown_ms])
+            if raw_file is not None:
+                raw_file.write(memory.buf[slot * frame_bytes:
+                                          (slot + 1) * frame_bytes])
+            else:
+                pygame.image.save(surfaces[slot], os.path.join(
+                    folder, PNG_FILENAME % frame_index))
+            done_slots.put(slot)
+    finally:
+        if raw_file is not None:
+            raw_file.close()
+        times_file.close()
+        surfaces = []
+        memory.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Converts the game's WAV audio to Ogg Vorbis with oggenc or ffmpeg.
+
+By default only the theme is converted, since it is streamed while the
+short sound effects are decoded into memory once either way.
+
+    python convert_audio.py --update-settings
+    python convert_audio.py music/death.wav music/regenerate.wav -q 3
+"""
+import os
+import sys
+import argparse
+import re
+import shutil
+import subprocess
+
+from gamesettings import SETTINGS_FILENAME, get_settings
+
+DEFAULT_QUALITY = 5
+
+
+def get_encode_command(encoder, quality, wav_filename, ogg_filename):
+    if os.path.basename(encoder).startswith('oggenc'):
+        return [encoder, '--quiet', '-q', str(quality), '-o', ogg_filename,
+                wav_filename]
+
+    return [encoder, '-y', '-loglevel', 'error', '-i', wav_filename,
+            '-c:a', 'libvorbis', '-q:a', str(quality), ogg_filename]
+
+
+def find_encoder():
+    """Returns the path of oggenc or ffmpeg, whichever is installed first."""
+    for name in ['oggenc', 'ffmpeg']:
+        path = shutil.which(name)
+        if path:
+            return path
+
+    return None
+
+
+def convert(encoder, wav_filename, quality=DEFAULT_QUALITY):
+    """Encodes wav_filename next to itself, unless it is already up to date.
+
+    Returns the name of the .ogg file.
+    """
+    ogg_filename = os.path.splitext(wav_filename)[0] + '.ogg'
+    if (os.path.exists(ogg_filename) and
+            os.path.getmtime(ogg_filename) >= os.path.getmtime(wav_filename)):
+        return ogg_filename
+
+    subprocess.run(get_encode_command(encoder, quality, wav_filename,
+                                      ogg_filename), check=True)
+    return ogg_filename
+
+
+def update_settings(key, filename):
+    """Points settings [sound] key at filename, keeping the file's comments."""
+    with open(SETTINGS_FILENAME) as settings_file:
+        text = settings_file.read()
+
+    text = re.sub(r'^(%s\s*=\s*).*$' % key, r'\g<1>' + filename, text,
+                  count=1, flags=re.MULTILINE)
+
+    with open(SETTINGS_FILENAME, 'w') as settings_file:
+        settings_file.write(text)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('filenames', nargs='*', metavar='wav',
+                        help='files to convert (default: the theme)')
+    parser.add_argument('-q', '--quality', type=int, default=DEFAULT_QUALITY,
+                        help='Vorbis quality, from -1 to 10 (default: %(default)s)')
+    parser.add_argument('--update-settings', action='store_true',
+                        help='point the theme in settings.ini at the .ogg')
+    options = parser.parse_args(arguments)
+
+    encoder = find_encoder()
+    if encoder is None:
+        sys.exit("Neither oggenc nor ffmpeg was found on the PATH")
+
+    settings = get_settings()
+    sound_folder = settings['sound']['FolderName'] + os.sep
+    theme_filename = sound_folder + settings['sound']['Theme']
+
+    for wav_filename in options.filenames or [theme_filename]:
+        ogg_filename = convert(encoder, wav_filename, options.quality)
+        print("%s (%d KB) -> %s (%d KB)"
+              % (wav_filename, os.path.getsize(wav_filename) // 1024,
+                 ogg_filename, os.path.getsize(ogg_filename) // 1024))
+
+        if options.update_settings and wav_filename == theme_filename:
+            update_settings('Theme', os.path.basename(ogg_filename))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+import numpy
+import pygame
+
+# Columns of CubeWorld.boxes
+X = 0
+Y = 1
+W = 2
+H = 3
+
+
+class CubeWorld(object):
+    """Stores every bad cube in contiguous NumPy arrays.
+
+    Positions and sizes live in boxes (one x, y, w, h row per cube),
+    speeds in velocities and cube types in type_ids. Moving, wrapping and
+    culling are done on whole arrays at once. Cubes added to the world
+    become views onto their row, so code that still works with Cube
+    objects keeps working.
+
+    Cubes culled or cleared from the world are handed to pool, if given,
+    to be respawned later instead of building new ones.
+    """
+    def __init__(self, arena, capacity=64, pool=None):
+        """arena is the thecubes.Arena the cubes move around in."""
+        self._pool = pool
+        self._arena = arena
+        (self._width, self._height, self._spawn_buffer) = arena
+
+        self._size = 0
+        self._boxes = numpy.zeros((capacity, 4))
+        self._velocities = numpy.zeros((capacity, 2))
+        self._type_ids = numpy.zeros(capacity, dtype=numpy.intp)
+        self._cubes = []
+        self._surfaces = []
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._cubes)
+
+    def __getitem__(self, index):
+        return self._cubes[index]
+
+    @property
+    def arena(self):
+        return self._arena
+
+    @property
+    def boxes(self):
+        """x, y, width and height of every live cube (a view, not a copy)."""
+        return self._boxes[:self._size]
+
+    @property
+    def velocities(self):
+        return self._velocities[:self._size]
+
+    @property
+    def type_ids(self):
+        return self._type_ids[:self._size]
+
+    def append(self, cube):
+        """Adds cube to the world and turns it into a view onto its row."""
+        if self._size == len(self._boxes):
+            self._grow()
+
+        slot = self._size
+        rect = cube.rect
+        self._boxes[slot] = (rect.x, rect.y, rect.width, rect.height)
+        self._velocities[slot] = (cube.speed_x, cube.speed_y)
+        self._type_ids[slot] = cube.type_id
+        self._size += 1
+
+        self._cubes.append(cube)
+        self._surfaces.append(cube.surface)
+        cube.attach(self, slot)
+
+    def clear(self):
+        for cube in self._cubes:
+            self._remove(cube)
+        self._cubes = []
+        self._surfaces = []
+        self._size = 0
+
+    def get_rect(self, slot):
+        (x, y, w, h) = self._boxes[slot]
+        return pygame.Rect(int(x), int(y), int(w), int(h))
+
+    def set_rect(self, slot, rect):
+        self._boxes[slot] = (rect.x, rect.y, rect.width, rect.height)
+
+    def get_speed(self, slot):
+        return self._velocities[slot]
+
+    def get_blit_sequence(self, alpha=1.0, viewport=None):
+        """Returns (surface, position) pairs of every cube for Surface.blits.
+
+        Cubes are placed alpha of the way through their last move, 1.0
+        being where they are now, like Cube.get_draw_position. Positions are
+        truncated the same way as get_rect.
+
+        If viewport (a rect of the arena) is given, only the cubes touching
+        it are returned, positioned relative to its top left corner.
+        """
+        positions = self._boxes[:self._size, X:W]
+        if alpha != 1.0:
+            positions = positions - self.velocities * (1.0 - alpha)
+
+        surfaces = self._surfaces
+        if viewport is not None:
+            sizes = self._boxes[:self._size, W:]
+            is_visible = ((positions[:, X] < viewport.right) &
+                          (positions[:, X] + sizes[:, X] > viewport.left) &
+                          (positions[:, Y] < viewport.bottom) &
+                          (positions[:, Y] + sizes[:, Y] > viewport.top))
+            visible = numpy.flatnonzero(is_visible)
+            surfaces = [surfaces[index] for index in visible.tolist()]
+            positions = positions[visible] - viewport.topleft
+
+        return zip(surfaces, positions.astype(numpy.intp).tolist())
+
+    def move(self):
+        """Moves every cube by its speed."""
+        boxes = self.boxes
+        boxes[:, X:W] += self.velocities
+
+    def get_off_screen_mask(self):
+        """Returns a boolean array telling which cubes are off screen."""
+        boxes = self.boxes
+        buffer = self._spawn_buffer
+        left = boxes[:, X]
+        top = boxes[:, Y]
+
+        return ((left < -buffer) |
+                (left + boxes[:, W] > self._width + buffer) |
+                (top < -buffer) |
+                (top + boxes[:, H] > self._height + buffer))
+
+    def keep_on_screen(self):
+        """Wraps cubes which went off screen back to the other side.
+
+        Like Cube.keep_on_screen, only one edge is handled per call, in
+        left, right, top, bottom order.
+        """
+        boxes = self.boxes
+        buffer = self._spawn_buffer
+        left = boxes[:, X]
+        top = boxes[:, Y]
+
+        off_left = left < -buffer
+        off_right = ~off_left & (left + boxes[:, W] > self._width + buffer)
+        off_x = off_left | off_right
+        off_top = ~off_x & (top < -buffer)
+        off_bottom = (~off_x & ~off_top &
+                      (top + boxes[:, H] > self._height + buffer))
+
+        left[off_left] += self._width + buffer
+        left[off_right] -= self._width + buffer
+        top[off_top] += self._height + buffer
+        top[off_bottom] -= self._height + buffer
+
+    def cull(self, mask):
+        """Removes the cubes selected by mask, keeping the others in order.
+
+        Returns the type ids of the removed cubes.
+        """
+        removed = numpy.flatnonzero(mask)
+        if not len(removed):
+            return removed
+
+        size = self._size
+        keep = ~mask
+        removed_type_ids = self._type_ids[removed].copy()
+
+        for index in removed.tolist():
+            self._remove(self._cubes[index])
+
+        new_size = size - len(removed)
+        self._boxes[:new_size] = self._boxes[:size][keep]
+        self._velocities[:new_size] = self._velocities[:size][keep]
+        self._type_ids[:new_size] = self._type_ids[:size][keep]
+        self._size = new_size
+
+        first = removed[0]
+        is_kept = keep[first:].tolist()
+        self._cubes[first:] = [
+            cube for (cube, is_cube_kept) in zip(self._cubes[first:], is_kept)
+            if is_cube_kept]
+        self._surfaces[first:] = [
+            surface for (surface, is_surface_kept)
+            in zip(self._surfaces[first:], is_kept) if is_surface_kept]
+        for slot in range(first, new_size):
+            self._cubes[slot].attach(self, slot)
+
+        return removed_type_ids
+
+    def _remove(self, cube):
+        cube.detach()
+        if self._pool is not None:
+            self._pool.release(cube)
+
+    def _grow(self):
+        capacity = len(self._boxes) * 2
+        self._boxes = _resized(self._boxes, capacity)
+        self._velocities = _resized(self._velocities, capacity)
+        self._type_ids = _resized(self._type_ids, capacity)
+
+
+class CubePool(object):
+    """Free lists of bad cubes, by type, waiting to be respawned.
+
+    Reusing cubes keeps the spawn and cull paths from building and
+    throwing away a Cube (and its Rect) for every bad cube that crosses
+    the screen.
+    """
+    def __init__(self):
+        self._free_cubes = collections.defaultdict(list)
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return sum(len(free_cubes) for free_cubes in self._free_cubes.values())
+
+    def acquire(self, cube_class, speed, arena, rng):
+        """Returns a cube_class freshly spawned in arena, reusing a free one
+        if any."""
+        free_cubes = self._free_cubes[cube_class.type_id]
+        if free_cubes:
+            self._hits += 1
+            cube = free_cubes.pop()
+            cube.respawn(speed, arena, rng)
+            return cube
+
+        self._misses += 1
+        return cube_class(speed, arena, rng)
+
+    def release(self, cube):
+        """Takes back a detached cube which is no longer in use."""
+        self._free_cubes[cube.type_id].append(cube)
+
+
+def _resized(array, capacity):
+    new_array = numpy.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    new_array[:len(array)] = array
+    return new_array
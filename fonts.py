@@ -0,0 +1,71 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+import json
+import logging
+import os
+
+from iowriter import replace_file
+
+
+def load_font(name, size, font_filename='', cache_filename=''):
+    """Returns a font like pygame.font.SysFont(name, size), but quicker.
+
+    font_filename, if given, is loaded as is. Otherwise the system's fonts
+    are searched for name, which lists every font installed and can take
+    longer than the rest of startup, so the file found is kept in
+    cache_filename for the next start. pygame's default font stands in
+    for a name that isn't installed.
+    """
+    if not font_filename:
+        font_filename = find_system_font(name, cache_filename)
+
+    return pygame.font.Font(font_filename or None, size)
+
+def find_system_font(name, cache_filename=''):
+    """Returns the file of the system font name, or '' if there's none.
+
+    Fonts not found are cached too, delete cache_filename to search for
+    them again.
+    """
+    cached_fonts = read_cache(cache_filename) if cache_filename else {}
+    font_filename = cached_fonts.get(name)
+    if font_filename is not None and (not font_filename or
+                                      os.path.exists(font_filename)):
+        return font_filename
+
+    font_filename = pygame.font.match_font(name) or ''
+    logging.debug("Found font %s at '%s'", name, font_filename)
+    if cache_filename:
+        cached_fonts[name] = font_filename
+        try:
+            write_cache(cache_filename, cached_fonts)
+        except OSError as error:
+            logging.debug("Could not cache fonts in %s: %s", cache_filename, error)
+
+    return font_filename
+
+def read_cache(cache_filename):
+    """Returns the font files kept in cache_filename, by name."""
+    try:
+        with open(cache_filename) as cache_file:
+            cached_fonts = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+    return cached_fonts if isinstance(cached_fonts, dict) else {}
+
+def write_cache(cache_filename, cached_fonts):
+    replace_file(cache_filename, json.dumps(cached_fonts, indent=1,
+                                            sort_keys=True).encode())
@@ -0,0 +1,34 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import configparser
+import os
+
+SETTINGS_FILENAME = 'config' + os.sep + 'settings.ini'
+
+# Parsed by the first get_settings call
+_settings = None
+
+
+def get_settings():
+    """Returns settings.ini, parsed on the first call and shared after that.
+
+    Returned settings are shared by everyone and must be treated as
+    read-only.
+    """
+    global _settings
+    if _settings is None:
+        _settings = configparser.ConfigParser()
+        _settings.read(SETTINGS_FILENAME)
+
+    return _settings
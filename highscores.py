@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Keeps every campaign's high scores in a SQLite database.
+
+Scores are indexed by campaign and score, so saving one and listing the
+best few stay quick however many have been saved. The old per-campaign
+highscores/<short name>_highscores.txt files are imported once.
+
+    python highscores.py TQFC -n 10
+"""
+import os
+import argparse
+import csv
+import datetime
+import logging
+import re
+import sqlite3
+
+from simulation import CURRENT_SCORE, CURRENT_LEVEL_INDEX, LEVEL_NAME
+
+HIGHSCORE_FOLDER = 'highscores' + os.sep
+DATABASE_FILENAME = HIGHSCORE_FOLDER + 'highscores.sqlite3'
+
+# Files written by the old save_score, one per campaign short name
+LEGACY_FILENAME_SUFFIX = '_highscores.txt'
+LEGACY_LEVEL_PATTERN = re.compile(r'Level #(\d+) - (.*)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    short_name TEXT PRIMARY KEY,
+    name TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    campaign TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level_index INTEGER NOT NULL,
+    level_name TEXT NOT NULL,
+    saved_at TEXT NOT NULL);
+
+CREATE INDEX IF NOT EXISTS scores_by_campaign
+    ON scores (campaign, score DESC);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY);
+"""
+
+
+class HighScoreStore(object):
+    """A connection to the high score database.
+
+    Like any sqlite3 connection, it must only be used from the thread which
+    made it.
+    """
+    def __init__(self, filename=DATABASE_FILENAME):
+        folder = os.path.dirname(filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+
+    def add(self, short_name, name, score, level_index, level_name,
+            saved_at=None):
+        """Saves a score of the campaign called name, short_name for short."""
+        if saved_at is None:
+            saved_at = datetime.datetime.now().isoformat(timespec='seconds')
+
+        with self._connection:
+            self._add(short_name, name, score, level_index, level_name,
+                      saved_at)
+
+    def get_top(self, short_name, count=10):
+        """Returns the count best (score, level_index, level_name, saved_at)."""
+        return self._connection.execute(
+            'SELECT score, level_index, level_name, saved_at FROM scores '
+            'WHERE campaign = ? ORDER BY score DESC LIMIT ?',
+            (short_name, count)).fetchall()
+
+    def get_campaigns(self):
+        """Returns the (short_name, name) of every campaign with scores."""
+        return self._connection.execute(
+            'SELECT short_name, name FROM campaigns ORDER BY name').fetchall()
+
+    def import_legacy_files(self, folder=HIGHSCORE_FOLDER):
+        """Imports the old .txt high score files not imported yet.
+
+        The files themselves are left alone. Returns how many scores were
+        imported.
+        """
+        if not os.path.isdir(folder):
+            return 0
+
+        imported = 0
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith(LEGACY_FILENAME_SUFFIX):
+                continue
+            if self._connection.execute(
+                    'SELECT 1 FROM imported_files WHERE filename = ?',
+                    (filename,)).fetchone():
+                continue
+
+            short_name = filename[:-len(LEGACY_FILENAME_SUFFIX)]
+            with self._connection:
+                imported += self._import_legacy_file(
+                    os.path.join(folder, filename), short_name)
+                self._connection.execute(
+                    'INSERT INTO imported_files VALUES (?)', (filename,))
+
+        return imported
+
+    def close(self):
+        self._connection.close()
+
+    def _add(self, short_name, name, score, level_index, level_name,
+             saved_at):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO campaigns VALUES (?, ?)',
+            (short_name, name))
+        self._connection.execute(
+            'INSERT INTO scores (campaign, score, level_index, level_name, '
+            'saved_at) VALUES (?, ?, ?, ?, ?)',
+            (short_name, score, level_index, level_name, saved_at))
+
+    def _import_legacy_file(self, path, short_name):
+        saved_at = datetime.datetime.fromtimestamp(
+            os.path.getmtime(path)).isoformat(timespec='seconds')
+
+        with open(path, newline='') as csvfile:
+            rows = list(csv.reader(csvfile, delimiter=' ', quotechar='|'))
+
+        # The first row is the campaign's name
+        name = short_name
+        if rows and len(rows[0]) == 1:
+            name = rows[0][0]
+
+        imported = 0
+        for row in rows:
+            if len(row) != 2:
+                continue
+
+            match = LEGACY_LEVEL_PATTERN.match(row[1])
+            if not match or not row[0].lstrip('-').isdigit():
+                logging.warning("Skipping high score %r in %s", row, path)
+                continue
+
+            self._add(short_name, name, int(row[0]), int(match.group(1)) - 1,
+                      match.group(2), saved_at)
+            imported += 1
+
+        return imported
+
+
+class HighScoreWriter(object):
+    """Saves scores on a BackgroundWriter so the game never waits on disk.
+
+    The database is opened, and the old .txt files imported, on the
+    writer's thread, which is the only one to use it. Scores are never
+    dropped: save waits if the writer has fallen far behind.
+    """
+    def __init__(self, writer, filename=DATABASE_FILENAME):
+        self._writer = writer
+        self._filename = filename
+        self._store = None
+        writer.submit(self._open)
+
+    def save(self, campaign, score_snapshot):
+        """Queues a score snapshot (see get_score_snapshot) of campaign."""
+        self._writer.submit(self._add, campaign.short_name, campaign.name,
+                            score_snapshot[CURRENT_SCORE],
+                            score_snapshot[CURRENT_LEVEL_INDEX],
+                            score_snapshot[LEVEL_NAME],
+                            datetime.datetime.now().isoformat(timespec='seconds'))
+
+    def close(self):
+        """Queues closing the database, after the scores saved so far."""
+        self._writer.submit(self._close)
+
+    def _open(self):
+        self._store = HighScoreStore(self._filename)
+        imported = self._store.import_legacy_files(os.path.dirname(self._filename))
+        if imported:
+            logging.debug("Imported %d old high scores", imported)
+
+    def _add(self, *score):
+        # Left as None if the database could not be opened
+        if self._store is None:
+            logging.error("Could not save high score %r, the database "
+                          "isn't open", score)
+            return
+
+        try:
+            self._store.add(*score)
+        except sqlite3.Error:
+            logging.exception("Could not save high score %r", score)
+
+    def _close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('campaign', nargs='?',
+                        help='short name of the campaign (default: all)')
+    parser.add_argument('-n', '--count', type=int, default=10,
+                        help='how many scores to list (default: %(default)s)')
+    options = parser.parse_args(arguments)
+
+    store = HighScoreStore()
+    store.import_legacy_files()
+
+    for (short_name, name) in store.get_campaigns():
+        if options.campaign in (None, short_name):
+            print("%s (%s)" % (name, short_name))
+            for (score, level_index, level_name, saved_at) in store.get_top(
+                    short_name, options.count):
+                print("  %8d  Level #%d - %s  %s"
+                      % (score, level_index + 1, level_name, saved_at))
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
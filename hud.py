@@ -0,0 +1,106 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+
+from simulation import CURRENT_SCORE, CURRENT_LEVEL_INDEX, LEVEL_NAME
+from simulation import CURRENT_LIVES
+
+# Rendered strings kept by a TextCache before the least recently used go
+DEFAULT_MAX_SIZE = 128
+
+
+class TextCache(object):
+    """Renders each string once with a font and keeps the last few around.
+
+    Surfaces are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, font, color, max_size=DEFAULT_MAX_SIZE):
+        self._font = font
+        self._color = color
+        self._max_size = max_size
+        self._surfaces = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, text):
+        """Returns the surface for text, rendering it if needed."""
+        surface = self._surfaces.get(text)
+        if surface is None:
+            self._misses += 1
+            surface = self._font.render(text, True, self._color)
+            self._surfaces[text] = surface
+            if len(self._surfaces) > self._max_size:
+                self._surfaces.popitem(last=False)
+        else:
+            self._hits += 1
+            self._surfaces.move_to_end(text)
+
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class HudDisplay(object):
+    """The score, level name and lives shown around the edges of the screen.
+
+    The text is only looked up again when one of the values it shows has
+    changed since the last frame.
+    """
+    def __init__(self, font, color, width, height):
+        self._text_cache = TextCache(font, color)
+        self._width = width
+        self._height = height
+        self._shown_values = None
+        self._blits = []
+
+    @property
+    def text_cache(self):
+        return self._text_cache
+
+    def draw(self, screen, game_state):
+        shown_values = (game_state[CURRENT_SCORE],
+                        game_state[CURRENT_LEVEL_INDEX],
+                        game_state[LEVEL_NAME],
+                        game_state[CURRENT_LIVES])
+        if shown_values != self._shown_values:
+            self._shown_values = shown_values
+            self._update(*shown_values)
+
+        for (surface, position) in self._blits:
+            screen.blit(surface, position)
+
+    def _update(self, score, level_index, level_name, lives):
+        text_cache = self._text_cache
+
+        score_display = text_cache.render(str(score))
+        level_display = text_cache.render("Level #" + str(level_index + 1) +
+                                          ': ' + level_name)
+        lives_display = text_cache.render("Lives: " + str(lives))
+
+        self._blits = [
+            (score_display, (self._width - score_display.get_width(), 0)),
+            (level_display, (0, 0)),
+            (lives_display, (0, self._height - lives_display.get_height()))]
@@ -13,22 +13,45 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+
+# Taken before the other imports, so the startup report can time them too
+IMPORT_TIME = time.perf_counter()
 
 import pygame
 import sys
-import os
+import argparse
 import logging
-import random
-import configparser
-
-from thecubes import PlayerCube, HoriLeftCube, HoriRightCube, VertiTopCube
-from thecubes import VertiBotCube, DiaCube, RockCube
+import multiprocessing
+import os
 
-import csv
+from assets import images
+from campaign import CampaignError, CampaignCatalog
+from capture import FrameCapture
+from audio import AudioManager
+from fonts import load_font
+from gamesettings import get_settings
+from highscores import HighScoreWriter
+from hud import HudDisplay, TextCache
+from inputsampler import InputSampler
+from iowriter import BackgroundWriter, BackgroundLogHandler
+from renderer import FullScreenRenderer, DirtyRectRenderer
+from profiler import FrameProfiler, NullProfiler
+from profiler import EVENTS_PHASE, HUD_PHASE, DRAW_PHASE, OVERLAY_PHASE
+from profiler import SOUNDS_PHASE, FLIP_PHASE, TICK_PHASE, StartupTimer
+from replay import InputRecorder, make_recording_filename
+from sharedstate import SharedStateWriter
+from timestep import FixedTimestep
+from viewport import Viewport
+from simulation import Simulation, load_game_config
+from simulation import SOUND_EVENT, SCORE_EVENT, CAMPAIGN_COMPLETE_EVENT
+from simulation import IS_MENU, CAMPAIGN, SCORE_ZONES, IS_NEW_ROUND, HAS_DIED
+from simulation import SCORE_ZONE_SPAWN_RECT, PLAYER_CUBE, BAD_CUBES, ARENA
+from simulation import CURRENT_SCORE, CURRENT_LEVEL_INDEX, CURRENT_LIVES
+from simulation import WIDTH, HEIGHT, FRAME_RATE, TICK_RATE
+from simulation import SKIP_MENU, SKIP_SOUNDS
 
 
-CUBE_TYPES = ['HoriLeftCube', 'HoriRightCube', 'VertiTopCube',
-              'VertiBotCube', 'DiaCube', 'RockCube']
 
 WHITE = (255, 255, 255)
 GRAY = (84, 84, 84)
@@ -36,488 +59,158 @@ BLACK = (0, 0, 0)
 
 DIFFICULTY_LEVELS = ['Easy', 'Medium', 'Hard', 'Very Hard']
 
-HIGHSCORE_FOLDER = 'highscores' + os.sep
-HIGHSCORE_FILENAME = 'highscores.txt'
-
+# Looked for among the system's fonts when settings [graphics] give no FontFile
+FONT_NAME = "comicsansms"
 
-# game_state dictionary keys
-FRAME_COUNTER = 'frame_counter'
-CURRENT_LIVES = 'current_lives'
-MAX_LIVES = 'max_lives'
-CURRENT_SCORE = 'current_score'
-CURRENT_LEVEL_INDEX = 'current_level_index'
-SPEED_MODIFIER = 'speed_modifier'
-MAX_SPEED_MODIFIER = 'max_speed_modifier'
 
-LEVEL_NAME = 'level_name'
+PROFILER_OVERLAY_KEY = pygame.K_F3
+MENU_SELECT_KEYS = [pygame.K_SPACE, pygame.K_RETURN]
+# Frames between refreshes of the profiler overlay's percentiles
+PROFILER_OVERLAY_REFRESH = 30
 
-IS_NEW_ROUND = 'is_new_round'
-HAS_DIED = 'has_died'
-
-BASE_BAD_CUBE_SPEED = 'base_bad_cube_speed'
-SECONDS_PER_LEVEL = 'seconds_per_level'
-
-BAD_CUBE_SPAWN_RATE = 'bad_cube_spawn_rate'    
-
-BAD_CUBE_MAXIMUMS = 'bad_cube_maximums'
-
-BAD_CUBE_COUNTS = 'bad_cube_counts'
 
+# game_state dictionary keys used only for the menu and display
 GAME_CLOCK = 'game_clock'
+GAME_TIMESTEP = 'game_timestep'
+VIEWPORT = 'viewport'
+HIGH_SCORES = 'high_scores'
+AUDIO = 'audio'
+HUD = 'hud'
+INPUT_RECORDER = 'input_recorder'
+INPUT_SAMPLER = 'input_sampler'
+FRAME_PROFILER = 'frame_profiler'
+IS_PROFILER_SHOWN = 'is_profiler_shown'
+PROFILER_OVERLAY = 'profiler_overlay'
+# Until the first frame is on screen
+STARTUP_TIMER = 'startup_timer'
+STATE_WRITER = 'state_writer'
+FRAME_CAPTURE = 'frame_capture'
 
-IS_MENU = 'is_menu'
 IS_MENU_LISTED = 'is_menu_listed'
-CAMPAIGN_SETTINGS = 'campaign_settings'
 CAMPAIGN_MENU_CHOICES = 'campaign_menu_choices'
 CAMPAIGN_MENU_CHOICES_NAMES = 'campaign_menu_choices_names'
+CAMPAIGN_CATALOG = 'campaign_catalog'
+# CampaignCatalog.version the menu choices were built from
+MENU_CATALOG_VERSION = 'menu_catalog_version'
+MENU_TEXT_CACHE = 'menu_text_cache'
 
-SCORE_ZONES = 'score_zones'
-SCORE_ZONES_MAX = 'score_zones_max'
-SCORE_ZONE_SPAWN_RECT = 'score_zone_spawn_rect'
-SCORE_ZONE_LENGTH = 'score_zone_length'
-SCORE_ZONE_HEIGHT = 'score_zone_height'
-SCORE_ZONE_BUFFER = 'score_zone_buffer'
-
-# TODO: Implement score zone lifetime/refresh rate
-SCORE_ZONE_LIFETIME = 'score_zone_lifetime'
 
-LEVELS = 'levels'
-
-PLAYER_CUBE = 'player_cube'
-PLAYER_CUBE_SPEED = 'player_cube_speed'
-SHOULD_KEEP_ON_SCREEN = 'should_keep_on_screen'
-BAD_CUBES = 'bad_cubes'    
-
-
-# game_config dictionary keys
-game_config = {}
-
-WIDTH = 'width'
-HEIGHT = 'height'
-FRAME_RATE = 'frame_rate'
+# game_config dictionary keys used only for the display
 FONT_HUD = 'font_hud'
 FONT_MENU = 'font_menu'
 
-CHEATS_ENABLED = 'cheats_enabled'
-SKIP_MENU = 'skip_menu'
-SKIP_SOUNDS = 'skip_sounds'
-
-SAFETY_ZONE_X = 'safety_zone_x'
-SAFETY_ZONE_Y = 'safety_zone_y'
-
-def seconds_to_frames(frame_rate, number_of_seconds):
-    """Converts number_of_seconds to the equivalent number of frames."""
-    return int(number_of_seconds * frame_rate)
-
-def play_sound(settings, sound_name, repeat=1):
-    """Stop the game loop and play a sound a certain number of times."""
-    def seconds_to_ms(time_in_seconds):
-        """Converts seconds to milliseconds"""
-        return time_in_seconds * 1000
-    
-    pygame.mixer.music.stop()
-    
-    sound_folder = settings['sound']['FolderName'] + os.sep
-    
-    sound = pygame.mixer.Sound(sound_folder + settings['sound'][sound_name])
-    sound.set_volume(float(settings['sound']['Volume']))
-    
-    for _ in range(0, repeat):
-        sound.play()
-        pygame.time.wait(int(seconds_to_ms(sound.get_length())))
-    
-    pygame.mixer.music.rewind()
-    pygame.mixer.music.play(-1)
-
-def make_score_zone(game_state, game_config):
-    height = game_state[SCORE_ZONE_HEIGHT]
-    length = game_state[SCORE_ZONE_LENGTH]
-    buffer = game_state[SCORE_ZONE_BUFFER]
-    for _ in range(len(game_state[SCORE_ZONES]), game_state[SCORE_ZONES_MAX] ):
-        new_score_zone = pygame.Rect((length//2, height//2), (length,height))
-        
-        is_colliding = True
-        while is_colliding:
-            random_x = random.randint(length + buffer, game_config[WIDTH] - (length + buffer))
-            random_y = random.randint(height + buffer, game_config[HEIGHT] - (height  + buffer))
-            new_score_zone.center = (random_x, random_y)
-            
-            if new_score_zone.inflate(length, height).collidelist([game_state[PLAYER_CUBE]] + game_state[SCORE_ZONES]) == -1:
-                is_colliding = False
-        
-        game_state[SCORE_ZONES].append(new_score_zone)
-        
-    
-    
-    
-def add_points_to_score(game_state):
-    zone_index = game_state[PLAYER_CUBE].rect.collidelist(game_state[SCORE_ZONES])
-    score_to_add = 0
-    if zone_index != -1:
-        score_to_add = 1000
-        del game_state[SCORE_ZONES][zone_index]
-    
-    game_state[CURRENT_SCORE] += score_to_add
-        
-def save_score(game_state, campaign_settings):
-    """Saves player's score to a .txt file according to the name and
-    short name of the campaign being played."""
-    campaign_name = campaign_settings[game_state[LEVEL_NAME]]['CampaignName']
-    campaign_short_name = campaign_settings[game_state[LEVEL_NAME]]['CampaignShortName']
-    
-    high_score_filename = HIGHSCORE_FOLDER + campaign_short_name
-    high_score_filename += '_' + HIGHSCORE_FILENAME
-    
-    # Add new score
-    with open(high_score_filename, 'a', newline='') as csvfile:
-        high_score_writer = csv.writer(csvfile, delimiter=' ',
-                        quotechar='|', quoting=csv.QUOTE_MINIMAL)
-        
-        score_str = str(game_state[CURRENT_SCORE])
-        
-        level_str = "Level #" + str(game_state[CURRENT_LEVEL_INDEX] + 1) 
-        level_str += " - " + game_state[LEVEL_NAME]
-        
-        high_score = [score_str, level_str]
-        high_score_writer.writerow(high_score)
-    
-    # Sort scores
-    with open(high_score_filename, newline='') as csvfile:
-        high_score_reader = csv.reader(csvfile, delimiter=' ', quotechar='|')
-        
-        high_scores = list(high_score_reader)
-        
-        # removes campaign title if there
-        high_scores = [score for score in high_scores if len(score) != 1]
-        
-        high_scores.sort(key=lambda row: int(row[0]), reverse=True)
-    
-    # Write new sorted scores
-    with open(high_score_filename, 'w', newline='') as csvfile:
-        high_score_writer = csv.writer(csvfile, delimiter=' ',
-                        quotechar='|', quoting=csv.QUOTE_MINIMAL)
-        
-        high_score_writer.writerow([campaign_name])
-        for high_score in high_scores:
-            high_score_writer.writerow(high_score)
-
-def is_all_maxed_out(bad_cube_counts, bad_cube_maximums):
-    """Determines whether all the cubes of each type are at their maximum 
-    amounts."""
-    for cube_type in CUBE_TYPES:
-        if bad_cube_counts[cube_type] < bad_cube_maximums[cube_type]:
-            return False
-        
-    return True
-
-def change_level(game_state, game_config, settings):
-    campaign_settings = game_state[CAMPAIGN_SETTINGS]
-    
-    if not game_state[HAS_DIED] and game_state[CURRENT_LEVEL_INDEX] != -1:
-        if not game_config[SKIP_SOUNDS]:
-            play_sound(settings, 'NextRound', repeat=1)
-        
-        game_state[CURRENT_LEVEL_INDEX] += 1
-        game_state[CURRENT_LIVES] += 1 
-        
-    if game_state[CURRENT_LEVEL_INDEX] == -1 and not game_state[IS_MENU]:
-        game_state[CURRENT_LEVEL_INDEX] += 1                     
-        
-    if game_state[HAS_DIED]: 
-        if not game_config[SKIP_SOUNDS]:               
-            play_sound(settings, 'Loss', repeat=1)
-        
-        if game_state[CURRENT_LEVEL_INDEX] == 0 and game_state[CURRENT_LIVES] == game_state[MAX_LIVES]:
-            if not game_config[CHEATS_ENABLED]:
-                save_score(game_state, campaign_settings)
-            
-            game_state[CURRENT_SCORE] = 0
-            
-        if game_state[CURRENT_LEVEL_INDEX] != 0:
-            game_state[CURRENT_LIVES] -= 1
-            
-        if game_state[CURRENT_LIVES] == 0:
-            if not game_config[CHEATS_ENABLED]:
-                save_score(game_state, campaign_settings)
-            
-            game_state[CURRENT_LEVEL_INDEX] = 0
-            game_state[CURRENT_SCORE] = 0
-            game_state[CURRENT_LIVES] = game_state[MAX_LIVES]
-    
-    # Player has beaten all levels in a campaign
-    if game_state[CURRENT_LEVEL_INDEX] > len(game_state[LEVELS]) - 1:
-        if not game_config[CHEATS_ENABLED]:
-            play_sound(settings, 'NextRound', repeat=3)
-            save_score(game_state, campaign_settings)
-        sys.exit(0)
-    
-    game_state[LEVELS] = campaign_settings.sections()
-    game_state[LEVEL_NAME] = game_state[LEVELS][game_state[CURRENT_LEVEL_INDEX]]
-        
-    game_state[SPEED_MODIFIER] = 0
-    game_state[BAD_CUBES] = []
-    game_state[FRAME_COUNTER] = 0
-    game_state[IS_NEW_ROUND] = False
-    game_state[HAS_DIED] = False
-    
-    game_state[PLAYER_CUBE] = PlayerCube()
-    
-    game_state[PLAYER_CUBE_SPEED] = int(campaign_settings[game_state[LEVEL_NAME]]['GoodCubeSpeed'])
-    
-    game_state[SCORE_ZONES] = []
-    game_state[SCORE_ZONE_LENGTH] = int(campaign_settings[game_state[LEVEL_NAME]]['ScoreZoneLength'])
-    game_state[SCORE_ZONE_HEIGHT] = int(campaign_settings[game_state[LEVEL_NAME]]['ScoreZoneHeight'])
-    game_state[SCORE_ZONE_BUFFER] = int(campaign_settings[game_state[LEVEL_NAME]]['ScoreZoneBuffer'])
-    game_state[SCORE_ZONES_MAX] = int(campaign_settings[game_state[LEVEL_NAME]]['NumberOfScoreZonesAtSameTime'])
-    
-    score_zone_buffer = game_state[SCORE_ZONE_BUFFER]
-    top_left = (score_zone_buffer, score_zone_buffer)
-    width_height = (game_config[WIDTH] - score_zone_buffer * 2, game_config[HEIGHT] - score_zone_buffer * 2)
-    game_state[SCORE_ZONE_SPAWN_RECT] = pygame.Rect(top_left, width_height)
-    
-    if campaign_settings[game_state[LEVEL_NAME]]['KeepOnScreen'] == '1':
-        game_state[SHOULD_KEEP_ON_SCREEN] = True
-    else:
-        game_state[SHOULD_KEEP_ON_SCREEN] = False
-    
-    game_state[BASE_BAD_CUBE_SPEED] = int(campaign_settings[game_state[LEVEL_NAME]]['StartSpeed'])
-    game_state[MAX_SPEED_MODIFIER] = int(campaign_settings[game_state[LEVEL_NAME]]['SpeedLevelsPerRound'])
-    game_state[SECONDS_PER_LEVEL] = float(campaign_settings[game_state[LEVEL_NAME]]['SecondsPerLevel'])
-    game_state[BAD_CUBE_SPAWN_RATE] = float(campaign_settings[game_state[LEVEL_NAME]]['SpawnRate'])
-    
-    max_hori_left_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxHoriLCubes'])
-    max_hori_right_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxHoriRCubes'])
-    
-    max_verti_top_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxVertiTCubes'])
-    max_verti_bottom_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxVertiBCubes'])
-    
-    max_dia_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxDiaCubes'])
-    max_rock_cubes = int(campaign_settings[game_state[LEVEL_NAME]]['MaxRockCubes'])
-    
-    game_state[BAD_CUBE_MAXIMUMS] = {CUBE_TYPES[0]: max_hori_left_cubes,
-                                     CUBE_TYPES[1]: max_hori_right_cubes,
-                                     CUBE_TYPES[2]: max_verti_top_cubes,
-                                     CUBE_TYPES[3]: max_verti_bottom_cubes,
-                                     CUBE_TYPES[4]: max_dia_cubes,
-                                     CUBE_TYPES[5]: max_rock_cubes}
-    
-    game_state[BAD_CUBE_COUNTS] = {CUBE_TYPES[0]: 0, CUBE_TYPES[1]: 0,
-                                    CUBE_TYPES[2]: 0, CUBE_TYPES[3]: 0,
-                                    CUBE_TYPES[4]: 0, CUBE_TYPES[5]: 0}
-
-def spawn_new_bad_cube(game_state, game_config):
-    is_spawned = False    
-    while not is_spawned:
-        cube_type_index = random.randint(0, 5)
-        
-        new_speed = game_state[BASE_BAD_CUBE_SPEED] + game_state[SPEED_MODIFIER]
-        
-        cube_name = CUBE_TYPES[cube_type_index]
-        
-        # Do nothing if every cube is maxed out
-        if is_all_maxed_out(game_state[BAD_CUBE_COUNTS], game_state[BAD_CUBE_MAXIMUMS]):
-            is_spawned = True
-        
-        elif game_state[BAD_CUBE_COUNTS][cube_name] < game_state[BAD_CUBE_MAXIMUMS][cube_name]:
-            def get_new_bad_cube(bad_cube_counts):
-                if cube_name == CUBE_TYPES[0]:
-                    bad_cube = HoriLeftCube(new_speed)
-                    bad_cube_counts[cube_name] += 1
-                elif cube_name == CUBE_TYPES[1]:
-                    bad_cube = HoriRightCube(new_speed)
-                    bad_cube_counts[cube_name] += 1
-                elif cube_name == CUBE_TYPES[2]:
-                    bad_cube = VertiTopCube(new_speed)
-                    bad_cube_counts[cube_name] += 1
-                elif cube_name == CUBE_TYPES[3]:
-                    bad_cube = VertiBotCube(new_speed)
-                    bad_cube_counts[cube_name] += 1
-                elif cube_name == CUBE_TYPES[4]:
-                    bad_cube = DiaCube(new_speed)
-                    bad_cube_counts[cube_name] += 1
-                elif cube_name == CUBE_TYPES[5]:
-                    bad_cube = RockCube()
-                    bad_cube_counts[cube_name] += 1
-                    
-                return bad_cube
-            
-            bad_cube = get_new_bad_cube(game_state[BAD_CUBE_COUNTS])
-            
-            if not game_state[PLAYER_CUBE].rect.inflate(game_config[SAFETY_ZONE_X],
-                                                        game_config[SAFETY_ZONE_Y]).colliderect(bad_cube.rect):
-                game_state[BAD_CUBES].append(bad_cube)
-                is_spawned = True
-
-
-def has_player_died(player_cube, bad_cubes):
-    """
-    Determines whether the player cube has collided with any of the bad 
-    cubes.
-    """
-    are_there_cubes = len(bad_cubes) >= 1
-    
-    bad_cubes_rects = [cube.rect for cube in bad_cubes]
-    does_player_collide = player_cube.rect.collidelist(bad_cubes_rects) != -1
-    
-    if are_there_cubes and does_player_collide:
-        return True
-    
-    return False
-
-def cheats_input(pressed_keys, game_state):
-    """Changes levels when certain keys are pressed."""
-    is_cheating = False
-    if pressed_keys[pygame.K_PAGEUP]:
-        is_cheating = True
-        game_state[CURRENT_LEVEL_INDEX] += 1 
-    
-    elif pressed_keys[pygame.K_PAGEDOWN]:
-        game_state[CURRENT_LEVEL_INDEX] -= 1
-        is_cheating = True
-    
-    if is_cheating:
-        game_state[IS_NEW_ROUND] = True
-        game_state[HAS_DIED] = True
-        game_state[CURRENT_LIVES] = 9999
-        game_state[CURRENT_SCORE] = 0
-         
-
-def movement_input(pressed_keys, player_cube, player_cube_speed):
-    """
-        Converts user input on keyboard into movement of player_cube on 
-        screen.
-    """
-    
-    def set_x_and_y_speeds(player_cube, player_cube_speed):
-        """
-            Sets x and y speeds of player_cube depending on which keys are 
-            pressed.
-        """
-        # Controls movement
-        if pressed_keys[pygame.K_LEFT]:
-            player_cube.speed_x = -player_cube_speed
-            
-        elif pressed_keys[pygame.K_RIGHT]:
-            player_cube.speed_x = player_cube_speed
-        
-        else:
-            player_cube.speed_x = 0
-            
-        if pressed_keys[pygame.K_DOWN]:
-            player_cube.speed_y = player_cube_speed
-        
-        elif pressed_keys[pygame.K_UP]:
-            player_cube.speed_y = -player_cube_speed
-        else:
-            player_cube.speed_y = 0
-    
-    def normalize_diagonal_movement(player_cube):
-        """
-            Alters x and y speeds of player_cube to normalize (equal in speed 
-            to non-diagonal movement) diagonal movement.
-        """
-        # Keeps absolute speed constant-ish diagonal vs. straight
-        # TODO: Should be using Pythagor (sp?) theorem. (Only works well for
-        # multiples of 4 now
-        if player_cube.speed_x and player_cube.speed_y:
-            x_speed = player_cube.speed_x
-            y_speed = player_cube.speed_y
-            
-            if player_cube.speed_x > 0:
-                player_cube.speed_x = x_speed // 2 + x_speed // 4
-            else:
-                player_cube.speed_x = x_speed // 2 - ((-x_speed) // 4)
-            
-            if player_cube.speed_y > 0:
-                player_cube.speed_y = y_speed // 2 + y_speed // 4
-            else:
-                player_cube.speed_y = y_speed // 2 - ((-y_speed) // 4)
-    
-    set_x_and_y_speeds(player_cube, player_cube_speed)
-    normalize_diagonal_movement(player_cube) 
+# game_config dictionary keys used only for loading campaigns
+CAMPAIGN_CACHE_FOLDER = 'campaign_cache_folder'
 
+# game_config dictionary keys used only for startup
+IS_STARTUP_REPORTED = 'is_startup_reported'
 
-def display_game_info_on_screen(screen, game_state, game_config):
+def display_game_info_on_screen(renderer, game_state, game_config):
     """Display current score, level name and lives onto screen."""
-    score_display = game_config[FONT_HUD].render(str(game_state[CURRENT_SCORE]),
-                                             True, WHITE)
-    screen.blit(score_display,
-                (game_config[WIDTH] - score_display.get_width(), 0))
-    
-    level_str = "Level #" + str(game_state[CURRENT_LEVEL_INDEX] + 1)
-    level_str += ': ' + game_state[LEVEL_NAME]
-    level_display = game_config[FONT_HUD].render(level_str, True, WHITE)
-    screen.blit(level_display, (0, 0))
-    
-    lives_str = "Lives: " + str(game_state[CURRENT_LIVES])
-    lives_display = game_config[FONT_HUD].render(lives_str, True, WHITE)    
-    screen.blit(lives_display,
-                (0, game_config[HEIGHT] - lives_display.get_height()))        
+    game_state[HUD].draw(renderer, game_state)
 
-def draw_campaign_choices(screen, game_state, game_config):
+def draw_campaign_choices(renderer, game_state, game_config):
     vertical_offset = 0
     for (menu_surface, menu_rect) in game_state[CAMPAIGN_MENU_CHOICES]:
-        screen.blit(menu_surface, menu_rect)
+        renderer.blit(menu_surface, menu_rect)
         vertical_offset += menu_surface.get_height() + 10
 
-def draw_score_zone_spawn_area(screen, spawn_area_rect):
-    pygame.draw.rect(screen, GRAY, spawn_area_rect, 3)
+def draw_score_zone_spawn_area(renderer, spawn_area_rect, viewport):
+    renderer.draw_rect(GRAY, viewport.to_screen(spawn_area_rect), 3)
 
-def draw_score_zones(screen, score_zones_rects):
-    """Draws score_zones areas onto screen."""
+def draw_score_zones(renderer, score_zones_rects, viewport):
+    """Draws the score_zones areas within viewport onto screen."""
     for zone_rect in score_zones_rects:
-        pygame.draw.rect(screen, GRAY, zone_rect, 2)
+        if viewport.rect.colliderect(zone_rect):
+            renderer.draw_rect(GRAY, viewport.to_screen(zone_rect), 2)
 
-def move_cubes(screen, player_cube, bad_cubes, should_keep_on_screen, bad_cube_counts):
+def draw_cubes(renderer, player_cube, bad_cubes, viewport, alpha=1.0):
     """
-        Move player_cube and all cubes in bad_cubes and keep them on screen.
-        
-        Unless should_keep_on_screen is False, in which case, delete the bad 
-        cubes which move off screen and decrement their count in bad_cube_counts.
+        Draw player_cube and the cubes in bad_cubes within viewport onto 
+        screen, alpha of the way through their last move.
     """
-    
-    player_cube.move()
-    player_cube.keep_on_screen()
-        
-    indices_to_delete = []
-    for i in range(0, len(bad_cubes)):
-        bad_cubes[i].move()
-        
-        if bad_cubes[i].is_off_screen():
-            
-            if should_keep_on_screen:
-                bad_cubes[i].keep_on_screen()
-            else:
-                indices_to_delete.append(i)
-    
-    del_count = 0
-    for index in indices_to_delete:
-        cube_to_delete = bad_cubes[index - del_count]
-        
-        if isinstance(cube_to_delete, HoriLeftCube):
-            bad_cube_counts[CUBE_TYPES[0]] -= 1
-        elif isinstance(cube_to_delete, HoriRightCube):
-            bad_cube_counts[CUBE_TYPES[1]] -= 1
-        elif isinstance(cube_to_delete, VertiTopCube):
-            bad_cube_counts[CUBE_TYPES[2]] -= 1
-        elif isinstance(cube_to_delete, VertiBotCube):
-            bad_cube_counts[CUBE_TYPES[3]] -= 1
-        elif isinstance(cube_to_delete, DiaCube):
-            bad_cube_counts[CUBE_TYPES[4]] -= 1
-        elif isinstance(cube_to_delete, RockCube):
-            bad_cube_counts[CUBE_TYPES[5]] -= 1
-        
-        del bad_cubes[index - del_count]
-        del_count += 1
-
-def draw_cubes(screen, player_cube, bad_cubes):
-    """Draw player_cube and all cubes in bad_cubes onto screen."""
-    screen.blit(player_cube.surface, player_cube.rect)
-    
-    for bad_cube in bad_cubes:
-        screen.blit(bad_cube.surface, bad_cube.rect)
+    renderer.blit(player_cube.surface,
+                  viewport.to_screen(player_cube.get_draw_position(alpha)))
+    renderer.blits(bad_cubes.get_blit_sequence(alpha, viewport.rect))
+
+def draw_profiler_overlay(renderer, game_state, game_config):
+    """Draws the profiler's rolling percentiles in the top right corner."""
+    profiler = game_state[FRAME_PROFILER]
+    if (game_state[PROFILER_OVERLAY] is None or
+            profiler.frame_index % PROFILER_OVERLAY_REFRESH == 0):
+        game_state[PROFILER_OVERLAY] = [
+            game_config[FONT_HUD].render(line, True, WHITE, BLACK)
+            for line in profiler.get_report_lines()]
+    
+    # Below the score
+    y = game_config[FONT_HUD].get_linesize()
+    for line_display in game_state[PROFILER_OVERLAY]:
+        renderer.blit(line_display,
+                      (game_config[WIDTH] - line_display.get_width(), y))
+        y += line_display.get_height()
+
+def make_renderer(settings, screen):
+    """Builds the renderer settings [graphics] ask for."""
+    if settings['graphics']['DirtyRects'] == '1':
+        return DirtyRectRenderer(screen, BLACK)
+    
+    return FullScreenRenderer(screen, BLACK)
+
+def make_profiler(settings):
+    """Builds the FrameProfiler settings [profiling] ask for, if any."""
+    if settings['profiling']['Enabled'] != '1':
+        return NullProfiler()
+    
+    trace_filename = settings['profiling']['TraceFilename']
+    if trace_filename:
+        logging.debug("Writing frame times to %s", trace_filename)
+    
+    return FrameProfiler(int(settings['profiling']['Window']),
+                         trace_filename)
+
+def make_state_writer(settings):
+    """Builds the SharedStateWriter settings [export] ask for, if any."""
+    if settings['export']['Enabled'] != '1':
+        return None
+    
+    name = settings['export']['Name']
+    max_bad_cubes = int(settings['export']['MaxBadCubes'])
+    try:
+        writer = SharedStateWriter(name, max_bad_cubes)
+    except FileExistsError as error:
+        # Another game is publishing under name, this one goes next to it
+        writer = SharedStateWriter('%s_%d' % (name, os.getpid()),
+                                   max_bad_cubes)
+        logging.warning("%s, publishing as %s instead", error, writer.name)
+    else:
+        logging.debug("Publishing the game state in shared memory as %s",
+                      writer.name)
+    return writer
+
+def make_frame_capture(settings, size):
+    """Builds the FrameCapture settings [capture] ask for, if any."""
+    if settings['capture']['Enabled'] != '1':
+        return None
+    
+    frame_capture = FrameCapture(size, settings['capture']['Folder'],
+                                 settings['capture']['Format'],
+                                 int(settings['capture']['RingSize']))
+    logging.debug("Capturing frames to %s", frame_capture.folder)
+    return frame_capture
+
+def export_game_state(game_state):
+    """Publishes the tick just run to whoever reads the shared memory."""
+    game_state[STATE_WRITER].write(game_state[CURRENT_SCORE],
+                                   game_state[CURRENT_LEVEL_INDEX],
+                                   game_state[CURRENT_LIVES],
+                                   game_state[IS_MENU],
+                                   game_state[PLAYER_CUBE].rect,
+                                   game_state[BAD_CUBES],
+                                   game_state[SCORE_ZONES])
 
 def build_campaign_menu_choices(game_state, game_config):
+    """Lists the campaigns on the menu, unless none has changed since the
+    last time."""
     
     def get_key_by_difficulty(difficulty_levels, difficulty):
         if difficulty in difficulty_levels:
@@ -525,15 +218,18 @@ def build_campaign_menu_choices(game_state, game_config):
         else:
             return -1
 
+    catalog = game_state[CAMPAIGN_CATALOG]
+    catalog.refresh()
+    game_state[IS_MENU_LISTED] = True
+    if game_state[MENU_CATALOG_VERSION] == catalog.version:
+        return
+    game_state[MENU_CATALOG_VERSION] = catalog.version
+    
     game_state[CAMPAIGN_MENU_CHOICES_NAMES] = []
 
-    for files in os.listdir('campaigns' + os.sep):
-        if files.endswith(".ini"):
-            campaign_info = configparser.ConfigParser()
-            campaign_info.read('campaigns' + os.sep + files)
-            
-            campaign = (files, campaign_info['DEFAULT']['CampaignName'], campaign_info['DEFAULT']['Difficulty'])
-            game_state[CAMPAIGN_MENU_CHOICES_NAMES].append(campaign)
+    for campaign_info in catalog.get_all():
+        campaign = (campaign_info.filename, campaign_info.name, campaign_info.difficulty)
+        game_state[CAMPAIGN_MENU_CHOICES_NAMES].append(campaign)
     
     game_state[CAMPAIGN_MENU_CHOICES_NAMES].sort(key=lambda x: get_key_by_difficulty(DIFFICULTY_LEVELS, x[2]))     
     
@@ -557,7 +253,7 @@ def build_campaign_menu_choices(game_state, game_config):
     i = 0
     for offset in vertical_offsets:
         (_, campaign_name, difficulty ) = game_state[CAMPAIGN_MENU_CHOICES_NAMES][i]
-        campaign_display = game_config[FONT_MENU].render(campaign_name + ' (' + difficulty + ')', True, WHITE)
+        campaign_display = game_state[MENU_TEXT_CACHE].render(campaign_name + ' (' + difficulty + ')')
         
         campaign_display_rect = campaign_display.get_rect()
         
@@ -570,168 +266,295 @@ def build_campaign_menu_choices(game_state, game_config):
         game_state[CAMPAIGN_MENU_CHOICES].append(campaign_option)
         
         i += 1
-      
-    game_state[IS_MENU_LISTED] = True
 
-def main():
-    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
-        
-    settings = configparser.ConfigParser()
-    settings.read('config' + os.sep + 'settings.ini')
-    
-    
-    game_state = {}
-    game_config = {}
-    
-    if settings['gameplay']['CheatsEnabled'] == '1':
-        game_config[CHEATS_ENABLED] = True
-    else:
-        game_config[CHEATS_ENABLED] = False
-    
-    if settings['gameplay']['SkipMenu'] == '1':
-        game_state[IS_MENU] = False
-    else:
-        game_state[IS_MENU] = True
-    
-    if settings['sound']['SkipSounds'] == '1':
-        game_config[SKIP_SOUNDS] = True
-    else:
-        game_config[SKIP_SOUNDS] = False
-    
-    game_config[WIDTH] = int(settings['graphics']['Width'])
-    game_config[HEIGHT] = int(settings['graphics']['Height'])
-    
-    game_config[FRAME_RATE] = int(settings['gameplay']['FrameRate'])
-    
-    game_config[SAFETY_ZONE_X] = int(settings['gameplay']['SafetyZoneX'])
-    game_config[SAFETY_ZONE_Y] = int(settings['gameplay']['SafetyZoneY'])
-    
-    
-    pygame.init()
-    
-    game_config[FONT_HUD] = pygame.font.SysFont("comicsansms", 12)
-    game_config[FONT_MENU] = pygame.font.SysFont("comicsansms", 30)
-    
-    theme_path = settings['sound']['FolderName'] + os.sep
-    theme_path += settings['sound']['Theme']
-    pygame.mixer.music.load(theme_path)
-    pygame.mixer.music.set_volume(float(settings['sound']['Volume']))
-    
-    pygame.mixer.music.play(loops= -1)
-    
+def reload_campaign(simulation, game_state):
+    """Plays the campaign as its file is now from the coming change of
+    level, if it has been edited."""
+    campaign = game_state[CAMPAIGN]
+    try:
+        latest_campaign = game_state[CAMPAIGN_CATALOG].get(campaign.filename)
+    except (CampaignError, OSError) as error:
+        logging.error("Carrying on with the campaign as it was: %s", error)
+        return
+    
+    if latest_campaign is not campaign:
+        logging.debug("Reloaded %s", campaign.filename)
+        # The recording holds the campaign as it was, it couldn't be replayed
+        if game_state.get(INPUT_RECORDER) is not None:
+            logging.debug("Stopping the recording, the campaign changed")
+            stop_recording(game_state)
+        simulation.reload_campaign(latest_campaign)
+
+def handle_simulation_events(events, game_state, game_config):
+    """Plays the sounds and saves the scores as the simulation asks."""
+    for event in events:
+        if event[0] == SOUND_EVENT:
+            (_, sound_name, repeat) = event
+            if not game_config[SKIP_SOUNDS]:
+                game_state[AUDIO].play(sound_name, repeat)
+        
+        elif event[0] == SCORE_EVENT:
+            game_state[HIGH_SCORES].save(game_state[CAMPAIGN], event[1])
+        
+        elif event[0] == CAMPAIGN_COMPLETE_EVENT:
+            logging.debug("Campaign complete, quitting once the sounds are done")
+
+def start_recording(settings, simulation, campaign_filename):
+    """Starts recording the player's keys if settings ask for it."""
+    stop_recording(simulation.game_state)
+    
+    if settings['gameplay']['RecordInputs'] == '1':
+        filename = make_recording_filename(settings['gameplay']['RecordingFolder'],
+                                           simulation.game_state[CAMPAIGN])
+        logging.debug("Recording inputs to %s", filename)
+        simulation.game_state[INPUT_RECORDER] = InputRecorder(filename, simulation,
+                                                              campaign_filename)
+
+def stop_recording(game_state):
+    if game_state.get(INPUT_RECORDER) is not None:
+        game_state[INPUT_RECORDER].close()
+        game_state[INPUT_RECORDER] = None
+
+def end_startup(game_state, game_config):
+    """Times the first frame, and prints how long each phase of startup took
+    if asked to."""
+    startup_timer = game_state[STARTUP_TIMER]
+    startup_timer.mark('first frame')
+    logging.debug("First frame shown after %.0f ms",
+                  startup_timer.total_seconds * 1000)
+    
+    if game_config[IS_STARTUP_REPORTED]:
+        print("\n".join(startup_timer.get_report_lines()), flush=True)
+    game_state[STARTUP_TIMER] = None
+
+def main(arguments=None):
+    startup_timer = StartupTimer(IMPORT_TIME)
+    startup_timer.mark('imports')
+    
+    parser = argparse.ArgumentParser(description="InfiniCube")
+    parser.add_argument('--startup-report', action='store_true',
+                        help='print the time taken by each phase of startup')
+    options = parser.parse_args(arguments)
+    
+    # Log records are written out on the same thread as the high scores
+    io_writer = BackgroundWriter()
+    log_handler = BackgroundLogHandler(io_writer, logging.StreamHandler(sys.stderr))
+    logging.basicConfig(level=logging.DEBUG, handlers=[log_handler])
+    
+    try:
+        run_game(io_writer, startup_timer, options.startup_report)
+    finally:
+        logging.getLogger().removeHandler(log_handler)
+        io_writer.close()
+        log_handler.close()
+
+def run_game(io_writer, startup_timer, is_startup_reported=False):
+    settings = get_settings()
+    
+    game_config = load_game_config(settings)
+    game_config[CAMPAIGN_CACHE_FOLDER] = settings['gameplay']['CampaignCacheFolder']
+    game_config[IS_STARTUP_REPORTED] = is_startup_reported
+    startup_timer.mark('settings')
+    
+    # First, so its encoder process gets going alongside the rest of startup
+    frame_capture = make_frame_capture(settings, (game_config[WIDTH],
+                                                  game_config[HEIGHT]))
+    startup_timer.mark('capture')
+    
+    # Only the modules the game uses, pygame.init() would start them all
+    pygame.display.init()
+    pygame.font.init()
+    pygame.mixer.init()
+    startup_timer.mark('pygame')
+    
+    font_filename = settings['graphics']['FontFile']
+    font_cache_filename = settings['graphics']['FontCacheFilename']
+    game_config[FONT_HUD] = load_font(FONT_NAME, 12, font_filename,
+                                      font_cache_filename)
+    game_config[FONT_MENU] = load_font(FONT_NAME, 30, font_filename,
+                                       font_cache_filename)
+    startup_timer.mark('fonts')
+    
+    audio = AudioManager(settings)
+    # Comes in a little after the first frame, which doesn't wait on it
+    audio.play_music(in_background=True)
+    startup_timer.mark('audio')
 
     screen = pygame.display.set_mode((game_config[WIDTH], game_config[HEIGHT]))
     
     pygame.display.set_caption("InfiniCube v0.9")
+    startup_timer.mark('display')
     
-    game_state[PLAYER_CUBE] = PlayerCube()
-    
-    game_state[GAME_CLOCK] = pygame.time.Clock()
-    
-    game_state[CAMPAIGN_SETTINGS] = configparser.ConfigParser()
-    campaign_path = 'campaigns' + os.sep
-    campaign_path += settings['gameplay']['CampaignFilename']
-    game_state[CAMPAIGN_SETTINGS].read(campaign_path)
-    
-    game_state[LEVELS] = game_state[CAMPAIGN_SETTINGS].sections()
+    images.load_all(settings)
+    logging.debug("Loaded %d images", len(images))
+    startup_timer.mark('images')
     
-    game_state[MAX_LIVES] = int(game_state[CAMPAIGN_SETTINGS]['DEFAULT']['NumberOfLives'])
-    game_state[CURRENT_LIVES] = game_state[MAX_LIVES]
+    catalog = CampaignCatalog(game_config[CAMPAIGN_CACHE_FOLDER])
+    campaign_filename = settings['gameplay']['CampaignFilename']
+    campaign = catalog.get(campaign_filename)
+    startup_timer.mark('campaign')
     
+    profiler = make_profiler(settings)
+    simulation = Simulation(game_config, campaign, is_menu=True,
+                            profiler=profiler)
+    game_state = simulation.game_state
+    game_state[FRAME_PROFILER] = profiler
+    game_state[IS_PROFILER_SHOWN] = settings['profiling']['ShowOverlay'] == '1'
+    game_state[PROFILER_OVERLAY] = None
     
-    game_state[CURRENT_SCORE] = 0
-    game_state[CURRENT_LEVEL_INDEX] = -1
-    game_state[IS_NEW_ROUND] = True
-    game_state[HAS_DIED] = False
+    if game_config[SKIP_MENU]:
+        simulation.start_campaign(campaign)
+        start_recording(settings, simulation, campaign_filename)
     
+    game_state[GAME_CLOCK] = pygame.time.Clock()
+    game_state[GAME_TIMESTEP] = FixedTimestep(game_config[TICK_RATE])
+    game_state[INPUT_SAMPLER] = InputSampler(profiler)
+    game_state[VIEWPORT] = Viewport(game_config[WIDTH], game_config[HEIGHT])
+    game_state[AUDIO] = audio
+    game_state[HIGH_SCORES] = HighScoreWriter(io_writer)
+    game_state[HUD] = HudDisplay(game_config[FONT_HUD], WHITE,
+                                 game_config[WIDTH], game_config[HEIGHT])
+    
+    game_state[CAMPAIGN_CATALOG] = catalog
     game_state[IS_MENU_LISTED] = False
+    game_state[MENU_CATALOG_VERSION] = None
+    game_state[MENU_TEXT_CACHE] = TextCache(game_config[FONT_MENU], WHITE)
+    game_state[STARTUP_TIMER] = startup_timer
+    game_state[STATE_WRITER] = make_state_writer(settings)
+    game_state[FRAME_CAPTURE] = frame_capture
+    renderer = make_renderer(settings, screen)
+    startup_timer.mark('simulation')
+    try:
+        run_game_loop(renderer, simulation, settings, game_config)
+    finally:
+        stop_recording(game_state)
+        game_state[HIGH_SCORES].close()
+        if game_state[STATE_WRITER] is not None:
+            game_state[STATE_WRITER].close()
+        if game_state[FRAME_CAPTURE] is not None:
+            game_state[FRAME_CAPTURE].close()
+        profiler.close()
+
+def run_game_loop(renderer, simulation, settings, game_config):
+    game_state = simulation.game_state
+    profiler = game_state[FRAME_PROFILER]
+    input_sampler = game_state[INPUT_SAMPLER]
     while True:
-        if game_state[IS_MENU]:
-            if not game_state[IS_MENU_LISTED]:
-                build_campaign_menu_choices(game_state, game_config)
+        profiler.start_frame()
+        profiler.begin(EVENTS_PHASE)
+        
+        snapshot = input_sampler.poll()
+        pressed_keys = snapshot.pressed_keys
+        
+        if snapshot.is_quit or pressed_keys[pygame.K_ESCAPE]:
+            sys.exit()
+        
+        if PROFILER_OVERLAY_KEY in snapshot.new_keys:
+            game_state[IS_PROFILER_SHOWN] = not game_state[IS_PROFILER_SHOWN]
+        
+        if snapshot.is_exposed:
+            renderer.invalidate()
+        
+        # Select campaign
+        if (game_state[IS_MENU] and game_state[IS_MENU_LISTED] and
+                not snapshot.new_keys.isdisjoint(MENU_SELECT_KEYS)):
+            menu_option_rects = [rect for (_, rect) in game_state[CAMPAIGN_MENU_CHOICES]]
+            choice_index = game_state[PLAYER_CUBE].rect.collidelist(menu_option_rects)
+            if choice_index != -1:
+                campaign_filename = game_state[CAMPAIGN_MENU_CHOICES_NAMES][choice_index][0]
+                try:
+                    campaign = game_state[CAMPAIGN_CATALOG].get(campaign_filename)
+                except (CampaignError, OSError) as error:
+                    # Edited or removed since the menu was listed
+                    logging.error("Can't start the campaign: %s", error)
+                    game_state[IS_MENU_LISTED] = False
+                else:
+                    simulation.start_campaign(campaign)
+                    start_recording(settings, simulation, campaign_filename)
+        
+        #Resets game back to campaign menu
+        elif not game_state[IS_MENU] and pygame.K_BACKSPACE in snapshot.new_keys:
+            stop_recording(game_state)
+            simulation.return_to_menu()
+            # Lists campaigns added or edited since
+            game_state[IS_MENU_LISTED] = False
+        profiler.end(EVENTS_PHASE)
+        
+        # As many ticks as the time since the last frame holds, so a slow 
+        # frame doesn't slow the game down. They all get this frame's keys.
+        for _ in range(game_state[GAME_TIMESTEP].advance()):
+            # Campaign edits are picked up as the level changes
+            if (not game_state[IS_MENU] and
+                    (game_state[IS_NEW_ROUND] or game_state[HAS_DIED])):
+                reload_campaign(simulation, game_state)
+            if game_state.get(INPUT_RECORDER) is not None:
+                game_state[INPUT_RECORDER].record(pressed_keys)
+            simulation.step(pressed_keys)
+            input_sampler.input_applied()
+            if game_state[STATE_WRITER] is not None:
+                export_game_state(game_state)
+        
+        profiler.begin(SOUNDS_PHASE)
+        handle_simulation_events(simulation.pop_events(), game_state, game_config)
+        game_state[AUDIO].update()
+        
+        # Lets the last sounds of the campaign play out before quitting
+        if simulation.is_finished and not game_state[AUDIO].is_busy:
+            sys.exit(0)
+        profiler.end(SOUNDS_PHASE)
+        
+        profiler.begin(DRAW_PHASE)
+        renderer.begin_frame()
+        profiler.end(DRAW_PHASE)
         
-        # Changes level if needed and resets score, lives, ... if needed
-        if game_state[IS_NEW_ROUND] or game_state[HAS_DIED]:
-            change_level(game_state, game_config, settings)
-            
         if not game_state[IS_MENU]:
-            while len(game_state[SCORE_ZONES]) < game_state[SCORE_ZONES_MAX]:
-                make_score_zone(game_state, game_config)
-            
-            add_points_to_score(game_state)
-            
-            game_state[FRAME_COUNTER] += 1        
-            
-            if game_state[SPEED_MODIFIER] == game_state[MAX_SPEED_MODIFIER]:
-                game_state[IS_NEW_ROUND] = True
-                
-            # Spawn new bad cubes
-            if game_state[FRAME_COUNTER] % seconds_to_frames(game_config[FRAME_RATE], game_state[BAD_CUBE_SPAWN_RATE]) == 0:            
-                spawn_new_bad_cube(game_state, game_config)
-            
-            if game_state[FRAME_COUNTER] % seconds_to_frames(game_config[FRAME_RATE], game_state[SECONDS_PER_LEVEL]) == 0:
-                game_state[SPEED_MODIFIER] += 1            
-            
-            
-            game_state[HAS_DIED] = has_player_died(game_state[PLAYER_CUBE], game_state[BAD_CUBES])
-        
-        
-        for event in pygame.event.get():            
-            pressed_keys = pygame.key.get_pressed()
-            
-            if event.type == pygame.QUIT or pressed_keys[pygame.K_ESCAPE]:
-                sys.exit()
-            
-            # Select campaign
-            if game_state[IS_MENU] and (pressed_keys[pygame.K_SPACE] or pressed_keys[pygame.K_RETURN]):
-                menu_option_rects = [rect for (_, rect) in game_state[CAMPAIGN_MENU_CHOICES]]
-                choice_index = game_state[PLAYER_CUBE].rect.collidelist(menu_option_rects)
-                if choice_index != -1:
-                    game_state[CAMPAIGN_SETTINGS] = configparser.ConfigParser()
-                    game_state[CAMPAIGN_SETTINGS].read('campaigns' + os.sep + game_state[CAMPAIGN_MENU_CHOICES_NAMES][choice_index][0])
-                    game_state[IS_MENU] = False
-                    change_level(game_state, game_config, settings)
-            
-            #Resets game back to campaign menu
-            if not game_state[IS_MENU] and pressed_keys[pygame.K_BACKSPACE]:
-                if not game_config[CHEATS_ENABLED]:
-                    save_score(game_state, game_state[CAMPAIGN_SETTINGS])
-                
-                if not game_config[SKIP_SOUNDS]:
-                    play_sound(settings, 'Loss')
-                
-                game_state[IS_MENU] = True
-                game_state[CURRENT_SCORE] = 0
-                game_state[CURRENT_LEVEL_INDEX] = -1
-                game_state[IS_NEW_ROUND] = True
-                game_state[HAS_DIED] = False
-
-            # DEBUG: Fast Round Switch
-            if game_config[CHEATS_ENABLED] and not game_state[IS_MENU]:
-                cheats_input(pressed_keys, game_state)
-            
-            movement_input(pressed_keys,
-                           game_state[PLAYER_CUBE], game_state[PLAYER_CUBE_SPEED])
-        
-
-        screen.fill(BLACK)
+            profiler.begin(HUD_PHASE)
+            display_game_info_on_screen(renderer, game_state, game_config)
+            profiler.end(HUD_PHASE)
+        
+        profiler.begin(DRAW_PHASE)
+        alpha = game_state[GAME_TIMESTEP].alpha
+        viewport = game_state[VIEWPORT]
+        player_cube = game_state[PLAYER_CUBE]
+        viewport.follow(pygame.Rect(player_cube.get_draw_position(alpha),
+                                    player_cube.rect.size).center,
+                        game_state[ARENA])
         
         if not game_state[IS_MENU]:
-            display_game_info_on_screen(screen, game_state, game_config)
-            draw_score_zone_spawn_area(screen, game_state[SCORE_ZONE_SPAWN_RECT])
-            draw_score_zones(screen, game_state[SCORE_ZONES])
+            draw_score_zone_spawn_area(renderer, game_state[SCORE_ZONE_SPAWN_RECT],
+                                       viewport)
+            draw_score_zones(renderer, game_state[SCORE_ZONES], viewport)
         
         if game_state[IS_MENU]:
-            draw_campaign_choices(screen, game_state, game_config)
-        
-        move_cubes(screen, game_state[PLAYER_CUBE], game_state[BAD_CUBES],
-                   game_state[SHOULD_KEEP_ON_SCREEN], game_state[BAD_CUBE_COUNTS])
-        
-        draw_cubes(screen, game_state[PLAYER_CUBE], game_state[BAD_CUBES])
-        
-        pygame.display.flip()
-         
+            # Built here so a Backspace to the menu this frame finds it
+            if not game_state[IS_MENU_LISTED]:
+                build_campaign_menu_choices(game_state, game_config)
+            draw_campaign_choices(renderer, game_state, game_config)
+        
+        draw_cubes(renderer, player_cube, game_state[BAD_CUBES], viewport, alpha)
+        profiler.end(DRAW_PHASE)
+        
+        if game_state[IS_PROFILER_SHOWN]:
+            profiler.begin(OVERLAY_PHASE)
+            draw_profiler_overlay(renderer, game_state, game_config)
+            profiler.end(OVERLAY_PHASE)
+        
+        profiler.begin(FLIP_PHASE)
+        renderer.end_frame()
+        input_sampler.frame_shown()
+        if game_state[FRAME_CAPTURE] is not None:
+            game_state[FRAME_CAPTURE].capture(renderer.surface)
+        if game_state[STARTUP_TIMER] is not None:
+            end_startup(game_state, game_config)
+        profiler.end(FLIP_PHASE)
+        
+        profiler.begin(TICK_PHASE)
         game_state[GAME_CLOCK].tick(game_config[FRAME_RATE])
+        profiler.end(TICK_PHASE)
+        
+        profiler.end_frame(len(game_state[BAD_CUBES]))
 
 if __name__ == "__main__":
+        # The frame capture's encoder process starts from here once frozen
+        multiprocessing.freeze_support()
         main()
@@ -0,0 +1,88 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+import collections
+import time
+
+from profiler import NullProfiler
+
+# Keys whose presses are timed until the player is seen moving
+MOVEMENT_KEYS = frozenset([pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP,
+                           pygame.K_DOWN])
+
+# The player's input at the start of a frame.
+#
+# pressed_keys: the keyboard, like pygame.key.get_pressed()
+# new_keys:     keys pressed down since the last frame
+# is_quit:      whether the window was closed
+# is_exposed:   whether the window needs redrawing in full
+InputSnapshot = collections.namedtuple('InputSnapshot', [
+    'pressed_keys', 'new_keys', 'is_quit', 'is_exposed'])
+
+
+class InputSampler(object):
+    """Reads the player's input once a frame.
+
+    poll drains the event queue and reads the keyboard once, and every tick
+    of the frame is given that same snapshot. The time from a movement key
+    press to the frame showing the player move is given to profiler, in ms
+    and in frames.
+
+    Key events carry no timestamp, so a press is timed from when poll
+    drains it from the event queue. Time spent waiting in the queue before
+    that isn't counted.
+    """
+    def __init__(self, profiler=None):
+        self._profiler = profiler or NullProfiler()
+        self._frame_index = 0
+
+        # When the movement key press being timed was drained, if any
+        self._press_time = None
+        self._press_frame_index = 0
+        self._is_press_applied = False
+
+    def poll(self):
+        """Returns the InputSnapshot of this frame."""
+        new_keys = set()
+        is_quit = False
+        is_exposed = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                is_quit = True
+            elif event.type == pygame.KEYDOWN:
+                new_keys.add(event.key)
+                if self._press_time is None and event.key in MOVEMENT_KEYS:
+                    self._press_time = time.perf_counter_ns()
+                    self._press_frame_index = self._frame_index
+            elif event.type == pygame.VIDEOEXPOSE:
+                is_exposed = True
+
+        return InputSnapshot(pygame.key.get_pressed(), frozenset(new_keys),
+                             is_quit, is_exposed)
+
+    def input_applied(self):
+        """Tells the sampler a tick has been run with the last snapshot."""
+        if self._press_time is not None:
+            self._is_press_applied = True
+
+    def frame_shown(self):
+        """Tells the sampler the frame is on screen."""
+        if self._is_press_applied:
+            self._profiler.add_input_latency(
+                self._frame_index - self._press_frame_index + 1,
+                time.perf_counter_ns() - self._press_time)
+            self._press_time = None
+            self._is_press_applied = False
+
+        self._frame_index += 1
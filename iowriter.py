@@ -0,0 +1,108 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import traceback
+
+# Jobs waiting for the writer thread before submit starts to wait (or drop)
+MAX_PENDING_JOBS = 1024
+
+
+class BackgroundWriter(object):
+    """Runs disk and terminal writes, in order, on one background thread.
+
+    The queue of jobs is bounded. When it is full, submit waits for room,
+    or drops the job if asked not to block. close runs every job submitted
+    so far before returning.
+    """
+    def __init__(self, max_pending=MAX_PENDING_JOBS):
+        self._queue = queue.Queue(max_pending)
+        self._dropped = 0
+        self._thread = threading.Thread(target=self._run,
+                                        name='BackgroundWriter', daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self):
+        """How many jobs were dropped because the queue was full."""
+        return self._dropped
+
+    def submit(self, job, *arguments, block=True):
+        """Queues job(*arguments) to be run on the writer thread.
+
+        Returns False if block is False and the job was dropped.
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("BackgroundWriter is closed")
+
+        try:
+            self._queue.put((job, arguments), block)
+        except queue.Full:
+            self._dropped += 1
+            return False
+        return True
+
+    def close(self):
+        """Runs what is left in the queue, then stops the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            (job, arguments) = item
+            try:
+                job(*arguments)
+            except Exception:
+                # Logging could be what failed, so this goes straight out
+                traceback.print_exc(file=sys.stderr)
+
+
+class BackgroundLogHandler(logging.handlers.QueueHandler):
+    """Hands log records to handler on a BackgroundWriter's thread.
+
+    Records are dropped rather than stall the game when the writer falls
+    behind.
+    """
+    def __init__(self, writer, handler):
+        super(BackgroundLogHandler, self).__init__(None)
+        self._writer = writer
+        self._handler = handler
+
+    def enqueue(self, record):
+        self._writer.submit(self._handler.handle, record, block=False)
+
+    def close(self):
+        super(BackgroundLogHandler, self).close()
+        self._handler.close()
+
+
+def replace_file(filename, data):
+    """Writes the bytes data to filename, all at once or not at all.
+
+    data is written aside and moved into place so a reader never sees half
+    of it.
+    """
+    temporary_filename = filename + '.%d.tmp' % os.getpid()
+    with open(temporary_filename, 'wb') as temporary_file:
+        temporary_file.write(data)
+    os.replace(temporary_filename, filename)
@@ -0,0 +1,210 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+import csv
+import time
+
+# Phases of a frame, in the order they run
+EVENTS_PHASE = 'events'
+SCORE_ZONES_PHASE = 'score_zones'
+SPAWN_PHASE = 'spawn'
+COLLIDE_PHASE = 'collide'
+MOVE_PHASE = 'move'
+SOUNDS_PHASE = 'sounds'
+HUD_PHASE = 'hud'
+DRAW_PHASE = 'draw'
+OVERLAY_PHASE = 'overlay'
+FLIP_PHASE = 'flip'
+TICK_PHASE = 'tick'
+
+PHASES = [EVENTS_PHASE, SCORE_ZONES_PHASE, SPAWN_PHASE, COLLIDE_PHASE,
+          MOVE_PHASE, SOUNDS_PHASE, HUD_PHASE, DRAW_PHASE, OVERLAY_PHASE,
+          FLIP_PHASE, TICK_PHASE]
+
+# Whole frame, from start_frame to end_frame
+FRAME = 'frame'
+
+# From a movement key press to the frame showing the player move
+INPUT_LATENCY = 'input'
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class FrameProfiler(object):
+    """Times every phase of every frame with time.perf_counter_ns.
+
+    The last window frames are kept for rolling percentiles. If a trace
+    filename is given, every frame is also written to it as a CSV row of
+    microseconds per phase.
+
+    Input latencies, measured by an InputSampler, are kept the same way
+    and written on the row of the frame which ended them.
+    """
+    def __init__(self, window=600, trace_filename=None):
+        self._frame_index = 0
+        self._frame_start = 0
+        self._phase_starts = {}
+        self._phase_times = dict.fromkeys(PHASES, 0)
+
+        self._history = {phase: collections.deque(maxlen=window)
+                         for phase in PHASES + [FRAME, INPUT_LATENCY]}
+        self._cube_counts = collections.deque(maxlen=window)
+        self._input_latency_frames = collections.deque(maxlen=window)
+        self._frame_input_latency = None
+
+        self._trace_file = None
+        self._trace_writer = None
+        if trace_filename:
+            self._trace_file = open(trace_filename, 'w', newline='')
+            self._trace_writer = csv.writer(self._trace_file)
+            self._trace_writer.writerow(
+                ['frame', 'cubes'] + [phase + '_us' for phase in PHASES] +
+                [FRAME + '_us', INPUT_LATENCY + '_us', INPUT_LATENCY + '_frames'])
+
+    @property
+    def frame_index(self):
+        return self._frame_index
+
+    def start_frame(self):
+        self._frame_start = time.perf_counter_ns()
+        for phase in PHASES:
+            self._phase_times[phase] = 0
+        self._frame_input_latency = None
+
+    def begin(self, phase):
+        self._phase_starts[phase] = time.perf_counter_ns()
+
+    def end(self, phase):
+        self._phase_times[phase] += (time.perf_counter_ns() -
+                                     self._phase_starts[phase])
+
+    def add_input_latency(self, frames, latency):
+        """Stores an input latency of latency ns, over frames frames."""
+        self._history[INPUT_LATENCY].append(latency)
+        self._input_latency_frames.append(frames)
+        self._frame_input_latency = (latency // 1000, frames)
+
+    def end_frame(self, cube_count):
+        """Stores the frame's timings along with the live cube count."""
+        frame_time = time.perf_counter_ns() - self._frame_start
+
+        for phase in PHASES:
+            self._history[phase].append(self._phase_times[phase])
+        self._history[FRAME].append(frame_time)
+        self._cube_counts.append(cube_count)
+
+        if self._trace_writer:
+            self._trace_writer.writerow(
+                [self._frame_index, cube_count] +
+                [self._phase_times[phase] // 1000 for phase in PHASES] +
+                [frame_time // 1000] +
+                list(self._frame_input_latency or ('', '')))
+
+        self._frame_index += 1
+
+    def get_percentiles(self, phase):
+        """Returns the rolling p50, p95 and p99 of a phase in ms."""
+        return tuple(nanoseconds / 1e6 for nanoseconds
+                     in get_percentiles(self._history[phase]))
+
+    def get_report_lines(self):
+        """Describes the rolling percentiles of every phase, one per line."""
+        lines = ['%-11s %6s %6s %6s' % ('ms', 'p50', 'p95', 'p99')]
+        for phase in PHASES + [FRAME]:
+            lines.append('%-11s %6.2f %6.2f %6.2f'
+                         % ((phase,) + self.get_percentiles(phase)))
+
+        if self._history[INPUT_LATENCY]:
+            lines.append('%-11s %6.2f %6.2f %6.2f'
+                         % ((INPUT_LATENCY,) +
+                            self.get_percentiles(INPUT_LATENCY)))
+            lines.append('%-11s %6d %6d %6d'
+                         % (('in frames',) +
+                            get_percentiles(self._input_latency_frames)))
+
+        if self._cube_counts:
+            lines.append('cubes %d (peak %d)' % (self._cube_counts[-1],
+                                                 max(self._cube_counts)))
+        return lines
+
+    def close(self):
+        """Writes out what is left of the trace file."""
+        if self._trace_file:
+            self._trace_file.close()
+            self._trace_file = None
+            self._trace_writer = None
+
+
+class NullProfiler(object):
+    """Stands in for FrameProfiler when profiling is off."""
+    frame_index = 0
+
+    def start_frame(self):
+        pass
+
+    def begin(self, phase):
+        pass
+
+    def end(self, phase):
+        pass
+
+    def add_input_latency(self, frames, latency):
+        pass
+
+    def end_frame(self, cube_count):
+        pass
+
+    def get_report_lines(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def get_percentiles(values):
+    """Returns the p50, p95 and p99 of values, or zeros if there are none."""
+    values = sorted(values)
+    if not values:
+        return (0,) * len(PERCENTILES)
+
+    return tuple(values[min(int(len(values) * fraction), len(values) - 1)]
+                 for fraction in PERCENTILES)
+
+
+class StartupTimer(object):
+    """Times each phase of startup, up to the first frame on screen.
+
+    start_time, from time.perf_counter(), defaults to now.
+    """
+    def __init__(self, start_time=None):
+        self._start_time = (time.perf_counter() if start_time is None
+                            else start_time)
+        self._last_time = self._start_time
+        self._phases = []
+
+    @property
+    def total_seconds(self):
+        return self._last_time - self._start_time
+
+    def mark(self, phase):
+        """Ends phase, which ran from the last mark until now."""
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last_time))
+        self._last_time = now
+
+    def get_report_lines(self):
+        """Returns one line per phase in ms, and their total."""
+        return (["%-12s %8.1f ms" % (phase, seconds * 1000)
+                 for (phase, seconds) in self._phases] +
+                ["%-12s %8.1f ms" % ('total', self.total_seconds * 1000)])
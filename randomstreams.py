@@ -0,0 +1,41 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+
+# Largest seed picked when none is given
+MAX_SEED = 2 ** 63 - 1
+
+
+class RandomStreams(object):
+    """One seeded random.Random per part of the game.
+
+    Every stream is derived from the same seed, but drawing more numbers
+    from one (e.g. an extra score zone) doesn't shift the others.
+
+    spawn:       which type of bad cube spawns next
+    cubes:       where bad cubes spawn and which way they go
+    score_zones: where score zones are placed
+    """
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randint(0, MAX_SEED)
+
+        self._seed = seed
+        self.spawn = random.Random('%d-spawn' % seed)
+        self.cubes = random.Random('%d-cubes' % seed)
+        self.score_zones = random.Random('%d-score_zones' % seed)
+
+    @property
+    def seed(self):
+        return self._seed
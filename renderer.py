@@ -0,0 +1,148 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+
+# Above this many dirty rects a frame is pushed with a full flip instead
+MAX_DIRTY_RECTS = 256
+# Above this fraction of the screen dirty a frame is pushed with a full flip
+MAX_DIRTY_AREA = 0.4
+
+
+class FullScreenRenderer(object):
+    """Clears and pushes the whole screen every frame."""
+    def __init__(self, screen, background_color):
+        self._screen = screen
+        self._background_color = background_color
+
+    @property
+    def surface(self):
+        return self._screen
+
+    def invalidate(self):
+        pass
+
+    def begin_frame(self):
+        self._screen.fill(self._background_color)
+
+    def blit(self, surface, position):
+        return self._screen.blit(surface, position)
+
+    def blits(self, blit_sequence):
+        """Blits many (surface, position) pairs in one call."""
+        self._screen.blits(blit_sequence, doreturn=False)
+
+    def draw_rect(self, color, rect, width=0):
+        return pygame.draw.rect(self._screen, color, rect, width)
+
+    def end_frame(self):
+        pygame.display.flip()
+
+
+class DirtyRectRenderer(FullScreenRenderer):
+    """Clears and pushes only the parts of the screen drawn to.
+
+    Everything drawn last frame is cleared to the background color, so every
+    frame must draw everything that should be on screen, as with
+    FullScreenRenderer. Only the rects drawn last frame and this frame are
+    sent to pygame.display.update, unless so much changed that a full flip
+    is cheaper.
+    """
+    def __init__(self, screen, background_color,
+                 max_dirty_rects=MAX_DIRTY_RECTS, max_dirty_area=MAX_DIRTY_AREA):
+        super(DirtyRectRenderer, self).__init__(screen, background_color)
+        self._screen_rect = screen.get_rect()
+        self._max_dirty_rects = max_dirty_rects
+        self._max_dirty_area = (max_dirty_area * self._screen_rect.width *
+                                self._screen_rect.height)
+
+        self._previous_rects = []
+        self._current_rects = []
+        self._is_invalid = True
+
+        self._partial_updates = 0
+        self._full_updates = 0
+
+    @property
+    def partial_updates(self):
+        return self._partial_updates
+
+    @property
+    def full_updates(self):
+        return self._full_updates
+
+    def invalidate(self):
+        """Redraws and pushes the whole screen next frame (e.g. on expose)."""
+        self._is_invalid = True
+
+    def begin_frame(self):
+        if self._is_invalid:
+            self._screen.fill(self._background_color)
+        else:
+            for rect in self._previous_rects:
+                self._screen.fill(self._background_color, rect)
+
+    def blit(self, surface, position):
+        return self._add_dirty_rect(self._screen.blit(surface, position))
+
+    def blits(self, blit_sequence):
+        self._current_rects.extend(filter(None, self._screen.blits(blit_sequence)))
+
+    def draw_rect(self, color, rect, width=0):
+        bounds = pygame.draw.rect(self._screen, color, rect, width)
+        if width <= 0 or bounds.width <= 2 * width or bounds.height <= 2 * width:
+            return self._add_dirty_rect(bounds)
+
+        # Only the outline is dirty, not the (possibly huge) inside of it
+        for edge in get_outline_rects(bounds, width):
+            self._add_dirty_rect(edge)
+        return bounds
+
+    def end_frame(self):
+        dirty_rects = self._previous_rects + self._current_rects
+
+        if self._is_invalid or self._is_too_dirty(dirty_rects):
+            pygame.display.flip()
+            self._full_updates += 1
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+            self._partial_updates += 1
+
+        self._is_invalid = False
+        self._previous_rects = self._current_rects
+        self._current_rects = []
+
+    def _add_dirty_rect(self, rect):
+        # blit and pygame.draw already clip what they return to the screen
+        if rect:
+            self._current_rects.append(rect)
+        return rect
+
+    def _is_too_dirty(self, dirty_rects):
+        if len(dirty_rects) > self._max_dirty_rects:
+            return True
+
+        dirty_area = 0
+        for rect in dirty_rects:
+            dirty_area += rect.width * rect.height
+        return dirty_area > self._max_dirty_area
+
+
+def get_outline_rects(rect, width):
+    """Returns the four rects covered by an outline of rect width thick."""
+    return [pygame.Rect(rect.left, rect.top, rect.width, width),
+            pygame.Rect(rect.left, rect.bottom - width, rect.width, width),
+            pygame.Rect(rect.left, rect.top + width, width,
+                        rect.height - 2 * width),
+            pygame.Rect(rect.right - width, rect.top + width, width,
+                        rect.height - 2 * width)]
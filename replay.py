@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Records the keys fed to a Simulation and replays them without a window.
+
+A recording holds the campaign's seed, its .ini text and the simulation
+settings, followed by run-length encoded key states, one per frame. Its
+footer holds a digest of the final game state, which a replay checks to
+prove it ran bit for bit the same.
+
+    python replay.py recordings/TQFC_20121224-181500.icr
+    python replay.py recordings/TQFC_20121224-181500.icr --profile 1200:1500
+"""
+import pygame
+import sys
+import os
+import argparse
+import collections
+import cProfile
+import datetime
+import hashlib
+import json
+import pstats
+import struct
+import time
+
+from assets import images
+from gamesettings import get_settings
+from campaign import compile_campaign
+from simulation import Simulation, SIMULATION_CONFIG_KEYS, CAMPAIGN
+from simulation import FRAME_COUNTER, CURRENT_LEVEL_INDEX, CURRENT_SCORE
+from simulation import CURRENT_LIVES, PLAYER_CUBE, BAD_CUBES, SCORE_ZONES
+from simulation import SCORE_EVENT
+
+RECORDING_EXTENSION = '.icr'
+
+MAGIC = b'ICRP'
+# Bumped whenever the same inputs would play out differently
+VERSION = 3
+
+# magic, version, seed, length of the JSON metadata which follows
+HEADER = struct.Struct('<4sHQI')
+# key mask, number of frames it was held for
+RUN = struct.Struct('<HH')
+# number of frames, digest of the final game state
+FOOTER = struct.Struct('<I20s')
+
+MAX_RUN_LENGTH = 0xFFFF
+END_OF_RUNS = 0xFFFF
+
+# Keys read by movement_input and cheats_input, one bit each
+RECORDED_KEYS = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+                 pygame.K_PAGEUP, pygame.K_PAGEDOWN]
+
+# Set for frames where step was given no input at all
+NO_INPUT = 0x8000
+
+
+def encode_keys(pressed_keys):
+    """Packs the recorded keys of pressed_keys into a bit mask."""
+    if pressed_keys is None:
+        return NO_INPUT
+
+    mask = 0
+    for (bit, key) in enumerate(RECORDED_KEYS):
+        if pressed_keys[key]:
+            mask |= 1 << bit
+
+    return mask
+
+
+_decoded_keys = {}
+
+def decode_keys(mask):
+    """Unpacks a bit mask into pressed_keys, or None for NO_INPUT."""
+    if mask & NO_INPUT:
+        return None
+
+    if mask not in _decoded_keys:
+        pressed_keys = collections.defaultdict(bool)
+        for (bit, key) in enumerate(RECORDED_KEYS):
+            pressed_keys[key] = bool(mask & (1 << bit))
+        _decoded_keys[mask] = pressed_keys
+
+    return _decoded_keys[mask]
+
+
+def get_state_digest(game_state):
+    """Hashes everything the player could see of game_state."""
+    digest = hashlib.sha1()
+
+    digest.update(repr((game_state[FRAME_COUNTER],
+                        game_state[CURRENT_LEVEL_INDEX],
+                        game_state[CURRENT_SCORE],
+                        game_state[CURRENT_LIVES],
+                        tuple(game_state[PLAYER_CUBE].rect),
+                        [tuple(zone) for zone in game_state[SCORE_ZONES]]
+                        )).encode())
+
+    bad_cubes = game_state[BAD_CUBES]
+    digest.update(bad_cubes.boxes.tobytes())
+    digest.update(bad_cubes.velocities.tobytes())
+    digest.update(bad_cubes.type_ids.tobytes())
+
+    return digest.digest()
+
+
+class InputRecorder(object):
+    """Writes the keys given to every step of a campaign to a file."""
+    def __init__(self, filename, simulation, campaign_filename,
+                 level_index=0):
+        self._simulation = simulation
+        self._frame_count = 0
+        self._run_mask = None
+        self._run_length = 0
+
+        game_config = simulation.game_config
+        metadata = {'campaign_filename': campaign_filename,
+                    'campaign_text': simulation.game_state[CAMPAIGN].text,
+                    'level_index': level_index,
+                    'game_config': {key: game_config[key]
+                                    for key in SIMULATION_CONFIG_KEYS}}
+        metadata = json.dumps(metadata).encode()
+
+        self._file = open(filename, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, simulation.seed,
+                                     len(metadata)))
+        self._file.write(metadata)
+
+    @property
+    def frame_count(self):
+        return self._frame_count
+
+    def record(self, pressed_keys):
+        """Records the keys about to be given to Simulation.step."""
+        mask = encode_keys(pressed_keys)
+        if mask != self._run_mask or self._run_length == MAX_RUN_LENGTH:
+            self._write_run()
+            self._run_mask = mask
+
+        self._run_length += 1
+        self._frame_count += 1
+
+    def close(self):
+        """Ends the recording with a digest of the simulation's state."""
+        if self._file is None:
+            return
+
+        self._write_run()
+        self._file.write(RUN.pack(END_OF_RUNS, 0))
+        self._file.write(FOOTER.pack(
+            self._frame_count,
+            get_state_digest(self._simulation.game_state)))
+        self._file.close()
+        self._file = None
+
+    def _write_run(self):
+        if self._run_length:
+            self._file.write(RUN.pack(self._run_mask, self._run_length))
+        self._run_length = 0
+
+
+class InputLog(object):
+    """A recording loaded back from disk."""
+    def __init__(self, seed, metadata, runs, frame_count, digest):
+        self.seed = seed
+        self.metadata = metadata
+        self.runs = runs
+        self.frame_count = frame_count
+        self.digest = digest
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as log_file:
+            data = log_file.read()
+
+        (magic, version, seed, metadata_length) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %d recording"
+                             % (filename, VERSION))
+
+        offset = HEADER.size
+        metadata = json.loads(data[offset:offset + metadata_length].decode())
+        offset += metadata_length
+
+        runs = []
+        while True:
+            (mask, length) = RUN.unpack_from(data, offset)
+            offset += RUN.size
+            if mask == END_OF_RUNS:
+                break
+            runs.append((mask, length))
+
+        (frame_count, digest) = FOOTER.unpack_from(data, offset)
+
+        return cls(seed, metadata, runs, frame_count, digest)
+
+    def __iter__(self):
+        """Yields the pressed_keys of every recorded frame."""
+        for (mask, length) in self.runs:
+            pressed_keys = decode_keys(mask)
+            for _ in range(length):
+                yield pressed_keys
+
+    def make_simulation(self):
+        """Builds a Simulation in the state the recording started from."""
+        campaign = compile_campaign(self.metadata['campaign_text'],
+                                    self.metadata['campaign_filename'])
+
+        simulation = Simulation(self.metadata['game_config'], campaign)
+        simulation.start_campaign(campaign, self.metadata['level_index'],
+                                  self.seed)
+        return simulation
+
+
+def replay(filename, until=None, profile_frames=None):
+    """Re-runs a recording as fast as possible.
+
+    Stops after frame until if it is given. profile_frames is a (first,
+    last) range of frames to run under cProfile.
+    """
+    input_log = InputLog.load(filename)
+    simulation = input_log.make_simulation()
+
+    profiler = None
+    deaths = 0
+    frame = 0
+    start_time = time.perf_counter()
+    for pressed_keys in input_log:
+        if until is not None and frame >= until:
+            break
+
+        if profile_frames and frame == profile_frames[0]:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        simulation.step(pressed_keys)
+        frame += 1
+
+        if profiler and frame > profile_frames[1]:
+            profiler.disable()
+
+        for event in simulation.pop_events():
+            if event[0] == SCORE_EVENT:
+                deaths += 1
+    elapsed_time = time.perf_counter() - start_time
+
+    if profiler:
+        profiler.disable()
+
+    is_complete = frame == input_log.frame_count
+    return {'frames': frame,
+            'recorded_frames': input_log.frame_count,
+            'seconds': elapsed_time,
+            'score': simulation.game_state[CURRENT_SCORE],
+            'level_index': simulation.game_state[CURRENT_LEVEL_INDEX],
+            'saved_scores': deaths,
+            'is_exact': (get_state_digest(simulation.game_state) ==
+                         input_log.digest if is_complete else None),
+            'profiler': profiler}
+
+
+def make_recording_filename(folder, campaign):
+    """Names a new recording after the campaign and the current time."""
+    os.makedirs(folder, exist_ok=True)
+
+    short_name = campaign.short_name
+    timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+
+    return os.path.join(folder, short_name + '_' + timestamp +
+                        RECORDING_EXTENSION)
+
+
+def parse_frame_range(text):
+    (first, last) = text.split(':')
+    return (int(first), int(last))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('recording')
+    parser.add_argument('--until', type=int,
+                        help='stop after this many frames')
+    parser.add_argument('--profile', type=parse_frame_range,
+                        metavar='FIRST:LAST',
+                        help='profile the frames from FIRST to LAST')
+    options = parser.parse_args(arguments)
+
+    settings = get_settings()
+    images.load_all(settings)
+
+    result = replay(options.recording, options.until, options.profile)
+
+    print("Replayed %d of %d frames in %.3f s (%.0f steps/s)"
+          % (result['frames'], result['recorded_frames'], result['seconds'],
+             result['frames'] / result['seconds'] if result['seconds'] else 0))
+    print("Level #%d, score %d, %d scores saved"
+          % (result['level_index'] + 1, result['score'],
+             result['saved_scores']))
+
+    if result['is_exact'] is not None:
+        print("Final state " + ("matches" if result['is_exact']
+                                 else "DOES NOT match") + " the recording")
+
+    if result['profiler']:
+        pstats.Stats(result['profiler']).sort_stats('cumulative').print_stats(25)
+
+    if result['is_exact'] is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Publishes the live game state in shared memory for other processes to read.
+
+The game writes the player, every bad cube, the score zones, score, lives
+and level into one fixed-layout block each tick. Tools attach to the block
+by name and copy what they need straight out of it into arrays of their
+own, without sockets or serialization:
+
+    reader = SharedStateReader()
+    state = reader.read()
+    print(state.score, state.player_rect, state.bad_cube_boxes[:5])
+
+A sequence number around every write (a seqlock) tells readers whether
+what they read was being written at the time, in which case they read it
+again. The game never waits on its readers.
+
+    python sharedstate.py --interval 0.5
+
+Layout, all little-endian, with offsets in bytes:
+
+    0   LAYOUT    magic, layout version, bad cube and score zone capacity,
+                  process id of the game
+    24  uint64    sequence, odd while the state is being written
+    32  STATE     tick, score, level index, lives, is_menu, player rect,
+                  number of bad cubes, number of score zones
+    88  float64   bad cube boxes, x, y, width, height (capacity rows)
+        float64   bad cube velocities, x, y (capacity rows)
+        int32     bad cube type ids (capacity rows)
+        int32     score zones, x, y, width, height (zone capacity rows)
+
+Only the first rows of each array, as many as the counts in STATE, are in
+use. The layout version is bumped whenever any of this changes.
+"""
+import argparse
+import collections
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy
+
+DEFAULT_NAME = 'infinicube_state'
+
+MAGIC = b'ICSM'
+# Bumped whenever the layout changes
+LAYOUT_VERSION = 2
+
+# magic, layout version, bad cube capacity, score zone capacity, process id
+# of the game which created the block
+LAYOUT = struct.Struct('<4sIIII')
+SEQUENCE_OFFSET = 24
+# tick, score, level index, lives, is_menu, player x, y, width, height,
+# number of bad cubes, number of score zones
+STATE = struct.Struct('<QqiiB3x4iII4x')
+STATE_OFFSET = 32
+ARRAYS_OFFSET = STATE_OFFSET + STATE.size
+
+DEFAULT_MAX_BAD_CUBES = 4096
+MAX_SCORE_ZONES = 64
+
+# Reads started over before giving up on a writer which keeps getting in
+# the way
+MAX_READ_ATTEMPTS = 1000
+
+# One read of the block. The arrays hold only the rows in use.
+SharedState = collections.namedtuple('SharedState', [
+    'sequence', 'tick', 'score', 'level_index', 'lives', 'is_menu',
+    'player_rect', 'bad_cube_boxes', 'bad_cube_velocities',
+    'bad_cube_type_ids', 'score_zones'])
+
+
+class SharedStateError(ValueError):
+    """A shared memory block isn't laid out the way this version expects."""
+    pass
+
+
+def get_block_size(max_bad_cubes, max_score_zones):
+    return (ARRAYS_OFFSET + max_bad_cubes * (4 * 8 + 2 * 8 + 4) +
+            max_score_zones * 4 * 4)
+
+def map_arrays(buffer, max_bad_cubes, max_score_zones):
+    """Returns the sequence number and the arrays of the block as NumPy
+    views onto buffer."""
+    sequence = numpy.ndarray((1,), numpy.uint64, buffer, SEQUENCE_OFFSET)
+
+    offset = ARRAYS_OFFSET
+    boxes = numpy.ndarray((max_bad_cubes, 4), '<f8', buffer, offset)
+    offset += boxes.nbytes
+    velocities = numpy.ndarray((max_bad_cubes, 2), '<f8', buffer, offset)
+    offset += velocities.nbytes
+    type_ids = numpy.ndarray((max_bad_cubes,), '<i4', buffer, offset)
+    offset += type_ids.nbytes
+    score_zones = numpy.ndarray((max_score_zones, 4), '<i4', buffer, offset)
+
+    return (sequence, boxes, velocities, type_ids, score_zones)
+
+
+class SharedStateWriter(object):
+    """Creates the shared memory block and writes the game state into it.
+
+    A block left behind under the same name by a game which crashed is
+    replaced. Raises FileExistsError if the block belongs to a game still
+    running, or to one this can't tell apart from a running game. Bad
+    cubes past max_bad_cubes are left out.
+    """
+    def __init__(self, name=DEFAULT_NAME, max_bad_cubes=DEFAULT_MAX_BAD_CUBES):
+        size = get_block_size(max_bad_cubes, MAX_SCORE_ZONES)
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True,
+                                                      size=size)
+        except FileExistsError:
+            remove_stale_block(name)
+            self._memory = shared_memory.SharedMemory(name, create=True,
+                                                      size=size)
+
+        self._max_bad_cubes = max_bad_cubes
+        buffer = self._memory.buf
+        LAYOUT.pack_into(buffer, 0, MAGIC, LAYOUT_VERSION, max_bad_cubes,
+                         MAX_SCORE_ZONES, os.getpid())
+        (self._sequence, self._boxes, self._velocities, self._type_ids,
+         self._score_zones) = map_arrays(buffer, max_bad_cubes,
+                                         MAX_SCORE_ZONES)
+        self._tick = 0
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def write(self, score, level_index, lives, is_menu, player_rect,
+              bad_cubes, score_zones):
+        """Publishes one tick of the game.
+
+        bad_cubes is a CubeWorld, score_zones a list of rects.
+        """
+        bad_cube_count = min(len(bad_cubes), self._max_bad_cubes)
+        score_zone_count = min(len(score_zones), MAX_SCORE_ZONES)
+        self._tick += 1
+
+        # Odd until the write is done, so readers know to try again
+        sequence = int(self._sequence[0])
+        self._sequence[0] = sequence + 1
+
+        STATE.pack_into(self._memory.buf, STATE_OFFSET, self._tick, score,
+                        level_index, lives, is_menu, *player_rect,
+                        bad_cube_count, score_zone_count)
+        self._boxes[:bad_cube_count] = bad_cubes.boxes[:bad_cube_count]
+        self._velocities[:bad_cube_count] = bad_cubes.velocities[:bad_cube_count]
+        self._type_ids[:bad_cube_count] = bad_cubes.type_ids[:bad_cube_count]
+        for (index, zone) in enumerate(score_zones[:score_zone_count]):
+            self._score_zones[index] = tuple(zone)
+
+        self._sequence[0] = sequence + 2
+
+    def close(self):
+        """Removes the block, readers still attached keep their copy of it."""
+        if self._memory is not None:
+            # The views must go before the memory they point at
+            del (self._sequence, self._boxes, self._velocities,
+                 self._type_ids, self._score_zones)
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+
+class SharedStateReader(object):
+    """Attaches to the block of a running game and reads it.
+
+    Raises FileNotFoundError if no game is publishing under name, and
+    SharedStateError if the game's layout version isn't this one's.
+    """
+    def __init__(self, name=DEFAULT_NAME):
+        self._memory = attach(name)
+        buffer = self._memory.buf
+        (magic, version, max_bad_cubes, max_score_zones,
+         _) = LAYOUT.unpack_from(buffer, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._memory.close()
+            raise SharedStateError("%s has layout %r version %d, expected "
+                                   "%r version %d" % (name, magic, version,
+                                                      MAGIC, LAYOUT_VERSION))
+
+        (self._sequence, self._boxes, self._velocities, self._type_ids,
+         self._score_zones) = map_arrays(buffer, max_bad_cubes,
+                                         max_score_zones)
+
+        # Reads are copied here, so reading allocates nothing new
+        self._copies = tuple(numpy.empty_like(array) for array in
+                             (self._boxes, self._velocities, self._type_ids,
+                              self._score_zones))
+
+    @property
+    def sequence(self):
+        """Goes up by 2 every tick, a cheap way to tell if there's news."""
+        return int(self._sequence[0])
+
+    def read(self):
+        """Returns a SharedState of the last tick published.
+
+        Its arrays are only good until the next read, which reuses them.
+        Raises TimeoutError if the game was writing every time.
+        """
+        buffer = self._memory.buf
+        (boxes, velocities, type_ids, score_zones) = self._copies
+        for _ in range(MAX_READ_ATTEMPTS):
+            sequence = int(self._sequence[0])
+            if sequence % 2:
+                time.sleep(0)
+                continue
+
+            state = STATE.unpack_from(buffer, STATE_OFFSET)
+            (bad_cube_count, score_zone_count) = state[-2:]
+            # Counts read mid-write may be out of range, checked once the
+            # sequence number says the read is good
+            bad_cube_count = min(bad_cube_count, len(boxes))
+            score_zone_count = min(score_zone_count, len(score_zones))
+            boxes[:bad_cube_count] = self._boxes[:bad_cube_count]
+            velocities[:bad_cube_count] = self._velocities[:bad_cube_count]
+            type_ids[:bad_cube_count] = self._type_ids[:bad_cube_count]
+            score_zones[:score_zone_count] = self._score_zones[:score_zone_count]
+
+            if int(self._sequence[0]) == sequence:
+                return SharedState(sequence, state[0], state[1], state[2],
+                                   state[3], bool(state[4]), state[5:9],
+                                   boxes[:bad_cube_count],
+                                   velocities[:bad_cube_count],
+                                   type_ids[:bad_cube_count],
+                                   score_zones[:score_zone_count])
+
+        raise TimeoutError("The game was writing every time")
+
+    def close(self):
+        if self._memory is not None:
+            del (self._sequence, self._boxes, self._velocities,
+                 self._type_ids, self._score_zones)
+            self._memory.close()
+            self._memory = None
+
+
+def remove_stale_block(name):
+    """Removes the block name if the game which created it is gone.
+
+    Raises FileExistsError if it isn't provably stale.
+    """
+    memory = attach(name)
+    try:
+        (magic, version, _, _, pid) = LAYOUT.unpack_from(memory.buf, 0)
+    except struct.error:
+        (magic, version) = (None, None)
+
+    if magic != MAGIC or version != LAYOUT_VERSION:
+        memory.close()
+        raise FileExistsError("%s is in use by something else" % name)
+    if is_process_alive(pid):
+        memory.close()
+        raise FileExistsError("%s is in use by process %d" % (name, pid))
+
+    memory.close()
+    if sys.version_info < (3, 13):
+        # unlink stops the tracking attach already stopped
+        resource_tracker.register(memory._name, 'shared_memory')
+    memory.unlink()
+
+def is_process_alive(pid):
+    """Whether process pid is running.
+
+    Always True on Windows, where a block goes away along with the last
+    process which had it open, so one found there is never stale.
+    """
+    if os.name == 'nt':
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def attach(name):
+    """Opens the block name without taking charge of removing it.
+
+    Before Python 3.13 the resource tracker removes every block a process
+    opened when it exits, the game's included, unless told otherwise.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    memory = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--name', default=DEFAULT_NAME,
+                        help='name of the block (default: %(default)s)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='seconds between reads (default: %(default)s)')
+    options = parser.parse_args(arguments)
+
+    reader = SharedStateReader(options.name)
+    try:
+        while True:
+            state = reader.read()
+            print("tick %d  level #%d  score %d  lives %d  player %s  "
+                  "%d bad cubes  %d score zones"
+                  % (state.tick, state.level_index + 1, state.score,
+                     state.lives, state.player_rect, len(state.bad_cube_boxes),
+                     len(state.score_zones)))
+            time.sleep(options.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,636 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+The game rules, without any rendering, sound or disk writes.
+
+Simulation.step advances game_state by one tick, a fixed 1/TickRate of a
+second however often frames are drawn. It only needs pygame.Rect and the
+key constants, so it runs without a display.
+"""
+import pygame
+import logging
+
+from thecubes import PlayerCube, HoriLeftCube, HoriRightCube, VertiTopCube
+from thecubes import VertiBotCube, DiaCube, RockCube, Arena
+from cubeworld import CubeWorld, CubePool
+from collision import find_hit_cube
+from spatialgrid import UniformGrid
+from spawnscheduler import SpawnScheduler
+from randomstreams import RandomStreams
+from profiler import NullProfiler, SCORE_ZONES_PHASE, SPAWN_PHASE
+from profiler import COLLIDE_PHASE, MOVE_PHASE
+
+
+# Ordered by the type_id of each cube class
+CUBE_CLASSES = [HoriLeftCube, HoriRightCube, VertiTopCube, VertiBotCube,
+                DiaCube, RockCube]
+
+# game_state dictionary keys
+FRAME_COUNTER = 'frame_counter'
+CURRENT_LIVES = 'current_lives'
+MAX_LIVES = 'max_lives'
+CURRENT_SCORE = 'current_score'
+CURRENT_LEVEL_INDEX = 'current_level_index'
+SPEED_MODIFIER = 'speed_modifier'
+MAX_SPEED_MODIFIER = 'max_speed_modifier'
+
+LEVEL_NAME = 'level_name'
+
+IS_NEW_ROUND = 'is_new_round'
+HAS_DIED = 'has_died'
+IS_FINISHED = 'is_finished'
+
+BASE_BAD_CUBE_SPEED = 'base_bad_cube_speed'
+SECONDS_PER_LEVEL = 'seconds_per_level'
+
+BAD_CUBE_SPAWN_RATE = 'bad_cube_spawn_rate'    
+
+BAD_CUBE_SCHEDULER = 'bad_cube_scheduler'
+
+IS_MENU = 'is_menu'
+IS_CHEAT_KEY_HELD = 'is_cheat_key_held'
+RANDOM_STREAMS = 'random_streams'
+CAMPAIGN = 'campaign'
+
+SCORE_ZONES = 'score_zones'
+SCORE_ZONES_MAX = 'score_zones_max'
+SCORE_ZONE_SPAWN_RECT = 'score_zone_spawn_rect'
+SCORE_ZONE_LENGTH = 'score_zone_length'
+SCORE_ZONE_HEIGHT = 'score_zone_height'
+SCORE_ZONE_BUFFER = 'score_zone_buffer'
+SCORE_ZONE_GRID = 'score_zone_grid'
+
+# TODO: Implement score zone lifetime/refresh rate
+SCORE_ZONE_LIFETIME = 'score_zone_lifetime'
+
+LEVELS = 'levels'
+
+ARENA = 'arena'
+PLAYER_CUBE = 'player_cube'
+PLAYER_CUBE_SPEED = 'player_cube_speed'
+SHOULD_KEEP_ON_SCREEN = 'should_keep_on_screen'
+BAD_CUBES = 'bad_cubes'    
+BAD_CUBE_POOL = 'bad_cube_pool'
+
+
+# game_config dictionary keys
+WIDTH = 'width'
+HEIGHT = 'height'
+FRAME_RATE = 'frame_rate'
+TICK_RATE = 'tick_rate'
+
+CHEATS_ENABLED = 'cheats_enabled'
+SKIP_MENU = 'skip_menu'
+SKIP_SOUNDS = 'skip_sounds'
+
+SAFETY_ZONE_X = 'safety_zone_x'
+SAFETY_ZONE_Y = 'safety_zone_y'
+SPAWN_BUFFER = 'spawn_buffer'
+
+# game_config keys which change how the simulation plays out
+SIMULATION_CONFIG_KEYS = [WIDTH, HEIGHT, TICK_RATE, CHEATS_ENABLED,
+                          SAFETY_ZONE_X, SAFETY_ZONE_Y, SPAWN_BUFFER]
+
+# Campaign speeds are in pixels per tick at this tick rate
+REFERENCE_TICK_RATE = 60
+
+# Spawn points tried for a new bad cube before giving up on it this frame
+MAX_SPAWN_ATTEMPTS = 10
+
+# Simulation events, as tuples starting with one of these
+SOUND_EVENT = 'sound'  # (SOUND_EVENT, sound_name, repeat)
+SCORE_EVENT = 'score'  # (SCORE_EVENT, score_snapshot)
+CAMPAIGN_COMPLETE_EVENT = 'campaign_complete'  # (CAMPAIGN_COMPLETE_EVENT,)
+
+
+class Simulation(object):
+    """Owns game_state and advances it one tick at a time.
+    
+    Nothing is drawn, played or written to disk here. Sounds to play, 
+    scores to save and campaign completion are queued as events for 
+    whoever runs the simulation to handle.
+    """
+    def __init__(self, game_config, campaign, is_menu=False,
+                 seed=None, profiler=None):
+        """
+            Every random choice is drawn from RandomStreams seeded with 
+            seed. A random seed is picked when it is None.
+            
+            profiler times the phases of each step, see FrameProfiler.
+        """
+        self._game_config = game_config
+        self._events = []
+        self._profiler = profiler or NullProfiler()
+        
+        self._game_state = {}
+        self._game_state[IS_MENU] = is_menu
+        self._game_state[IS_CHEAT_KEY_HELD] = False
+        self._game_state[RANDOM_STREAMS] = RandomStreams(seed)
+        self._game_state[BAD_CUBE_POOL] = CubePool()
+        self._set_campaign(campaign)
+        self._reset_progress()
+        
+        # Gives a frame drawn before the first step something to draw. The
+        # first step still sets the round up as usual.
+        load_level(self._game_state, game_config)
+        self._game_state[IS_NEW_ROUND] = True
+    
+    @property
+    def game_state(self):
+        return self._game_state
+    
+    @property
+    def game_config(self):
+        return self._game_config
+    
+    @property
+    def seed(self):
+        """Seed of the random streams of the current campaign."""
+        return self._game_state[RANDOM_STREAMS].seed
+    
+    @property
+    def is_finished(self):
+        return self._game_state[IS_FINISHED]
+    
+    @property
+    def profiler(self):
+        return self._profiler
+    
+    def pop_events(self):
+        """Returns and forgets the events queued since the last call."""
+        events = self._events
+        self._events = []
+        return events
+    
+    def start_campaign(self, campaign, level_index=0, seed=None):
+        """
+            Leaves the menu and starts a campaign at level_index.
+            
+            The random streams are reseeded with seed (a random one if it 
+            is None), so a campaign replays the same from its seed alone.
+        """
+        self._game_state[RANDOM_STREAMS] = RandomStreams(seed)
+        self._set_campaign(campaign)
+        self._reset_progress()
+        self._game_state[IS_MENU] = False
+        self._game_state[IS_CHEAT_KEY_HELD] = False
+        self._game_state[CURRENT_LEVEL_INDEX] = level_index
+        load_level(self._game_state, self._game_config)
+    
+    def reload_campaign(self, campaign):
+        """
+            Swaps in campaign, a new version of the current one, from the 
+            next change of level on. The round being played carries on as 
+            it was.
+        """
+        self._set_campaign(campaign)
+    
+    def return_to_menu(self):
+        """Gives up the current campaign and goes back to the menu."""
+        game_state = self._game_state
+        if not self._game_config[CHEATS_ENABLED]:
+            self._events.append((SCORE_EVENT, get_score_snapshot(game_state)))
+        self._events.append((SOUND_EVENT, 'Loss', 1))
+        
+        game_state[IS_MENU] = True
+        self._reset_progress()
+    
+    def step(self, pressed_keys=None):
+        """
+            Advances the game by one tick.
+            
+            pressed_keys is indexed by pygame key constants, like the 
+            result of pygame.key.get_pressed(). None keeps the player 
+            moving as it was.
+        """
+        game_state = self._game_state
+        game_config = self._game_config
+        
+        if game_state[IS_FINISHED]:
+            return
+        
+        # Changes level if needed and resets score, lives, ... if needed
+        if game_state[IS_NEW_ROUND] or game_state[HAS_DIED]:
+            change_level(game_state, game_config, self._events)
+            if game_state[IS_FINISHED]:
+                return
+        
+        profiler = self._profiler
+        if not game_state[IS_MENU]:
+            profiler.begin(SCORE_ZONES_PHASE)
+            if len(game_state[SCORE_ZONES]) < game_state[SCORE_ZONES_MAX]:
+                make_score_zone(game_state, game_config)
+            
+            add_points_to_score(game_state)
+            
+            game_state[FRAME_COUNTER] += 1        
+            
+            if game_state[SPEED_MODIFIER] == game_state[MAX_SPEED_MODIFIER]:
+                game_state[IS_NEW_ROUND] = True
+                
+            profiler.end(SCORE_ZONES_PHASE)
+            
+            # Spawn new bad cubes
+            profiler.begin(SPAWN_PHASE)
+            if game_state[FRAME_COUNTER] % seconds_to_frames(game_config[TICK_RATE], game_state[BAD_CUBE_SPAWN_RATE]) == 0:            
+                spawn_new_bad_cube(game_state, game_config)
+            profiler.end(SPAWN_PHASE)
+            
+            if game_state[FRAME_COUNTER] % seconds_to_frames(game_config[TICK_RATE], game_state[SECONDS_PER_LEVEL]) == 0:
+                game_state[SPEED_MODIFIER] += 1            
+            
+            profiler.begin(COLLIDE_PHASE)
+            game_state[HAS_DIED] = has_player_died(game_state[PLAYER_CUBE], game_state[BAD_CUBES])
+            profiler.end(COLLIDE_PHASE)
+        
+        if pressed_keys is not None:
+            # DEBUG: Fast Round Switch
+            if game_config[CHEATS_ENABLED] and not game_state[IS_MENU]:
+                cheats_input(pressed_keys, game_state)
+            
+            movement_input(pressed_keys,
+                           game_state[PLAYER_CUBE], game_state[PLAYER_CUBE_SPEED],
+                           get_tick_scale(game_config))
+        
+        profiler.begin(MOVE_PHASE)
+        move_cubes(game_state[PLAYER_CUBE], game_state[BAD_CUBES],
+                   game_state[SHOULD_KEEP_ON_SCREEN], game_state[BAD_CUBE_SCHEDULER],
+                   game_state[ARENA])
+        profiler.end(MOVE_PHASE)
+    
+    def _set_campaign(self, campaign):
+        game_state = self._game_state
+        game_state[CAMPAIGN] = campaign
+        game_state[LEVELS] = campaign.levels
+        game_state[MAX_LIVES] = campaign.number_of_lives
+    
+    def _reset_progress(self):
+        game_state = self._game_state
+        game_state[CURRENT_LIVES] = game_state[MAX_LIVES]
+        game_state[CURRENT_SCORE] = 0
+        game_state[CURRENT_LEVEL_INDEX] = -1
+        game_state[IS_NEW_ROUND] = True
+        game_state[HAS_DIED] = False
+        game_state[IS_FINISHED] = False
+
+
+def load_game_config(settings):
+    """Builds the game_config dictionary from the settings.ini values."""
+    game_config = {}
+    
+    game_config[CHEATS_ENABLED] = settings['gameplay']['CheatsEnabled'] == '1'
+    game_config[SKIP_MENU] = settings['gameplay']['SkipMenu'] == '1'
+    game_config[SKIP_SOUNDS] = settings['sound']['SkipSounds'] == '1'
+    
+    game_config[WIDTH] = int(settings['graphics']['Width'])
+    game_config[HEIGHT] = int(settings['graphics']['Height'])
+    
+    game_config[FRAME_RATE] = int(settings['gameplay']['FrameRate'])
+    game_config[TICK_RATE] = int(settings['gameplay']['TickRate'])
+    
+    game_config[SAFETY_ZONE_X] = int(settings['gameplay']['SafetyZoneX'])
+    game_config[SAFETY_ZONE_Y] = int(settings['gameplay']['SafetyZoneY'])
+    game_config[SPAWN_BUFFER] = int(settings['gameplay']['SpawnBuffer'])
+    
+    return game_config
+
+def get_score_snapshot(game_state):
+    """Copies what save_score needs to know about the current game."""
+    return {CURRENT_SCORE: game_state[CURRENT_SCORE],
+            CURRENT_LEVEL_INDEX: game_state[CURRENT_LEVEL_INDEX],
+            LEVEL_NAME: game_state[LEVEL_NAME]}
+
+def make_arena(game_state, game_config):
+    """
+        Returns the Arena of the current campaign: its world size if it has 
+        one, the screen otherwise. The menu is always the size of the screen.
+    """
+    campaign = game_state[CAMPAIGN]
+    if game_state[IS_MENU]:
+        return Arena(game_config[WIDTH], game_config[HEIGHT], game_config[SPAWN_BUFFER])
+    
+    return Arena(campaign.world_width or game_config[WIDTH],
+                 campaign.world_height or game_config[HEIGHT],
+                 game_config[SPAWN_BUFFER])
+
+def seconds_to_frames(frame_rate, number_of_seconds):
+    """Converts number_of_seconds to the equivalent number of frames (or 
+    ticks, given the tick rate). Never less than 1, so periods shorter 
+    than a tick happen every tick."""
+    return max(1, int(number_of_seconds * frame_rate))
+
+def get_tick_scale(game_config):
+    """
+        Returns what campaign speeds, in pixels per 1/60th of a second, are 
+        multiplied by to get pixels per tick.
+        
+        It is exactly 1 at the reference tick rate, so speeds stay whole 
+        numbers and the game plays out the same as it always has.
+    """
+    if game_config[TICK_RATE] == REFERENCE_TICK_RATE:
+        return 1
+    return REFERENCE_TICK_RATE / game_config[TICK_RATE]
+
+def make_score_zone(game_state, game_config):
+    """
+    Adds score zones until there are as many as allowed at the same time.
+    
+    A random spot is tried first. If a zone there would be too close to the 
+    player or to another zone, the free grid cell closest to that spot is 
+    used instead, so placing a zone never takes more than one try.
+    """
+    height = game_state[SCORE_ZONE_HEIGHT]
+    length = game_state[SCORE_ZONE_LENGTH]
+    buffer = game_state[SCORE_ZONE_BUFFER]
+    arena = game_state[ARENA]
+    
+    spawn_region = pygame.Rect(length + buffer, height + buffer,
+                               arena.width - (length + buffer) * 2,
+                               arena.height - (height + buffer) * 2)
+    
+    for _ in range(len(game_state[SCORE_ZONES]), game_state[SCORE_ZONES_MAX] ):
+        new_score_zone = pygame.Rect((length//2, height//2), (length,height))
+        
+        random_x = game_state[RANDOM_STREAMS].score_zones.randint(length + buffer, arena.width - (length + buffer))
+        random_y = game_state[RANDOM_STREAMS].score_zones.randint(height + buffer, arena.height - (height  + buffer))
+        new_score_zone.center = (random_x, random_y)
+        
+        player_rect = game_state[PLAYER_CUBE].rect
+        clearance = new_score_zone.inflate(length, height)
+        if (clearance.colliderect(player_rect) or
+                clearance.collidelist(game_state[SCORE_ZONES]) != -1):
+            game_state[SCORE_ZONE_GRID].rebuild([player_rect] + game_state[SCORE_ZONES])
+            free_center = game_state[SCORE_ZONE_GRID].find_free_cell_near(
+                random_x, random_y, clearance.size, spawn_region)
+            
+            # No room left, try again next frame
+            if free_center is None:
+                return
+            
+            new_score_zone.center = free_center
+        
+        game_state[SCORE_ZONES].append(new_score_zone)
+        
+def add_points_to_score(game_state):
+    zone_index = game_state[PLAYER_CUBE].rect.collidelist(game_state[SCORE_ZONES])
+    score_to_add = 0
+    if zone_index != -1:
+        score_to_add = 1000
+        del game_state[SCORE_ZONES][zone_index]
+    
+    game_state[CURRENT_SCORE] += score_to_add
+        
+def change_level(game_state, game_config, events):
+    """
+        Moves on to the next level or restarts the current one after a death.
+        
+        Sounds to play and scores to save are appended to events.
+    """
+    if not game_state[HAS_DIED] and game_state[CURRENT_LEVEL_INDEX] != -1:
+        events.append((SOUND_EVENT, 'NextRound', 1))
+        
+        game_state[CURRENT_LEVEL_INDEX] += 1
+        game_state[CURRENT_LIVES] += 1 
+        
+    if game_state[CURRENT_LEVEL_INDEX] == -1 and not game_state[IS_MENU]:
+        game_state[CURRENT_LEVEL_INDEX] += 1                     
+        
+    if game_state[HAS_DIED]: 
+        events.append((SOUND_EVENT, 'Loss', 1))
+        
+        if game_state[CURRENT_LEVEL_INDEX] == 0 and game_state[CURRENT_LIVES] == game_state[MAX_LIVES]:
+            if not game_config[CHEATS_ENABLED]:
+                events.append((SCORE_EVENT, get_score_snapshot(game_state)))
+            
+            game_state[CURRENT_SCORE] = 0
+            
+        if game_state[CURRENT_LEVEL_INDEX] != 0:
+            game_state[CURRENT_LIVES] -= 1
+            
+        if game_state[CURRENT_LIVES] == 0:
+            if not game_config[CHEATS_ENABLED]:
+                events.append((SCORE_EVENT, get_score_snapshot(game_state)))
+            
+            game_state[CURRENT_LEVEL_INDEX] = 0
+            game_state[CURRENT_SCORE] = 0
+            game_state[CURRENT_LIVES] = game_state[MAX_LIVES]
+    
+    # Player has beaten all levels in a campaign
+    if game_state[CURRENT_LEVEL_INDEX] > len(game_state[LEVELS]) - 1:
+        if not game_config[CHEATS_ENABLED]:
+            events.append((SOUND_EVENT, 'NextRound', 3))
+            events.append((SCORE_EVENT, get_score_snapshot(game_state)))
+        events.append((CAMPAIGN_COMPLETE_EVENT,))
+        game_state[IS_FINISHED] = True
+        return
+    
+    load_level(game_state, game_config)
+
+def load_level(game_state, game_config):
+    """Sets up a fresh round of the level at CURRENT_LEVEL_INDEX."""
+    level = game_state[LEVELS][game_state[CURRENT_LEVEL_INDEX]]
+    game_state[LEVEL_NAME] = level.name
+        
+    game_state[SPEED_MODIFIER] = 0
+    # The last level's cubes go back to the pool for this one
+    if BAD_CUBES in game_state:
+        game_state[BAD_CUBES].clear()
+    arena = make_arena(game_state, game_config)
+    game_state[ARENA] = arena
+    game_state[BAD_CUBES] = CubeWorld(arena, pool=game_state[BAD_CUBE_POOL])
+    game_state[FRAME_COUNTER] = 0
+    game_state[IS_NEW_ROUND] = False
+    game_state[HAS_DIED] = False
+    
+    game_state[PLAYER_CUBE] = PlayerCube(arena)
+    
+    game_state[PLAYER_CUBE_SPEED] = level.good_cube_speed
+    
+    game_state[SCORE_ZONES] = []
+    game_state[SCORE_ZONE_GRID] = UniformGrid(arena.width, arena.height)
+    game_state[SCORE_ZONE_LENGTH] = level.score_zone_length
+    game_state[SCORE_ZONE_HEIGHT] = level.score_zone_height
+    game_state[SCORE_ZONE_BUFFER] = level.score_zone_buffer
+    game_state[SCORE_ZONES_MAX] = level.score_zones_max
+    
+    score_zone_buffer = game_state[SCORE_ZONE_BUFFER]
+    top_left = (score_zone_buffer, score_zone_buffer)
+    width_height = (arena.width - score_zone_buffer * 2, arena.height - score_zone_buffer * 2)
+    game_state[SCORE_ZONE_SPAWN_RECT] = pygame.Rect(top_left, width_height)
+    
+    game_state[SHOULD_KEEP_ON_SCREEN] = level.keep_on_screen
+    
+    game_state[BASE_BAD_CUBE_SPEED] = level.start_speed
+    game_state[MAX_SPEED_MODIFIER] = level.speed_levels_per_round
+    game_state[SECONDS_PER_LEVEL] = level.seconds_per_level
+    game_state[BAD_CUBE_SPAWN_RATE] = level.spawn_rate
+    
+    game_state[BAD_CUBE_SCHEDULER] = SpawnScheduler(level.max_cubes)
+
+def spawn_new_bad_cube(game_state, game_config):
+    """Spawns a bad cube of a random type among those under their maximum."""
+    scheduler = game_state[BAD_CUBE_SCHEDULER]
+    
+    # Do nothing if every cube is maxed out
+    type_id = scheduler.choose(game_state[RANDOM_STREAMS].spawn)
+    if type_id is None:
+        return
+    
+    new_speed = ((game_state[BASE_BAD_CUBE_SPEED] + game_state[SPEED_MODIFIER]) *
+                 get_tick_scale(game_config))
+    cubes_rng = game_state[RANDOM_STREAMS].cubes
+    
+    safety_zone = game_state[PLAYER_CUBE].rect.inflate(game_config[SAFETY_ZONE_X],
+                                                       game_config[SAFETY_ZONE_Y])
+    
+    bad_cube = game_state[BAD_CUBE_POOL].acquire(CUBE_CLASSES[type_id],
+                                                 new_speed, game_state[ARENA],
+                                                 cubes_rng)
+    
+    # Gives up after a few spawn points inside the safety zone so 
+    # a crowded frame can't spin forever
+    for attempt in range(0, MAX_SPAWN_ATTEMPTS):
+        if attempt:
+            bad_cube.respawn(new_speed, game_state[ARENA], cubes_rng)
+        
+        if not safety_zone.colliderect(bad_cube.rect):
+            game_state[BAD_CUBES].append(bad_cube)
+            scheduler.add(type_id)
+            return
+    
+    game_state[BAD_CUBE_POOL].release(bad_cube)
+
+
+def has_player_died(player_cube, bad_cubes):
+    """
+    Determines whether the player cube has collided with any of the bad 
+    cubes.
+    """
+    hit_cube = find_hit_cube(player_cube.rect, bad_cubes)
+    
+    if hit_cube is not None:
+        logging.debug("Player hit by %s at %s", type(hit_cube).__name__,
+                      hit_cube.rect)
+        return True
+    
+    return False
+
+def cheats_input(pressed_keys, game_state):
+    """Changes levels when certain keys are pressed, once per press."""
+    was_held = game_state[IS_CHEAT_KEY_HELD]
+    game_state[IS_CHEAT_KEY_HELD] = (pressed_keys[pygame.K_PAGEUP] or
+                                     pressed_keys[pygame.K_PAGEDOWN])
+    if was_held:
+        return
+    
+    is_cheating = False
+    if pressed_keys[pygame.K_PAGEUP]:
+        is_cheating = True
+        game_state[CURRENT_LEVEL_INDEX] += 1 
+    
+    elif pressed_keys[pygame.K_PAGEDOWN]:
+        game_state[CURRENT_LEVEL_INDEX] -= 1
+        is_cheating = True
+    
+    if is_cheating:
+        game_state[IS_NEW_ROUND] = True
+        game_state[HAS_DIED] = True
+        game_state[CURRENT_LIVES] = 9999
+        game_state[CURRENT_SCORE] = 0
+         
+
+def movement_input(pressed_keys, player_cube, player_cube_speed, tick_scale=1):
+    """
+        Converts user input on keyboard into movement of player_cube on 
+        screen.
+        
+        player_cube_speed is in pixels per 1/60th of a second, tick_scale 
+        turns it into pixels per tick (see get_tick_scale).
+    """
+    
+    def set_x_and_y_speeds(player_cube, player_cube_speed):
+        """
+            Sets x and y speeds of player_cube depending on which keys are 
+            pressed.
+        """
+        # Controls movement
+        if pressed_keys[pygame.K_LEFT]:
+            player_cube.speed_x = -player_cube_speed
+            
+        elif pressed_keys[pygame.K_RIGHT]:
+            player_cube.speed_x = player_cube_speed
+        
+        else:
+            player_cube.speed_x = 0
+            
+        if pressed_keys[pygame.K_DOWN]:
+            player_cube.speed_y = player_cube_speed
+        
+        elif pressed_keys[pygame.K_UP]:
+            player_cube.speed_y = -player_cube_speed
+        else:
+            player_cube.speed_y = 0
+    
+    def normalize_diagonal_movement(player_cube):
+        """
+            Alters x and y speeds of player_cube to normalize (equal in speed 
+            to non-diagonal movement) diagonal movement.
+        """
+        # Keeps absolute speed constant-ish diagonal vs. straight
+        # TODO: Should be using Pythagor (sp?) theorem. (Only works well for
+        # multiples of 4 now
+        if player_cube.speed_x and player_cube.speed_y:
+            x_speed = player_cube.speed_x
+            y_speed = player_cube.speed_y
+            
+            if player_cube.speed_x > 0:
+                player_cube.speed_x = x_speed // 2 + x_speed // 4
+            else:
+                player_cube.speed_x = x_speed // 2 - ((-x_speed) // 4)
+            
+            if player_cube.speed_y > 0:
+                player_cube.speed_y = y_speed // 2 + y_speed // 4
+            else:
+                player_cube.speed_y = y_speed // 2 - ((-y_speed) // 4)
+    
+    set_x_and_y_speeds(player_cube, player_cube_speed)
+    normalize_diagonal_movement(player_cube) 
+    
+    # Scaled after normalizing so diagonals are as fast at any tick rate
+    if tick_scale != 1:
+        player_cube.speed_x *= tick_scale
+        player_cube.speed_y *= tick_scale
+
+
+def move_cubes(player_cube, bad_cubes, should_keep_on_screen, bad_cube_scheduler,
+               arena):
+    """
+        Move player_cube and all cubes in bad_cubes and keep them in arena.
+        
+        Unless should_keep_on_screen is False, in which case, delete the bad 
+        cubes which move off screen and take them off bad_cube_scheduler's 
+        counts.
+    """
+    
+    player_cube.move()
+    player_cube.keep_on_screen(arena)
+    
+    bad_cubes.move()
+    
+    if should_keep_on_screen:
+        bad_cubes.keep_on_screen()
+    else:
+        removed_type_ids = bad_cubes.cull(bad_cubes.get_off_screen_mask())
+        for type_id in removed_type_ids.tolist():
+            bad_cube_scheduler.remove(type_id)
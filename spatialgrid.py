@@ -0,0 +1,129 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy
+
+DEFAULT_CELL_SIZE = 40
+
+
+class UniformGrid(object):
+    """Buckets boxes into the cells of a uniform grid over the playfield.
+
+    Boxes reaching past the playfield are put in the nearest edge cells.
+    The grid only changes when rebuild is called with the current boxes.
+    """
+    def __init__(self, width, height, cell_size=DEFAULT_CELL_SIZE):
+        self._cell_size = cell_size
+        self._columns = max(1, -(-width // cell_size))
+        self._rows = max(1, -(-height // cell_size))
+
+        self._cell_counts = numpy.zeros(self._columns * self._rows,
+                                        dtype=numpy.intp)
+        self._cell_starts = numpy.zeros(self._columns * self._rows + 1,
+                                        dtype=numpy.intp)
+        self._entries = numpy.zeros(0, dtype=numpy.intp)
+
+        cells = numpy.arange(self._columns * self._rows)
+        self._cell_centers_x = (cells % self._columns) * cell_size + cell_size / 2
+        self._cell_centers_y = (cells // self._columns) * cell_size + cell_size / 2
+
+    @property
+    def cell_size(self):
+        return self._cell_size
+
+    @property
+    def cell_counts(self):
+        """Number of boxes touching each cell, in row-major order."""
+        return self._cell_counts
+
+    def rebuild(self, boxes):
+        """Re-buckets every box. boxes is an (n, 4) x, y, w, h array."""
+        boxes = numpy.asarray(boxes, dtype=float).reshape(-1, 4)
+
+        (first_column, last_column) = self._get_cell_span(
+            boxes[:, 0], boxes[:, 2], self._columns)
+        (first_row, last_row) = self._get_cell_span(
+            boxes[:, 1], boxes[:, 3], self._rows)
+
+        column_span = last_column - first_column
+        row_span = last_row - first_row
+        box_indices = numpy.arange(len(boxes))
+
+        cells = []
+        owners = []
+        for dy in range(int(row_span.max(initial=0)) + 1):
+            for dx in range(int(column_span.max(initial=0)) + 1):
+                covered = (column_span >= dx) & (row_span >= dy)
+                cells.append((first_row[covered] + dy) * self._columns +
+                              first_column[covered] + dx)
+                owners.append(box_indices[covered])
+
+        cells = numpy.concatenate(cells)
+        owners = numpy.concatenate(owners)
+        order = numpy.argsort(cells, kind='stable')
+
+        self._entries = owners[order]
+        self._cell_counts = numpy.bincount(cells,
+                                           minlength=len(self._cell_counts))
+        self._cell_starts[1:] = numpy.cumsum(self._cell_counts)
+
+    def find_free_cell_near(self, x, y, size, region):
+        """Returns the center of the free cell closest to (x, y), or None.
+
+        A cell is free when no box touches any cell under a size[0] by
+        size[1] rect centered on it. Only cells centered inside the region
+        rect are considered.
+        """
+        (half_width, half_height) = (size[0] / 2, size[1] / 2)
+        centers_x = self._cell_centers_x
+        centers_y = self._cell_centers_y
+
+        (first_column, last_column) = self._get_cell_span(
+            centers_x - half_width, size[0], self._columns)
+        (first_row, last_row) = self._get_cell_span(
+            centers_y - half_height, size[1], self._rows)
+
+        # Summed-area table of the cell counts: any rectangle of cells is
+        # summed with four lookups.
+        table = numpy.zeros((self._rows + 1, self._columns + 1),
+                            dtype=numpy.intp)
+        table[1:, 1:] = self._cell_counts.reshape(
+            self._rows, self._columns).cumsum(0).cumsum(1)
+        touching = (table[last_row + 1, last_column + 1] -
+                    table[first_row, last_column + 1] -
+                    table[last_row + 1, first_column] +
+                    table[first_row, first_column])
+
+        is_free = ((touching == 0) &
+                   (centers_x >= region.left) & (centers_x <= region.right) &
+                   (centers_y >= region.top) & (centers_y <= region.bottom))
+
+        free_cells = numpy.flatnonzero(is_free)
+        if not len(free_cells):
+            return None
+
+        distances = ((centers_x[free_cells] - x) ** 2 +
+                     (centers_y[free_cells] - y) ** 2)
+        nearest = free_cells[distances.argmin()]
+
+        return (int(centers_x[nearest]), int(centers_y[nearest]))
+
+    def _get_cell_span(self, start, length, cell_count):
+        """Returns the first and last cells covered by arrays of spans."""
+        first = numpy.floor_divide(start, self._cell_size)
+        last = numpy.floor_divide(numpy.ceil(numpy.add(start, length)) - 1,
+                                  self._cell_size)
+        first = numpy.clip(first, 0, cell_count - 1).astype(numpy.intp)
+        last = numpy.clip(last, 0, cell_count - 1).astype(numpy.intp)
+
+        return (first, last)
@@ -0,0 +1,71 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class SpawnScheduler(object):
+    """Counts the bad cubes of each type and picks which type spawns next.
+
+    The types still under their maximum are kept in a list, updated as
+    cubes are added and removed, so picking one is a single random draw
+    however few types have room left.
+    """
+    def __init__(self, maximums):
+        """maximums holds the maximum of each type, ordered by type_id."""
+        self._maximums = list(maximums)
+        self._counts = [0] * len(self._maximums)
+
+        self._open_type_ids = []
+        # Index of each open type in _open_type_ids
+        self._open_indexes = {}
+        for (type_id, maximum) in enumerate(self._maximums):
+            if maximum > 0:
+                self._open(type_id)
+
+    @property
+    def is_full(self):
+        """Whether every type is at its maximum."""
+        return not self._open_type_ids
+
+    def get_count(self, type_id):
+        return self._counts[type_id]
+
+    def choose(self, rng):
+        """Returns a random type_id still under its maximum, or None."""
+        if not self._open_type_ids:
+            return None
+        return self._open_type_ids[rng.randrange(len(self._open_type_ids))]
+
+    def add(self, type_id):
+        """Counts a new cube of type_id."""
+        self._counts[type_id] += 1
+        if self._counts[type_id] == self._maximums[type_id]:
+            self._close(type_id)
+
+    def remove(self, type_id):
+        """Stops counting a cube of type_id which has gone."""
+        if self._counts[type_id] == self._maximums[type_id]:
+            self._open(type_id)
+        self._counts[type_id] -= 1
+
+    def _open(self, type_id):
+        self._open_indexes[type_id] = len(self._open_type_ids)
+        self._open_type_ids.append(type_id)
+
+    def _close(self, type_id):
+        # The last open type takes the closed one's place
+        index = self._open_indexes.pop(type_id)
+        last_type_id = self._open_type_ids.pop()
+        if last_type_id != type_id:
+            self._open_type_ids[index] = last_type_id
+            self._open_indexes[last_type_id] = index
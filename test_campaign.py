@@ -0,0 +1,131 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks CampaignCatalog picks up campaigns added, edited, broken and removed
+while the game runs.
+
+    python -m pytest test_campaign.py
+"""
+import os
+
+import pytest
+
+from campaign import CAMPAIGN_FOLDER, CampaignCatalog, CampaignError
+
+SOURCE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             CAMPAIGN_FOLDER)
+
+
+@pytest.fixture
+def campaign_text():
+    with open(SOURCE_FOLDER + 'tqfq.ini') as campaign_file:
+        return campaign_file.read()
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    """An empty campaigns folder, in a working directory of its own."""
+    monkeypatch.chdir(tmp_path)
+    os.mkdir(CAMPAIGN_FOLDER)
+    return tmp_path / CAMPAIGN_FOLDER
+
+
+def write_campaign(path, text, seconds):
+    """Writes text to path, dated seconds so every write is a change."""
+    path.write_bytes(text if isinstance(text, bytes) else text.encode())
+    os.utime(path, (seconds, seconds))
+
+
+def rename(text, name):
+    return text.replace('CampaignName = ', 'CampaignName = %s ' % name, 1)
+
+
+def test_refresh_without_changes_keeps_the_campaigns(folder, campaign_text):
+    write_campaign(folder / 'a.ini', rename(campaign_text, 'A'), 1)
+    write_campaign(folder / 'b.ini', rename(campaign_text, 'B'), 1)
+    (folder / 'notes.txt').write_text('not a campaign')
+    catalog = CampaignCatalog()
+
+    catalog.refresh()
+    campaigns = catalog.get_all()
+    assert [campaign.filename for campaign in campaigns] == ['a.ini', 'b.ini']
+    assert catalog.version == 1
+
+    catalog.refresh()
+    assert catalog.version == 1
+    assert catalog.get('a.ini') is campaigns[0]
+
+
+def test_edits_are_picked_up(folder, campaign_text):
+    write_campaign(folder / 'a.ini', rename(campaign_text, 'Old'), 1)
+    catalog = CampaignCatalog()
+    catalog.refresh()
+    assert catalog.get('a.ini').name.startswith('Old ')
+
+    write_campaign(folder / 'a.ini', rename(campaign_text, 'New'), 2)
+    assert catalog.get('a.ini').name.startswith('New ')
+    assert catalog.version == 2
+
+
+def test_broken_campaigns_are_left_out_until_fixed(folder, campaign_text):
+    write_campaign(folder / 'a.ini', campaign_text, 1)
+    write_campaign(folder / 'b.ini', campaign_text, 1)
+    catalog = CampaignCatalog()
+    catalog.refresh()
+
+    write_campaign(folder / 'a.ini', '[DEFAULT]\nNumberOfLives = 3\n', 2)
+    write_campaign(folder / 'b.ini', b'\xff\xfe\x00binary', 2)
+    catalog.refresh()
+    assert catalog.get_all() == []
+    assert catalog.version == 2
+    with pytest.raises(CampaignError, match='has no levels'):
+        catalog.get('a.ini')
+    with pytest.raises(CampaignError, match="can't be read"):
+        catalog.get('b.ini')
+
+    # Still broken, so nothing has changed
+    catalog.refresh()
+    assert catalog.version == 2
+
+    write_campaign(folder / 'a.ini', campaign_text, 3)
+    catalog.refresh()
+    assert [campaign.filename for campaign in catalog.get_all()] == ['a.ini']
+    assert catalog.version == 3
+
+
+def test_removed_campaigns_are_dropped(folder, campaign_text):
+    write_campaign(folder / 'a.ini', campaign_text, 1)
+    write_campaign(folder / 'b.ini', campaign_text, 1)
+    catalog = CampaignCatalog()
+    catalog.refresh()
+
+    os.remove(folder / 'a.ini')
+    catalog.refresh()
+    assert [campaign.filename for campaign in catalog.get_all()] == ['b.ini']
+    assert catalog.version == 2
+    with pytest.raises(FileNotFoundError):
+        catalog.get('a.ini')
+
+
+def test_cached_campaigns_match_compiled_ones(folder, campaign_text,
+                                              tmp_path):
+    write_campaign(folder / 'a.ini', campaign_text, 1)
+    cache_folder = str(tmp_path / 'cache')
+
+    compiled = CampaignCatalog(cache_folder).get('a.ini')
+    assert os.listdir(cache_folder) == ['a.ini.pickle']
+    assert CampaignCatalog(cache_folder).get('a.ini') == compiled
+
+    write_campaign(folder / 'a.ini', rename(campaign_text, 'New'), 2)
+    assert CampaignCatalog(cache_folder).get('a.ini').name.startswith('New ')
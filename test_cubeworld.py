@@ -0,0 +1,111 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks CubeWorld wraps and culls its cubes like the Cube objects did.
+
+    python -m pytest test_cubeworld.py
+"""
+import os
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy
+import pygame
+import pytest
+
+from assets import images
+from cubeworld import CubeWorld, CubePool
+from gamesettings import get_settings
+from thecubes import Arena, HoriLeftCube, VertiTopCube, DiaCube, RockCube
+
+ARENA = Arena(200, 100, 10)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def cube_images():
+    """Loads the cube images from the repository's root."""
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    images.load_all(get_settings())
+
+def make_cube(cube_class, x, y):
+    cube = cube_class(2, ARENA, random.Random(1))
+    cube.rect = pygame.Rect((x, y), cube.rect.size)
+    return cube
+
+def make_world(positions, pool=None):
+    """A world with a HoriLeftCube at each (x, y) of positions."""
+    world = CubeWorld(ARENA, capacity=2, pool=pool)
+    for (x, y) in positions:
+        world.append(make_cube(HoriLeftCube, x, y))
+    return world
+
+
+def test_keep_on_screen_wraps_each_edge():
+    world = make_world([(50, 50), (-20, 50), (205, 50), (50, -20),
+                        (50, 105)])
+    world.keep_on_screen()
+
+    assert [cube.rect.topleft for cube in world] == [
+        (50, 50), (190, 50), (-5, 50), (50, 90), (50, -5)]
+
+def test_keep_on_screen_wraps_one_edge_at_a_time():
+    world = make_world([(-20, -20)])
+    world.keep_on_screen()
+    assert world[0].rect.topleft == (190, -20)
+
+    world.keep_on_screen()
+    assert world[0].rect.topleft == (190, 90)
+
+def test_keep_on_screen_matches_cube():
+    positions = [(-20, -20), (205, 105), (-11, 50), (50, 101), (0, 0)]
+    world = make_world(positions)
+    world.keep_on_screen()
+
+    for ((x, y), world_cube) in zip(positions, world):
+        cube = make_cube(HoriLeftCube, x, y)
+        cube.keep_on_screen(ARENA)
+        assert world_cube.rect == cube.rect
+
+def test_cull_keeps_the_others_in_order():
+    pool = CubePool()
+    world = CubeWorld(ARENA, capacity=2, pool=pool)
+    cubes = [make_cube(HoriLeftCube, 10, 10), make_cube(VertiTopCube, 20, 20),
+             make_cube(DiaCube, 30, 30), make_cube(RockCube, 40, 40)]
+    for cube in cubes:
+        world.append(cube)
+
+    removed = world.cull(numpy.array([False, True, True, False]))
+
+    assert removed.tolist() == [VertiTopCube.type_id, DiaCube.type_id]
+    assert len(world) == 2
+    assert list(world) == [cubes[0], cubes[3]]
+    assert world.boxes[:, :2].tolist() == [[10, 10], [40, 40]]
+    assert world.type_ids.tolist() == [HoriLeftCube.type_id,
+                                       RockCube.type_id]
+    assert len(pool) == 2
+
+    # Kept cubes are views onto their new rows, culled ones are detached
+    cubes[3].rect = cubes[3].rect.move(5, 0)
+    assert world.boxes[1, 0] == 45
+    assert cubes[1].rect.topleft == (20, 20)
+
+def test_cull_of_nothing_changes_nothing():
+    world = make_world([(10, 10), (20, 20)])
+    assert not len(world.cull(numpy.array([False, False])))
+    assert len(world) == 2
+
+def test_off_screen_mask_uses_the_spawn_buffer():
+    world = make_world([(-10, 50), (-11, 50), (50, 50)])
+    assert world.get_off_screen_mask().tolist() == [False, True, False]
@@ -0,0 +1,88 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks HighScoreStore imports the old .txt high score files once.
+
+    python -m pytest test_highscores.py
+"""
+import csv
+
+from highscores import HighScoreStore
+
+
+def write_legacy_file(path, campaign_name, scores):
+    """Writes path the way the old save_score did."""
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile, delimiter=' ', quotechar='|',
+                            quoting=csv.QUOTE_MINIMAL)
+        writer.writerow([campaign_name])
+        for (score, level_index, level_name) in scores:
+            writer.writerow([str(score),
+                             "Level #%d - %s" % (level_index + 1, level_name)])
+
+
+def test_legacy_files_are_imported(tmp_path):
+    write_legacy_file(tmp_path / 'TQFC_highscores.txt',
+                      'The Quest For Cubosity',
+                      [(2000, 0, 'Too Many Cubes'), (5000, 1, '2 Fast')])
+    write_legacy_file(tmp_path / 'IT_highscores.txt', 'Insanity Trials',
+                      [(1000, 2, 'Rocks')])
+    (tmp_path / 'notes.txt').write_text('not a high score file')
+
+    store = HighScoreStore(str(tmp_path / 'highscores.sqlite3'))
+    assert store.import_legacy_files(str(tmp_path)) == 3
+
+    assert sorted(store.get_campaigns()) == [('IT', 'Insanity Trials'),
+                                             ('TQFC', 'The Quest For Cubosity')]
+    assert [row[:3] for row in store.get_top('TQFC')] == [
+        (5000, 1, '2 Fast'), (2000, 0, 'Too Many Cubes')]
+    store.close()
+
+
+def test_legacy_files_are_imported_once(tmp_path):
+    legacy_path = tmp_path / 'TQFC_highscores.txt'
+    write_legacy_file(legacy_path, 'The Quest For Cubosity',
+                      [(2000, 0, 'Too Many Cubes')])
+    legacy_text = legacy_path.read_text()
+    filename = str(tmp_path / 'highscores.sqlite3')
+
+    store = HighScoreStore(filename)
+    assert store.import_legacy_files(str(tmp_path)) == 1
+    assert store.import_legacy_files(str(tmp_path)) == 0
+    store.close()
+
+    # Also across runs, and the file itself is left alone
+    store = HighScoreStore(filename)
+    assert store.import_legacy_files(str(tmp_path)) == 0
+    assert len(store.get_top('TQFC')) == 1
+    assert legacy_path.read_text() == legacy_text
+    store.close()
+
+
+def test_bad_rows_are_skipped(tmp_path):
+    legacy_path = tmp_path / 'TQFC_highscores.txt'
+    write_legacy_file(legacy_path, 'The Quest For Cubosity',
+                      [(2000, 0, 'Too Many Cubes')])
+    with open(legacy_path, 'a') as legacy_file:
+        legacy_file.write('lots |Level #1 - Cubes|\n1000 |Somewhere|\n')
+
+    store = HighScoreStore(str(tmp_path / 'highscores.sqlite3'))
+    assert store.import_legacy_files(str(tmp_path)) == 1
+    store.close()
+
+
+def test_missing_folder_imports_nothing(tmp_path):
+    store = HighScoreStore(str(tmp_path / 'highscores.sqlite3'))
+    assert store.import_legacy_files(str(tmp_path / 'missing')) == 0
+    store.close()
@@ -0,0 +1,67 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks TextCache renders each string once and drops the least recently used.
+
+    python -m pytest test_hud.py
+"""
+import pygame
+import pytest
+
+from hud import TextCache, HudDisplay
+from simulation import CURRENT_SCORE, CURRENT_LEVEL_INDEX, LEVEL_NAME
+from simulation import CURRENT_LIVES
+
+WHITE = (255, 255, 255)
+
+
+@pytest.fixture(scope='module')
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 20)
+
+
+def test_render_reuses_the_surface(font):
+    text_cache = TextCache(font, WHITE)
+    surface = text_cache.render("Lives: 3")
+
+    assert text_cache.render("Lives: 3") is surface
+    assert (text_cache.hits, text_cache.misses) == (1, 1)
+
+def test_least_recently_used_goes_first(font):
+    text_cache = TextCache(font, WHITE, max_size=2)
+    first = text_cache.render("a")
+    second = text_cache.render("b")
+    text_cache.render("a")
+    text_cache.render("c")
+
+    assert len(text_cache) == 2
+    assert text_cache.render("a") is first
+    assert text_cache.render("b") is not second
+    assert text_cache.misses == 4
+
+def test_hud_only_looks_text_up_when_values_change(font):
+    hud = HudDisplay(font, WHITE, 200, 100)
+    screen = pygame.Surface((200, 100))
+    game_state = {CURRENT_SCORE: 0, CURRENT_LEVEL_INDEX: 0,
+                  LEVEL_NAME: 'Cubes', CURRENT_LIVES: 3}
+
+    hud.draw(screen, game_state)
+    lookups = hud.text_cache.hits + hud.text_cache.misses
+    hud.draw(screen, game_state)
+    assert hud.text_cache.hits + hud.text_cache.misses == lookups
+
+    game_state[CURRENT_SCORE] = 1000
+    hud.draw(screen, game_state)
+    assert hud.text_cache.misses == 4
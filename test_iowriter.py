@@ -0,0 +1,75 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks BackgroundWriter runs jobs in order, finishes them on close, and
+drops rather than waits when asked.
+
+    python -m pytest test_iowriter.py
+"""
+import threading
+
+import pytest
+
+from iowriter import BackgroundWriter
+
+
+def test_jobs_run_in_order_before_close_returns():
+    writer = BackgroundWriter()
+    done = []
+    for i in range(100):
+        assert writer.submit(done.append, i)
+    writer.close()
+
+    assert done == list(range(100))
+
+
+def test_close_twice_and_submit_after_close():
+    writer = BackgroundWriter()
+    writer.close()
+    writer.close()
+
+    with pytest.raises(RuntimeError):
+        writer.submit(print, 'too late')
+
+
+def test_full_queue_drops_when_not_blocking():
+    writer = BackgroundWriter(max_pending=1)
+    started = threading.Event()
+    release = threading.Event()
+    done = []
+
+    def hold():
+        started.set()
+        release.wait()
+
+    writer.submit(hold)
+    started.wait()
+    assert writer.submit(done.append, 'queued', block=False)
+    assert not writer.submit(done.append, 'dropped', block=False)
+    assert writer.dropped == 1
+
+    release.set()
+    writer.close()
+    assert done == ['queued']
+
+
+def test_failing_job_does_not_stop_the_writer(capsys):
+    writer = BackgroundWriter()
+    done = []
+    writer.submit(lambda: 1 / 0)
+    writer.submit(done.append, 'after')
+    writer.close()
+
+    assert done == ['after']
+    assert 'ZeroDivisionError' in capsys.readouterr().err
@@ -0,0 +1,107 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks DirtyRectRenderer pushes what was drawn last frame and this frame.
+
+    python -m pytest test_renderer.py
+"""
+import pygame
+import pytest
+
+from renderer import DirtyRectRenderer, get_outline_rects
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+CUBE = pygame.Surface((10, 10))
+CUBE.fill(WHITE)
+
+
+@pytest.fixture
+def pushes(monkeypatch):
+    """Records what each frame sends to the display, instead of sending it."""
+    pushes = []
+    monkeypatch.setattr(pygame.display, 'flip',
+                        lambda: pushes.append('flip'))
+    monkeypatch.setattr(pygame.display, 'update',
+                        lambda rects: pushes.append(list(rects)))
+    return pushes
+
+def make_renderer(**options):
+    screen = pygame.Surface((100, 100))
+    return (screen, DirtyRectRenderer(screen, BLACK, **options))
+
+def draw_frame(renderer, positions):
+    renderer.begin_frame()
+    for position in positions:
+        renderer.blit(CUBE, position)
+    renderer.end_frame()
+
+
+def test_first_frame_is_flipped(pushes):
+    (_, renderer) = make_renderer()
+    draw_frame(renderer, [(0, 0)])
+
+    assert pushes == ['flip']
+
+def test_last_and_this_frames_rects_are_pushed(pushes):
+    (screen, renderer) = make_renderer()
+    draw_frame(renderer, [(0, 0)])
+    draw_frame(renderer, [(20, 20)])
+    draw_frame(renderer, [(40, 40)])
+
+    assert pushes[1:] == [
+        [pygame.Rect(0, 0, 10, 10), pygame.Rect(20, 20, 10, 10)],
+        [pygame.Rect(20, 20, 10, 10), pygame.Rect(40, 40, 10, 10)]]
+    # What moved away was cleared
+    assert screen.get_at((25, 25)) == BLACK
+    assert screen.get_at((45, 45)) == WHITE
+    assert renderer.partial_updates == 2
+
+def test_nothing_drawn_pushes_nothing(pushes):
+    (_, renderer) = make_renderer()
+    draw_frame(renderer, [])
+    draw_frame(renderer, [])
+
+    assert pushes == ['flip']
+
+def test_too_much_dirt_is_flipped(pushes):
+    (_, renderer) = make_renderer(max_dirty_rects=2)
+    draw_frame(renderer, [(0, 0)])
+    draw_frame(renderer, [(20, 20), (40, 40)])
+
+    assert pushes == ['flip', 'flip']
+
+    (_, renderer) = make_renderer(max_dirty_area=0.01)
+    draw_frame(renderer, [(0, 0)])
+    draw_frame(renderer, [(20, 20)])
+    assert renderer.full_updates == 2
+
+def test_invalidate_flips_the_next_frame(pushes):
+    (_, renderer) = make_renderer()
+    draw_frame(renderer, [(0, 0)])
+    renderer.invalidate()
+    draw_frame(renderer, [(0, 0)])
+
+    assert pushes == ['flip', 'flip']
+
+def test_outlines_dirty_only_their_edges(pushes):
+    (_, renderer) = make_renderer()
+    draw_frame(renderer, [])
+    renderer.begin_frame()
+    bounds = renderer.draw_rect(WHITE, pygame.Rect(10, 10, 50, 50), 2)
+    renderer.end_frame()
+
+    assert pushes[-1] == get_outline_rects(bounds, 2)
+    assert sum(rect.width * rect.height for rect in pushes[-1]) == 50 * 50 - 46 * 46
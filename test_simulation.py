@@ -0,0 +1,142 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks the simulation runs without a window and replays bit for bit.
+
+    python -m pytest test_simulation.py
+"""
+import os
+import random
+import re
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import pytest
+
+from assets import images
+from campaign import CampaignError, compile_campaign
+from gamesettings import get_settings
+from replay import InputRecorder, InputLog, decode_keys, replay
+from simulation import Simulation, load_game_config
+from simulation import FRAME_COUNTER, BAD_CUBES
+
+CAMPAIGN_FILENAME = 'tqfq.ini'
+SEED = 12345
+
+
+@pytest.fixture(scope='module')
+def game_config():
+    """Loads the settings and cube images from the repository's root."""
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    settings = get_settings()
+    images.load_all(settings)
+    return load_game_config(settings)
+
+@pytest.fixture(scope='module')
+def campaign_text(game_config):
+    with open(os.path.join('campaigns', CAMPAIGN_FILENAME)) as campaign_file:
+        return campaign_file.read()
+
+def make_simulation(game_config, campaign_text):
+    campaign = compile_campaign(campaign_text, CAMPAIGN_FILENAME)
+    simulation = Simulation(game_config, campaign)
+    simulation.start_campaign(campaign, 0, SEED)
+    return simulation
+
+def make_key_masks(frames):
+    """Random arrow key states, held for a few frames at a time."""
+    generator = random.Random(SEED)
+    masks = []
+    while len(masks) < frames:
+        masks += [generator.randrange(1 << 4)] * generator.randint(1, 20)
+    return masks[:frames]
+
+def record(filename, game_config, campaign_text, frames):
+    simulation = make_simulation(game_config, campaign_text)
+    recorder = InputRecorder(filename, simulation, CAMPAIGN_FILENAME)
+    for mask in make_key_masks(frames):
+        pressed_keys = decode_keys(mask)
+        recorder.record(pressed_keys)
+        simulation.step(pressed_keys)
+    recorder.close()
+
+
+def test_step_runs_headless(game_config, campaign_text):
+    simulation = make_simulation(game_config, campaign_text)
+    for _ in range(60):
+        simulation.step()
+
+    assert pygame.display.get_surface() is None
+    assert simulation.game_state[FRAME_COUNTER] == 60
+    assert len(simulation.game_state[BAD_CUBES]) > 0
+
+def test_step_handles_periods_shorter_than_a_tick(game_config,
+                                                  campaign_text):
+    for key in ['SpawnRate', 'SecondsPerLevel']:
+        campaign_text = re.sub(r'^%s = .*$' % key, '%s = 0.001' % key,
+                               campaign_text, flags=re.MULTILINE)
+    simulation = make_simulation(game_config, campaign_text)
+    for _ in range(10):
+        simulation.step()
+
+    assert len(simulation.game_state[BAD_CUBES]) > 0
+
+def test_replay_matches_recording(game_config, campaign_text, tmp_path):
+    filename = str(tmp_path / 'run.icr')
+    record(filename, game_config, campaign_text, 600)
+
+    result = replay(filename)
+    assert result['frames'] == 600
+    assert result['is_exact'] is True
+
+def test_recordings_are_repeatable(game_config, campaign_text, tmp_path):
+    filenames = [str(tmp_path / ('run%d.icr' % index)) for index in range(2)]
+    for filename in filenames:
+        record(filename, game_config, campaign_text, 600)
+
+    (first, second) = [InputLog.load(filename) for filename in filenames]
+    assert first.digest == second.digest
+    assert first.runs == second.runs
+
+@pytest.mark.parametrize('key, value', [
+    ('NumberOfLives', '0'),
+    ('ScoreZoneLength', '-70'),
+    ('StartSpeed', 'fast'),
+    ('SecondsPerLevel', '0'),
+    ('SpawnRate', '-0.5'),
+    ('KeepOnScreen', '2'),
+])
+def test_compile_rejects_bad_values(campaign_text, key, value):
+    pattern = r'^%s = .*$' % key
+    assert re.search(pattern, campaign_text, re.MULTILINE)
+    text = re.sub(pattern, '%s = %s' % (key, value), campaign_text,
+                  flags=re.MULTILINE)
+
+    with pytest.raises(CampaignError, match=key):
+        compile_campaign(text, CAMPAIGN_FILENAME)
+
+def test_compile_rejects_missing_values(campaign_text):
+    text = re.sub(r'^NumberOfLives = .*$', '', campaign_text,
+                  flags=re.MULTILINE)
+
+    with pytest.raises(CampaignError, match='NumberOfLives is missing'):
+        compile_campaign(text, CAMPAIGN_FILENAME)
+
+def test_compile_rejects_campaigns_without_levels(campaign_text):
+    defaults = campaign_text.split('\n[', 1)[0]
+
+    with pytest.raises(CampaignError, match='has no levels'):
+        compile_campaign(defaults, CAMPAIGN_FILENAME)
@@ -0,0 +1,83 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks UniformGrid finds the free cell nearest to a spot.
+
+    python -m pytest test_spatialgrid.py
+"""
+import pygame
+
+from spatialgrid import UniformGrid
+
+# 10 by 5 cells of 40 pixels, centered at 20, 60, 100, ...
+WIDTH = 400
+HEIGHT = 200
+EVERYWHERE = pygame.Rect(0, 0, WIDTH, HEIGHT)
+CELL = (40, 40)
+
+
+def test_empty_grid_gives_the_cell_under_the_spot():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    grid.rebuild([])
+
+    assert grid.find_free_cell_near(97, 55, CELL, EVERYWHERE) == (100, 60)
+
+def test_taken_cell_gives_the_nearest_free_one():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    box = pygame.Rect(85, 45, 10, 10)
+    grid.rebuild([box])
+
+    center = grid.find_free_cell_near(97, 55, CELL, EVERYWHERE)
+    assert center == (100, 20)
+    assert not pygame.Rect((0, 0), CELL).move(80, 0).colliderect(box)
+
+def test_size_keeps_clear_of_boxes():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    box = pygame.Rect(180, 80, 40, 40)
+    grid.rebuild([box])
+
+    center = grid.find_free_cell_near(200, 100, (120, 120), EVERYWHERE)
+    clearance = pygame.Rect((0, 0), (120, 120))
+    clearance.center = center
+    assert not clearance.colliderect(box)
+    assert center in [(180, 20), (220, 20)]
+
+def test_only_cells_in_the_region_are_used():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    grid.rebuild([])
+    region = pygame.Rect(200, 100, 200, 100)
+
+    assert grid.find_free_cell_near(0, 0, CELL, region) == (220, 100)
+    assert grid.find_free_cell_near(0, 0, CELL, pygame.Rect(0, 0, 5, 5)) is None
+
+def test_full_grid_has_no_free_cell():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    grid.rebuild([EVERYWHERE])
+
+    assert grid.find_free_cell_near(97, 55, CELL, EVERYWHERE) is None
+
+def test_boxes_past_the_edge_take_the_edge_cells():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    grid.rebuild([pygame.Rect(-50, -50, 20, 20)])
+
+    assert grid.cell_counts[0] == 1
+    assert grid.find_free_cell_near(20, 20, CELL, EVERYWHERE) != (20, 20)
+
+def test_rebuild_forgets_the_old_boxes():
+    grid = UniformGrid(WIDTH, HEIGHT)
+    grid.rebuild([EVERYWHERE])
+    grid.rebuild([])
+
+    assert not grid.cell_counts.any()
+    assert grid.find_free_cell_near(97, 55, CELL, EVERYWHERE) == (100, 60)
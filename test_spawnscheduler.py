@@ -0,0 +1,88 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks SpawnScheduler only ever chooses the types under their maximum as
+cubes come and go.
+
+    python -m pytest test_spawnscheduler.py
+"""
+import random
+
+from spawnscheduler import SpawnScheduler
+
+
+class EveryIndexRng(object):
+    """Stands in for random.Random, answering randrange with index."""
+    def __init__(self, index):
+        self.index = index
+        self.stop = None
+
+    def randrange(self, stop):
+        self.stop = stop
+        return self.index
+
+
+def get_choices(scheduler):
+    """Returns every type_id scheduler.choose could return."""
+    rng = EveryIndexRng(0)
+    if scheduler.choose(rng) is None:
+        return set()
+    return {scheduler.choose(EveryIndexRng(index))
+            for index in range(rng.stop)}
+
+
+def test_only_types_with_room_are_chosen():
+    scheduler = SpawnScheduler([1, 2, 0, 1])
+    assert get_choices(scheduler) == {0, 1, 3}
+
+    # Closing the first type moves the last one into its place
+    scheduler.add(0)
+    assert get_choices(scheduler) == {1, 3}
+    scheduler.add(1)
+    assert get_choices(scheduler) == {1, 3}
+    scheduler.add(1)
+    assert get_choices(scheduler) == {3}
+    scheduler.add(3)
+    assert scheduler.is_full
+    assert scheduler.choose(EveryIndexRng(0)) is None
+
+    scheduler.remove(1)
+    assert get_choices(scheduler) == {1}
+    scheduler.remove(0)
+    assert get_choices(scheduler) == {0, 1}
+    assert [scheduler.get_count(type_id) for type_id in range(4)] == [0, 1, 0, 1]
+
+
+def test_matches_counting_every_type():
+    maximums = [3, 1, 0, 5, 2, 4]
+    scheduler = SpawnScheduler(maximums)
+    counts = [0] * len(maximums)
+    rng = random.Random(19)
+
+    for _ in range(2000):
+        type_id = scheduler.choose(rng)
+        cubes = [i for (i, count) in enumerate(counts) for _ in range(count)]
+        if type_id is not None and (not cubes or rng.random() < 0.5):
+            assert counts[type_id] < maximums[type_id]
+            scheduler.add(type_id)
+            counts[type_id] += 1
+        elif cubes:
+            type_id = rng.choice(cubes)
+            scheduler.remove(type_id)
+            counts[type_id] -= 1
+
+        open_type_ids = {i for (i, maximum) in enumerate(maximums)
+                         if counts[i] < maximum}
+        assert get_choices(scheduler) == open_type_ids
+        assert scheduler.is_full == (not open_type_ids)
@@ -0,0 +1,59 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Checks FixedTimestep carries left over time between frames and clamps long
+frames.
+
+    python -m pytest test_timestep.py
+"""
+from timestep import FixedTimestep, MAX_FRAME_SECONDS
+
+
+def test_first_advance_starts_the_clock():
+    timestep = FixedTimestep(4)
+
+    assert timestep.advance(100.0) == 0
+    assert timestep.alpha == 0.0
+
+
+def test_left_over_time_is_carried_into_later_frames():
+    timestep = FixedTimestep(4, max_frame_seconds=1.0)
+    timestep.advance(0.0)
+
+    assert timestep.advance(0.5) == 2
+    assert timestep.alpha == 0.0
+    assert timestep.advance(0.625) == 0
+    assert timestep.alpha == 0.5
+    assert timestep.advance(0.875) == 1
+    assert timestep.alpha == 0.5
+    assert timestep.advance(1.0) == 1
+    assert timestep.alpha == 0.0
+
+
+def test_ticks_follow_the_tick_rate_whatever_the_frame_rate():
+    timestep = FixedTimestep(60)
+    timestep.advance(0.0)
+
+    ticks = sum(timestep.advance(frame / 144.0) for frame in range(1, 1441))
+    assert ticks in (599, 600)
+    assert 0.0 <= timestep.alpha < 1.0
+
+
+def test_long_frames_are_clamped():
+    timestep = FixedTimestep(4)
+    timestep.advance(0.0)
+
+    assert timestep.advance(10.0) == int(MAX_FRAME_SECONDS * 4)
+    assert timestep.advance(10.125) == 0
+    assert timestep.alpha == 0.5
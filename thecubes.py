@@ -11,82 +11,133 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import pygame
-import random
-import configparser
-import os
+import abc
+import collections
+import math
+
+from assets import images
 
 LEFT = 'left'
 RIGHT = 'right'
 TOP = 'top'
 BOTTOM = 'bottom'
     
-settings = configparser.ConfigParser()
-settings.read('config' + os.sep + 'settings.ini')
-
-width = int(settings['graphics']['Width'])
-height = int(settings['graphics']['Height'])
+# The world cubes move around in, and how far past its edges bad cubes may
+# go before they wrap around or are culled
+Arena = collections.namedtuple('Arena', ['width', 'height', 'spawn_buffer'])
 
 
-spawn_buffer = int(settings['gameplay']['SpawnBuffer'])
+class Cube(object):
+    """Represents a graphical Cube.
 
-image_folder = settings['images']['FolderName'] + os.sep
+    A Cube added to a CubeWorld becomes a view onto its row in the world's
+    arrays. Its rect is then a copy, so changes must be assigned back
+    through the rect setter.
+    """
+    type_id = -1
 
-player_filename = image_folder + settings['images']['PlayerCube']
-hori_left_filename = image_folder + settings['images']['HoriLCube']
-hori_right_filename = image_folder + settings['images']['HoriRCube']
+    def __init__(self, image_key, speed_x=0, speed_y=0):
+        """Initializes a Cube with the image settings [images] name under
+        image_key, which images.load_all must have loaded."""
+        self._surface = images.get_by_key(image_key)
+        self._rect = self._surface.get_rect()
+        self._speed_x = speed_x
+        self._speed_y = speed_y
+        # Fractions of a pixel moved but not yet shown by the rect
+        self._fraction_x = 0.0
+        self._fraction_y = 0.0
+        self._world = None
+        self._slot = -1
 
-verti_top_filename = image_folder + settings['images']['VertiTCube']
-verti_bottom_filename = image_folder + settings['images']['VertiBCube']
-rock_filename = image_folder + settings['images']['RockCube']
-dia_filename = image_folder + settings['images']['DiaCube']
+    def attach(self, world, slot):
+        """Makes the cube a view onto row slot of world."""
+        self._world = world
+        self._slot = slot
 
+    def detach(self):
+        """Copies the cube's state back out of its world."""
+        if self._world is not None:
+            self._rect = self._world.get_rect(self._slot)
+            (speed_x, speed_y) = self._world.get_speed(self._slot)
+            self._speed_x = float(speed_x)
+            self._speed_y = float(speed_y)
+            self._world = None
+            self._slot = -1
 
-class Cube(object):
-    """Represents a graphical Cube."""    
-    def __init__(self, filename, speed_x=0, speed_y=0):
-        """Initializes a Cube."""
-        (self._surface, self._rect) = load_image(filename)
-        self._speed_x = speed_x
-        self._speed_y = speed_y
-    
     @property
     def surface(self):
         return self._surface
-    
+
     @property
     def rect(self):
+        if self._world is not None:
+            return self._world.get_rect(self._slot)
         return self._rect
-    
+
     @rect.setter
     def rect(self, new_rect):
-        self._rect = new_rect
+        if self._world is not None:
+            self._world.set_rect(self._slot, new_rect)
+        else:
+            self._rect = new_rect
+
+    def reset(self):
+        """Puts a detached cube back at the origin, standing still."""
+        self._rect = self._surface.get_rect()
+        self._speed_x = 0
+        self._speed_y = 0
+        self._fraction_x = 0.0
+        self._fraction_y = 0.0
 
     def set_speed(self, x_y_speed):
-        self._speed_x = x_y_speed[0]
-        self._speed_y = x_y_speed[1]
+        self.speed_x = x_y_speed[0]
+        self.speed_y = x_y_speed[1]
 
     @property
     def speed_x(self):
+        if self._world is not None:
+            return self._world.get_speed(self._slot)[0]
         return self._speed_x
-    
+
     @speed_x.setter
     def speed_x(self, new_speed_x):
-        self._speed_x = new_speed_x
-    
+        if self._world is not None:
+            self._world.get_speed(self._slot)[0] = new_speed_x
+        else:
+            self._speed_x = new_speed_x
+
     @property
     def speed_y(self):
+        if self._world is not None:
+            return self._world.get_speed(self._slot)[1]
         return self._speed_y
-    
+
     @speed_y.setter
     def speed_y(self, new_speed_y):
-        self._speed_y = new_speed_y
-    
+        if self._world is not None:
+            self._world.get_speed(self._slot)[1] = new_speed_y
+        else:
+            self._speed_y = new_speed_y
+
     def move(self):
-        self._rect = self._rect.move(self._speed_x, self._speed_y)
+        # Whole pixels move the rect, the rest is carried to the next move
+        (self._fraction_x, move_x) = math.modf(self._fraction_x + self.speed_x)
+        (self._fraction_y, move_y) = math.modf(self._fraction_y + self.speed_y)
+        self.rect = self.rect.move(int(move_x), int(move_y))
     
-    def keep_on_screen(self):
-        #Keeps cube on screen
+    def get_draw_position(self, alpha=1.0):
+        """Returns where to draw the cube alpha of the way through the last 
+        move, 1.0 being where it is now."""
+        rect = self.rect
+        if alpha == 1.0:
+            return rect.topleft
+        
+        return (int(rect.x - self.speed_x * (1.0 - alpha)),
+                int(rect.y - self.speed_y * (1.0 - alpha)))
+    
+    def keep_on_screen(self, arena):
+        #Keeps cube in the arena
+        (width, height, spawn_buffer) = arena
         if self.rect.left < -spawn_buffer:
             self.rect = self.rect.move(width + spawn_buffer,0)
         elif self.rect.right > width + spawn_buffer:
@@ -96,7 +147,8 @@ class Cube(object):
         elif self.rect.bottom > height + spawn_buffer:
             self.rect = self.rect.move(0,-height - spawn_buffer)
     
-    def is_off_screen(self):
+    def is_off_screen(self, arena):
+        (width, height, spawn_buffer) = arena
         if self.rect.left < -spawn_buffer:
             return True
         elif self.rect.right > width + spawn_buffer:
@@ -109,116 +161,150 @@ class Cube(object):
         return False
 
 class PlayerCube(Cube):
-    def __init__(self):
-        super().__init__(player_filename)
+    def __init__(self, arena):
+        super().__init__('PlayerCube')
         
         self.rect = self.rect.inflate(-5,-5)
-        #Move cube to middle of screen
-        self.rect.center = (width//2, height//2)
+        #Move cube to middle of the arena
+        self.rect.center = (arena.width//2, arena.height//2)
     
-    def keep_on_screen(self):
-        #Keeps cube on screen
+    def keep_on_screen(self, arena):
+        #Keeps cube in the arena, spawn buffer or not
         if self.rect.left < 0:
-            self.rect = self.rect.move(width,0)
-        elif self.rect.right > width:
-            self.rect = self.rect.move(-width,0)
+            self.rect = self.rect.move(arena.width,0)
+        elif self.rect.right > arena.width:
+            self.rect = self.rect.move(-arena.width,0)
         elif self.rect.top < 0:
-            self.rect = self.rect.move(0,height)
-        elif self.rect.bottom > height:
-            self.rect = self.rect.move(0,-height)
+            self.rect = self.rect.move(0,arena.height)
+        elif self.rect.bottom > arena.height:
+            self.rect = self.rect.move(0,-arena.height)
 
-class HoriLeftCube(Cube):
-    
-    def __init__(self, speed):
-        super().__init__(hori_left_filename)
-        spawn_delta = get_spawn_delta(LEFT)
+class BadCube(Cube, metaclass=abc.ABCMeta):
+    """A cube the player must dodge, which can be reused once culled."""
+    @abc.abstractmethod
+    def respawn(self, speed, arena, rng):
+        """Sends the cube back in from its edge of arena, as if it were new.
+
+        Every random draw comes from rng, a random.Random the caller owns.
+        """
+
+class HoriLeftCube(BadCube):
+    type_id = 0
+
+    def __init__(self, speed, arena, rng):
+        super().__init__('HoriLCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        spawn_delta = get_spawn_delta(LEFT, arena, rng)
         self.speed_x = speed
         
         self.rect.center = (spawn_delta[0], spawn_delta[1])
 
-class HoriRightCube(Cube):
-            
-    def __init__(self, speed):
-        super().__init__(hori_right_filename)
-        spawn_delta = get_spawn_delta(RIGHT)
+class HoriRightCube(BadCube):
+    type_id = 1
+
+    def __init__(self, speed, arena, rng):
+        super().__init__('HoriRCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        spawn_delta = get_spawn_delta(RIGHT, arena, rng)
         self.speed_x = -speed
         
         self.rect.center = (spawn_delta[0], spawn_delta[1])
         
-class VertiTopCube(Cube):
-    
-    def __init__(self, speed):
-        super().__init__(verti_top_filename)
-        spawn_delta = get_spawn_delta(TOP)
+class VertiTopCube(BadCube):
+    type_id = 2
+
+    def __init__(self, speed, arena, rng):
+        super().__init__('VertiTCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        spawn_delta = get_spawn_delta(TOP, arena, rng)
         self.speed_y = speed
         
         self.rect.center = (spawn_delta[0], spawn_delta[1])
 
-class VertiBotCube(Cube):
-    
-    def __init__(self, speed):
-        super().__init__(verti_bottom_filename)
-        spawn_delta = get_spawn_delta(BOTTOM)
+class VertiBotCube(BadCube):
+    type_id = 3
+
+    def __init__(self, speed, arena, rng):
+        super().__init__('VertiBCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        spawn_delta = get_spawn_delta(BOTTOM, arena, rng)
         self.speed_y = -speed
             
         self.rect.center = (spawn_delta[0], spawn_delta[1])
 
 
-class RockCube(Cube):
-    
-    def __init__(self):
-        super().__init__(rock_filename)
-        
-        spawn_delta = get_spawn_delta('anywhere')
+class RockCube(BadCube):
+    type_id = 5
+
+    def __init__(self, speed, arena, rng):
+        """speed is ignored, rocks don't move."""
+        super().__init__('RockCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        spawn_delta = get_spawn_delta('anywhere', arena, rng)
         
         self.rect.center = (spawn_delta[0], spawn_delta[1])
        
-class DiaCube(Cube):
-    def __init__(self, speed):
-        super().__init__(dia_filename)
-        
-        if random.randint(0,1):
-            if random.randint(0,1):
-                spawn_delta = get_spawn_delta('left')
+class DiaCube(BadCube):
+    type_id = 4
+
+    def __init__(self, speed, arena, rng):
+        super().__init__('DiaCube')
+        self.respawn(speed, arena, rng)
+
+    def respawn(self, speed, arena, rng):
+        self.reset()
+        if rng.randint(0,1):
+            if rng.randint(0,1):
+                spawn_delta = get_spawn_delta('left', arena, rng)
                 self.speed_x = speed
             else:
-                spawn_delta = get_spawn_delta('right')
+                spawn_delta = get_spawn_delta('right', arena, rng)
                 self.speed_x = -speed
             
-            if random.randint(0,1):
+            if rng.randint(0,1):
                 self.speed_y = speed
             else:
                 self.speed_y = -speed
                 
         else:
-            if random.randint(0,1):
-                spawn_delta = get_spawn_delta('top')
+            if rng.randint(0,1):
+                spawn_delta = get_spawn_delta('top', arena, rng)
                 self.speed_y = speed
             else:
-                spawn_delta = get_spawn_delta('bottom')
+                spawn_delta = get_spawn_delta('bottom', arena, rng)
                 self.speed_y = -speed
             
-            if random.randint(0,1):
+            if rng.randint(0,1):
                 self.speed_x = speed
             else:
                 self.speed_x = -speed
         
         self.rect.center = (spawn_delta[0], spawn_delta[1])
 
-def get_spawn_delta(direction):
+def get_spawn_delta(direction, arena, rng):
+    (width, height, spawn_buffer) = arena
     if direction == 'left':
-        return [spawn_buffer, random.randint(spawn_buffer, height - spawn_buffer)]
+        return [spawn_buffer, rng.randint(spawn_buffer, height - spawn_buffer)]
     elif direction == 'right':
-        return [width - spawn_buffer, random.randint(spawn_buffer, height - spawn_buffer)]
+        return [width - spawn_buffer, rng.randint(spawn_buffer, height - spawn_buffer)]
     elif direction == 'top':
-        return [random.randint(spawn_buffer, width - spawn_buffer), spawn_buffer]
+        return [rng.randint(spawn_buffer, width - spawn_buffer), spawn_buffer]
     elif direction == 'bottom':
-        return [random.randint(spawn_buffer, width - spawn_buffer), height - spawn_buffer]
+        return [rng.randint(spawn_buffer, width - spawn_buffer), height - spawn_buffer]
     elif direction == 'anywhere':
-        return [random.randint(spawn_buffer, width - spawn_buffer), random.randint(spawn_buffer, height - spawn_buffer)]
-
-def load_image(filename):
-    image = pygame.image.load(filename).convert()
-    imagerect = image.get_rect()
-    
-    return (image, imagerect)
\ No newline at end of file
+        return [rng.randint(spawn_buffer, width - spawn_buffer), rng.randint(spawn_buffer, height - spawn_buffer)]
@@ -0,0 +1,59 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+# Longest a single frame is allowed to count for, in seconds
+MAX_FRAME_SECONDS = 0.25
+
+
+class FixedTimestep(object):
+    """Turns the real time between frames into fixed-length simulation ticks.
+
+    Time left over after the last whole tick is carried into the next
+    frame, so the game runs tick_rate ticks per second whatever the frame
+    rate, and a slow frame is made up for with extra ticks. alpha tells how
+    far into the next tick the game is, for drawing in between ticks.
+
+    A frame longer than max_frame_seconds (a dragged window, a debugger)
+    only counts as that long, so the game pauses instead of racing through
+    the missed time.
+    """
+    def __init__(self, tick_rate, max_frame_seconds=MAX_FRAME_SECONDS):
+        self._tick_seconds = 1.0 / tick_rate
+        self._max_frame_seconds = max_frame_seconds
+        self._accumulator = 0.0
+        self._last_time = None
+
+    @property
+    def alpha(self):
+        """Fraction of a tick which has passed since the last one, 0 to 1."""
+        return self._accumulator / self._tick_seconds
+
+    def advance(self, now=None):
+        """Returns how many ticks to run for the time since the last call.
+
+        now defaults to time.perf_counter(). The first call starts the
+        clock and returns 0.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._last_time is None:
+            self._last_time = now
+
+        self._accumulator += min(now - self._last_time, self._max_frame_seconds)
+        self._last_time = now
+
+        ticks = int(self._accumulator / self._tick_seconds)
+        self._accumulator = max(0.0, self._accumulator - ticks * self._tick_seconds)
+        return ticks
@@ -0,0 +1,50 @@
+# Copyright 2012 Bill Tyros
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pygame
+
+
+class Viewport(object):
+    """The part of the world shown on the screen.
+
+    It follows the player around worlds bigger than the screen, without
+    showing past their edges, and stays put when the world fits on the
+    screen.
+    """
+    def __init__(self, width, height):
+        self._rect = pygame.Rect(0, 0, width, height)
+
+    @property
+    def rect(self):
+        """What's shown, in world coordinates."""
+        return self._rect
+
+    def follow(self, center, arena):
+        """Centers the viewport on center, a point of arena."""
+        self._rect.x = get_offset(center[0], self._rect.width, arena.width)
+        self._rect.y = get_offset(center[1], self._rect.height, arena.height)
+
+    def to_screen(self, position):
+        """Converts a rect or point from world to screen coordinates."""
+        if isinstance(position, pygame.Rect):
+            return position.move(-self._rect.x, -self._rect.y)
+        return (position[0] - self._rect.x, position[1] - self._rect.y)
+
+
+def get_offset(center, view_length, world_length):
+    """Returns where along world_length a view_length window around center
+    starts."""
+    if world_length <= view_length:
+        return (world_length - view_length) // 2
+
+    return min(max(center - view_length // 2, 0), world_length - view_length)